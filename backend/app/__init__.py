@@ -10,23 +10,100 @@ backend_dir = Path(__file__).parent.parent
 load_dotenv(backend_dir / '.env')
 
 from flask import Flask
+from .bulk import campsite_import
+from .cache import backends
+from .db import changes, query
+from .geo import columnar
+from .http import compression
+from .http.json_provider import FastJSONProvider
 from .routes.health import health_bp    # basic connection health check
 from .routes.users import users_bp
 from .routes.campsites import campsites_bp
 from .routes.trips import trips_bp
 from .routes.trip_entries import trip_entries_bp
 from .routes.auth import auth_bp
+from .routes.batch import batch_bp
+from .routes.bulk import bulk_bp
+
+GEO_ENGINES = ("sql", "grid", "numpy")
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)    # Decimal as numbers, dates as ISO 8601
 
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret-key")
 
+    # nearby search backend: "sql" (MySQL), "grid" (in-process index)
+    # or "numpy" (vectorized columnar store, requires numpy)
+    app.config["GEO_ENGINE"] = os.getenv("GEO_ENGINE", "sql")
+    if app.config["GEO_ENGINE"] not in GEO_ENGINES:
+        raise ValueError(f"Unknown GEO_ENGINE {app.config['GEO_ENGINE']!r}")
+    if app.config["GEO_ENGINE"] == "numpy" and columnar.np is None:
+        raise RuntimeError("GEO_ENGINE 'numpy' requires the numpy package")
+    app.config["GEO_INDEX_REFRESH_SECONDS"] = int(os.getenv("GEO_INDEX_REFRESH_SECONDS", "60"))
+    # cached nearby searches per worker (0 disables); writes only evict the
+    # entries of the worker that handled them, so stale results can be served
+    # by other workers until GEO_INDEX_REFRESH_SECONDS
+    app.config["NEARBY_CACHE_SIZE"] = int(os.getenv("NEARBY_CACHE_SIZE", "0"))
+    app.config["TILE_MAX_AGE_SECONDS"] = int(os.getenv("TILE_MAX_AGE_SECONDS", "3600"))
+
+    # shared cache: "local" (per process) or "redis" (requires redis)
+    app.config["CACHE_BACKEND"] = os.getenv("CACHE_BACKEND", "local")
+    if app.config["CACHE_BACKEND"] not in backends.CACHE_BACKENDS:
+        raise ValueError(f"Unknown CACHE_BACKEND {app.config['CACHE_BACKEND']!r}")
+    if app.config["CACHE_BACKEND"] == "redis" and backends.redis is None:
+        raise RuntimeError("CACHE_BACKEND 'redis' requires the redis package")
+    app.config["CACHE_URL"] = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+    app.config["CACHE_DEFAULT_TTL"] = int(os.getenv("CACHE_DEFAULT_TTL", "60"))
+    app.config["CACHE_MAX_ENTRIES"] = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    # read-through cache of campsite/trip/user rows and ownership checks
+    app.config["ENTITY_CACHE"] = os.getenv("ENTITY_CACHE", "false").lower() in ("1", "true", "yes")
+    # ETag / If-None-Match on read endpoints (requires migrations/003_row_versions.sql)
+    app.config["ETAGS"] = os.getenv("ETAGS", "false").lower() in ("1", "true", "yes")
+    # GET /api/campsites/changes (requires migrations/004_campsite_changes.sql)
+    app.config["CHANGE_FEED"] = os.getenv("CHANGE_FEED", "false").lower() in ("1", "true", "yes")
+    app.config["CHANGE_LOG_RETENTION_DAYS"] = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+    # endpoints whose @cached_route responses are cached, e.g. "trips.list_trips"
+    app.config["CACHE_ROUTES"] = frozenset(
+        endpoint.strip()
+        for endpoint in os.getenv("CACHE_ROUTES", "").split(",")
+        if endpoint.strip()
+    )
+
+    # /api/batch: sub-requests per batch, and threads for concurrent reads
+    app.config["BATCH_MAX_REQUESTS"] = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+    app.config["BATCH_MAX_WORKERS"] = int(os.getenv("BATCH_MAX_WORKERS", "4"))
+
+    # response compression: encodings offered in preference order (unset
+    # offers every installed one; empty disables), smallest body compressed
+    # and compression level (clamped to each encoding's maximum)
+    algorithms = os.getenv("COMPRESS_ALGORITHMS")
+    if algorithms is None:
+        app.config["COMPRESS_ALGORITHMS"] = compression.available_encodings()
+    else:
+        app.config["COMPRESS_ALGORITHMS"] = tuple(
+            name.strip() for name in algorithms.split(",") if name.strip()
+        )
+    for name in app.config["COMPRESS_ALGORITHMS"]:
+        if name not in compression.ENCODINGS:
+            raise ValueError(f"Unknown COMPRESS_ALGORITHMS entry {name!r}")
+        if name not in compression.available_encodings():
+            raise RuntimeError(f"COMPRESS_ALGORITHMS {name!r} requires the {compression.ENCODING_PACKAGES[name]} package")
+    app.config["COMPRESS_MIN_SIZE"] = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    app.config["COMPRESS_LEVEL"] = int(os.getenv("COMPRESS_LEVEL", "6"))
+
+    compression.init_app(app)    # runs after the commit below
+    query.init_app(app)    # per-request connection and transaction
+    campsite_import.init_app(app)    # flask import-campsites
+    changes.init_app(app)    # flask compact-campsite-changes
+
     app.register_blueprint(health_bp, url_prefix="/api")
     app.register_blueprint(users_bp, url_prefix="/api")
     app.register_blueprint(campsites_bp, url_prefix="/api")
     app.register_blueprint(trips_bp, url_prefix="/api")
     app.register_blueprint(trip_entries_bp, url_prefix="/api")
     app.register_blueprint(auth_bp, url_prefix="/api")
+    app.register_blueprint(batch_bp, url_prefix="/api")
+    app.register_blueprint(bulk_bp, url_prefix="/api")
 
     return app
\ No newline at end of file
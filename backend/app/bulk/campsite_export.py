@@ -0,0 +1,94 @@
+"""
+Streaming campsite export as NDJSON or a GeoJSON FeatureCollection.
+
+Rows are read from an unbuffered cursor with fetchmany (app.db.query.iter_query)
+and encoded a chunk at a time, so a worker never holds the full result set
+or the full response body in memory.
+"""
+
+from itertools import islice
+
+from flask import current_app
+
+from app.db.query import iter_query
+
+# Export format -> response MIME type.
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "geojson": "application/geo+json",
+}
+
+# Rows fetched per round trip and encoded per yielded chunk.
+EXPORT_BATCH_SIZE = 1000
+
+
+def iter_batches(rows, size=EXPORT_BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def to_feature(row, fields):
+    """
+    Converts a campsite row to a GeoJSON Point feature. Coordinates go in
+    the geometry; the other selected fields become properties.
+    """
+    return {
+        "type": "Feature",
+        "id": row["campsite_id"],
+        "geometry": {
+            "type": "Point",
+            "coordinates": [float(row["longitude"]), float(row["latitude"])],
+        },
+        "properties": {
+            field: row[field]
+            for field in fields
+            if field not in ("latitude", "longitude") and field in row
+        },
+    }
+
+
+def encode_ndjson(rows, fields):
+    """
+    Yields NDJSON text chunks, one campsite object per line.
+    """
+    dumps = current_app.json.dumps
+    for batch in iter_batches(rows):
+        yield "".join(
+            dumps({field: row[field] for field in fields if field in row}) + "\n"
+            for row in batch
+        )
+
+
+def encode_geojson(rows, fields):
+    """
+    Yields the text chunks of one GeoJSON FeatureCollection.
+    """
+    dumps = current_app.json.dumps
+    yield '{"type":"FeatureCollection","features":['
+    separator = ""
+    for batch in iter_batches(rows):
+        yield separator + ",".join(dumps(to_feature(row, fields)) for row in batch)
+        separator = ","
+    yield "]}\n"
+
+
+def export_campsites(fmt, query, params, fields):
+    """
+    Streams the rows of a campsite SELECT in an export format.
+
+    Parameters:
+    - fmt: a key of EXPORT_FORMATS
+    - query, params: the SELECT (must include latitude and longitude for geojson)
+    - fields: output fields, in order
+
+    Returns:
+    - a generator of text chunks; iterate it inside the request context
+    """
+    rows = iter_query(query, params, batch_size=EXPORT_BATCH_SIZE)
+    if fmt == "geojson":
+        return encode_geojson(rows, fields)
+    return encode_ndjson(rows, fields)
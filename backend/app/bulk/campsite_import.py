@@ -0,0 +1,393 @@
+"""
+Bulk campsite import from CSV or GeoJSON.
+
+Files are parsed as a stream, one row at a time, so memory use does not grow
+with the file. Rows are validated with the same rules as POST /api/campsites
+and inserted in batches: each batch is one multi-row INSERT (executemany)
+committed in its own transaction. While CHANGE_FEED is enabled, a batch's
+rows are inserted one at a time instead, so the change log gets the IDs
+MySQL actually assigned.
+
+Progress is reported after every batch. Its next_start is the number of
+source rows already committed; passing it back as `start` resumes an
+interrupted import without inserting those rows twice. A dry run validates
+the whole file without writing anything.
+
+Used by the `flask import-campsites` command and POST /api/campsites/import.
+"""
+
+import csv
+import json
+import re
+from pathlib import Path
+
+import click
+from flask.cli import with_appcontext
+
+from app.db.changes import change_feed_enabled, log_upserts
+from app.db.query import commit, execute_many, execute_query, rollback
+from app.db.versions import bump_versions, campsite_scopes
+from app.routes.campsites import reset_campsite_indexes, validate_campsite_payload
+
+IMPORT_FORMATS = ("csv", "geojson")
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 5000
+
+# Invalid rows listed in the progress report; later ones are only counted.
+MAX_REPORTED_ERRORS = 100
+
+# Longest GeoJSON feature (in characters) the parser will buffer.
+MAX_FEATURE_SIZE = 1_000_000
+
+IMPORT_FIELDS = (
+    "campsite_name",
+    "latitude",
+    "longitude",
+    "campsite_type",
+    "campsite_identifier",
+    "is_public",
+    "dump_available",
+    "electric_hookup_available",
+    "water_available",
+    "restroom_available",
+    "shower_available",
+    "pets_allowed",
+    "wifi_available",
+    "cell_carrier",
+    "cell_quality",
+    "nearby_recreation",
+)
+
+BOOLEAN_FIELDS = (
+    "is_public",
+    "dump_available",
+    "electric_hookup_available",
+    "water_available",
+    "restroom_available",
+    "shower_available",
+    "pets_allowed",
+    "wifi_available",
+)
+
+TRUE_VALUES = ("1", "true", "t", "yes", "y")
+FALSE_VALUES = ("0", "false", "f", "no", "n", "")
+
+INSERT_CAMPSITES = f"""
+    INSERT INTO campsites (user_id, {", ".join(IMPORT_FIELDS)})
+    VALUES ({", ".join(["%s"] * (len(IMPORT_FIELDS) + 1))})
+"""
+
+FEATURES_START = re.compile(r'"features"\s*:\s*\[')
+
+
+class ImportFormatError(ValueError):
+    """
+    Raised when the input file cannot be parsed.
+    """
+
+
+# ------------------------
+# Parsing
+# ------------------------
+
+def iter_csv_rows(stream):
+    """
+    Yields one dict per CSV data row, keyed by the header row.
+    """
+    yield from csv.DictReader(stream)
+
+
+def iter_geojson_rows(stream, chunk_size=65536):
+    """
+    Yields one dict per Point feature of a GeoJSON FeatureCollection: the
+    feature's properties plus latitude/longitude from its geometry.
+
+    Features are decoded one at a time while the file is read in chunks,
+    so only the current feature is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def read_more():
+        nonlocal buffer, eof
+        chunk = stream.read(chunk_size)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+    while not FEATURES_START.search(buffer):
+        if eof:
+            raise ImportFormatError("GeoJSON input is not a FeatureCollection")
+        # keep a tail in case the "features" key spans two chunks
+        buffer = buffer[-32:]
+        read_more()
+    pos = FEATURES_START.search(buffer).end()
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ImportFormatError("Unexpected end of GeoJSON input")
+            buffer, pos = "", 0
+            read_more()
+            continue
+        if buffer[pos] == "]":
+            return
+
+        try:
+            feature, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as error:
+            if eof or len(buffer) - pos > MAX_FEATURE_SIZE:
+                raise ImportFormatError(f"Invalid GeoJSON feature: {error.msg}") from error
+            # the feature continues in the next chunk
+            buffer, pos = buffer[pos:], 0
+            read_more()
+            continue
+
+        buffer, pos = buffer[end:], 0
+        yield feature_to_row(feature)
+
+
+def feature_to_row(feature):
+    """
+    Flattens a GeoJSON Point feature into a campsite row.
+    Non-point features yield their properties only (and fail validation).
+    """
+    if not isinstance(feature, dict):
+        return {}
+    row = dict(feature.get("properties") or {})
+    geometry = feature.get("geometry") or {}
+    if geometry.get("type") == "Point" and len(geometry.get("coordinates") or ()) >= 2:
+        longitude, latitude = geometry["coordinates"][:2]
+        row.setdefault("latitude", latitude)
+        row.setdefault("longitude", longitude)
+    return row
+
+
+def parse_boolean(value):
+    """
+    Returns a bool for bool/int values and for strings such as
+    "true", "yes", "1", "false", "no", "0" or "". Returns None otherwise.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return value != 0
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+    return None
+
+
+def normalize_row(raw):
+    """
+    Validates a source row and converts it to the column values of a
+    campsite.
+
+    Returns:
+    - (row, None) on success
+    - (None, error message) if the row is invalid
+    """
+    row = {}
+    for field in IMPORT_FIELDS:
+        value = raw.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value == "" and field not in BOOLEAN_FIELDS:
+            continue
+        if value is not None:
+            row[field] = value
+
+    if not validate_campsite_payload(row):
+        return None, "Missing required fields"
+
+    for field, limit in (("latitude", 90), ("longitude", 180)):
+        try:
+            row[field] = float(row[field])
+        except (TypeError, ValueError):
+            return None, f"Invalid {field}"
+        if not -limit <= row[field] <= limit:
+            return None, f"Invalid {field}"
+
+    for field in BOOLEAN_FIELDS:
+        row[field] = parse_boolean(row[field])
+        if row[field] is None:
+            return None, f"Invalid {field}"
+
+    return row, None
+
+
+# ------------------------
+# Import
+# ------------------------
+
+class CampsiteImport:
+    """
+    One import run.
+
+    Parameters:
+    - user_id: owner of the imported campsites
+    - fmt: "csv" or "geojson"
+    - batch_size: rows per INSERT and per transaction
+    - start: source rows to skip (next_start of an earlier run)
+    - dry_run: validate only, never write
+    """
+
+    def __init__(self, user_id, fmt, batch_size=DEFAULT_BATCH_SIZE, start=0, dry_run=False):
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Unknown import format {fmt!r}")
+        self.user_id = user_id
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.start = start
+        self.dry_run = dry_run
+
+        self.rows = 0
+        self.inserted = 0
+        self.invalid = 0
+        self.errors = []
+        self.next_start = start
+
+    def progress(self):
+        """
+        Returns the current counters as a JSON-serializable dict.
+        """
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "invalid": self.invalid,
+            "next_start": self.next_start,
+            "dry_run": self.dry_run,
+            "errors": self.errors,
+        }
+
+    def run(self, stream):
+        """
+        Imports rows from a text stream, yielding progress() after every
+        batch and once more (with "done": True) at the end.
+
+        A failed batch is rolled back and the error propagates; progress()
+        still reports the next_start to resume from.
+        """
+        parse = iter_csv_rows if self.fmt == "csv" else iter_geojson_rows
+        batch = []
+        number = 0
+
+        try:
+            for number, raw in enumerate(parse(stream), 1):
+                if number <= self.start:
+                    continue
+                self.rows += 1
+
+                row, message = normalize_row(raw)
+                if message:
+                    self.invalid += 1
+                    if len(self.errors) < MAX_REPORTED_ERRORS:
+                        self.errors.append({"row": number, "error": message})
+                else:
+                    batch.append(row)
+
+                if len(batch) == self.batch_size:
+                    self._flush(batch, number)
+                    batch = []
+                    yield self.progress()
+        except (csv.Error, UnicodeDecodeError) as error:
+            raise ImportFormatError(str(error)) from error
+
+        self._flush(batch, max(number, self.start))
+        if self.inserted:
+            reset_campsite_indexes()
+        yield {**self.progress(), "done": True}
+
+    def _flush(self, batch, last_number):
+        """
+        Inserts a batch in its own transaction and advances next_start to
+        the last source row it covers.
+        """
+        if batch and not self.dry_run:
+            rows = [
+                (self.user_id, *(row.get(field) for field in IMPORT_FIELDS))
+                for row in batch
+            ]
+            try:
+                if change_feed_enabled():
+                    campsite_ids = [
+                        execute_query(INSERT_CAMPSITES, params)[2] for params in rows
+                    ]
+                    log_upserts(*campsite_ids)
+                else:
+                    execute_many(INSERT_CAMPSITES, rows)
+                bump_versions(*campsite_scopes(self.user_id))
+                commit()
+            except Exception:
+                rollback()
+                raise
+            self.inserted += len(batch)
+        self.next_start = last_number
+
+
+def infer_format(name):
+    """
+    Returns the import format implied by a file name or MIME type, or None.
+    """
+    name = (name or "").lower()
+    if name.endswith("csv"):
+        return "csv"
+    if name.endswith(("geojson", "geo+json", "json")):
+        return "geojson"
+    return None
+
+
+# ------------------------
+# CLI
+# ------------------------
+
+@click.command("import-campsites")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--user-id", type=int, required=True, help="Owner of the imported campsites.")
+@click.option("--format", "fmt", type=click.Choice(IMPORT_FORMATS), help="Defaults to the file extension.")
+@click.option("--batch-size", type=click.IntRange(1, MAX_BATCH_SIZE), default=DEFAULT_BATCH_SIZE)
+@click.option("--start", type=click.IntRange(0), default=0, help="Source rows to skip.")
+@click.option("--checkpoint", type=click.Path(dir_okay=False, path_type=Path),
+              help="File recording next_start after every batch; resumes from it when present.")
+@click.option("--dry-run", is_flag=True, help="Validate without inserting.")
+@with_appcontext
+def import_campsites_command(path, user_id, fmt, batch_size, start, checkpoint, dry_run):
+    """
+    Imports campsites from a CSV or GeoJSON file.
+    """
+    fmt = fmt or infer_format(path.name)
+    if fmt is None:
+        raise click.UsageError("Cannot infer the format; pass --format")
+    if checkpoint and checkpoint.exists() and not dry_run:
+        start = int(checkpoint.read_text().strip() or 0)
+        click.echo(f"Resuming at row {start}")
+
+    job = CampsiteImport(user_id, fmt, batch_size=batch_size, start=start, dry_run=dry_run)
+    with path.open(encoding="utf-8", newline="") as stream:
+        try:
+            for progress in job.run(stream):
+                if checkpoint and not dry_run:
+                    checkpoint.write_text(str(progress["next_start"]))
+                click.echo(
+                    f"rows={progress['rows']} inserted={progress['inserted']} "
+                    f"invalid={progress['invalid']} next_start={progress['next_start']}"
+                )
+        except ImportFormatError as error:
+            raise click.ClickException(f"{error} (resume with --start {job.next_start})")
+
+    for error in job.errors:
+        click.echo(f"row {error['row']}: {error['error']}", err=True)
+
+
+def init_app(app):
+    """
+    Registers the import-campsites CLI command.
+    """
+    app.cli.add_command(import_campsites_command)
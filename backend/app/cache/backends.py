@@ -0,0 +1,387 @@
+"""
+Cache backends shared by the API routes.
+
+LocalCache keeps entries in this worker process. RedisCache stores them in
+Redis so every gunicorn worker and host shares one cache; the redis package
+is an optional dependency, only required when CACHE_BACKEND is "redis".
+
+Both backends support TTLs, bulk get/set, integer counters (used for
+versioned namespaces) and get_or_set() with stampede protection: when many
+requests miss the same key at once, only one runs the loader while the
+others wait for its result.
+
+Counters expire counter_ttl seconds after their last increment. It must be
+longer than any entry TTL, so the entries keyed by a counter's value are
+gone by the time it expires and restarts.
+
+Callers use a CacheNamespace, which prefixes keys so unrelated features
+never collide.
+"""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - exercised only without redis
+    redis = None
+
+CACHE_BACKENDS = ("local", "redis")
+
+# Default lifetime of an idle counter (see module docstring).
+DEFAULT_COUNTER_TTL = 24 * 3600
+
+_MISSING = object()
+
+
+class BaseCache:
+    """
+    Interface shared by the cache backends. Keys are strings; values are
+    any picklable object. A ttl of None uses the backend's default_ttl.
+    """
+
+    def __init__(self, default_ttl=60, prefix="rvcp", counter_ttl=DEFAULT_COUNTER_TTL):
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self.counter_ttl = counter_ttl
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        """
+        Returns {key: value} for the keys that are cached.
+        """
+        raise NotImplementedError
+
+    def set_many(self, mapping, ttl=None):
+        raise NotImplementedError
+
+    def incr(self, key):
+        """
+        Atomically increments an integer counter (created at 0) and returns
+        the new value. Each increment extends the counter's life to
+        counter_ttl seconds.
+        """
+        raise NotImplementedError
+
+    def get_or_set(self, key, loader, ttl=None, cacheable=None):
+        """
+        Returns the cached value of `key`, calling loader() on a miss.
+        Concurrent misses on the same key run the loader once.
+
+        Parameters:
+        - cacheable: optional predicate; loaded values it rejects are
+          returned but not stored
+        """
+        raise NotImplementedError
+
+    def namespace(self, name):
+        return CacheNamespace(self, name)
+
+    def _ttl(self, ttl):
+        return self.default_ttl if ttl is None else ttl
+
+
+class LocalCache(BaseCache):
+    """
+    In-process LRU cache with per-entry expiry.
+
+    Counters are kept apart from the entries, under the same LRU bound.
+    Increments draw from one sequence shared by all counters, so a counter
+    that was evicted or expired never repeats a value it held before.
+
+    Parameters:
+    - max_entries: maximum number of entries, and of counters
+    - default_ttl: seconds an entry lives unless set() passes a ttl
+    - counter_ttl: seconds a counter lives after its last increment
+    """
+
+    def __init__(self, max_entries=10_000, default_ttl=60, prefix="rvcp",
+                 counter_ttl=DEFAULT_COUNTER_TTL):
+        super().__init__(default_ttl, prefix, counter_ttl)
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._counters = OrderedDict()
+        self._sequence = 0
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._get_locked(key, default)
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + self._ttl(ttl)
+        with self._lock:
+            self._set_locked(key, value, expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._counters.pop(key, None)
+
+    def get_many(self, keys):
+        result = {}
+        with self._lock:
+            for key in keys:
+                value = self._get_locked(key, _MISSING)
+                if value is not _MISSING:
+                    result[key] = value
+        return result
+
+    def set_many(self, mapping, ttl=None):
+        expires_at = time.monotonic() + self._ttl(ttl)
+        with self._lock:
+            for key, value in mapping.items():
+                self._set_locked(key, value, expires_at)
+
+    def incr(self, key):
+        expires_at = time.monotonic() + self.counter_ttl
+        with self._lock:
+            self._sequence += 1
+            self._counters[key] = (expires_at, self._sequence)
+            self._counters.move_to_end(key)
+            while len(self._counters) > self.max_entries:
+                self._counters.popitem(last=False)
+            return self._sequence
+
+    def get_or_set(self, key, loader, ttl=None, cacheable=None):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            flight = self._loading.get(key)
+            if flight is None:
+                flight = self._loading[key] = [threading.Lock(), 0]
+            flight[1] += 1
+
+        try:
+            with flight[0]:
+                value = self.get(key, _MISSING)
+                if value is _MISSING:
+                    value = loader()
+                    if cacheable is None or cacheable(value):
+                        self.set(key, value, ttl)
+        finally:
+            with self._lock:
+                flight[1] -= 1
+                if not flight[1]:
+                    del self._loading[key]
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "local",
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _get_locked(self, key, default):
+        counter = self._counters.get(key)
+        if counter is not None:
+            expires_at, value = counter
+            if time.monotonic() < expires_at:
+                self._counters.move_to_end(key)
+                return value
+            del self._counters[key]
+            return default
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return default
+
+    def _set_locked(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class RedisCache(BaseCache):
+    """
+    Cache stored in Redis (or any server speaking the Redis protocol).
+
+    Parameters:
+    - url: Redis connection URL, e.g. redis://localhost:6379/0
+    - client: an existing redis.Redis-compatible client (overrides url)
+    - default_ttl: seconds an entry lives unless set() passes a ttl
+    - lock_timeout: seconds a get_or_set() loader may hold the stampede
+      lock before waiting requests give up and load for themselves
+    - counter_ttl: seconds a counter lives after its last increment
+    """
+
+    def __init__(self, url=None, client=None, default_ttl=60, prefix="rvcp", lock_timeout=10,
+                 counter_ttl=DEFAULT_COUNTER_TTL):
+        super().__init__(default_ttl, prefix, counter_ttl)
+        if client is None:
+            if redis is None:
+                raise RuntimeError("CACHE_BACKEND 'redis' requires the redis package")
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self._client = client
+        self.lock_timeout = lock_timeout
+
+    def get(self, key, default=None):
+        data = self._client.get(key)
+        return default if data is None else self._loads(data)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(key, pickle.dumps(value), ex=self._ttl(ttl))
+
+    def delete(self, key):
+        self._client.delete(key)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        return {
+            key: self._loads(data)
+            for key, data in zip(keys, self._client.mget(keys))
+            if data is not None
+        }
+
+    def set_many(self, mapping, ttl=None):
+        if not mapping:
+            return
+        ttl = self._ttl(ttl)
+        pipeline = self._client.pipeline()
+        for key, value in mapping.items():
+            pipeline.set(key, pickle.dumps(value), ex=ttl)
+        pipeline.execute()
+
+    def incr(self, key):
+        pipeline = self._client.pipeline()
+        pipeline.incr(key)
+        pipeline.expire(key, self.counter_ttl)
+        value, _ = pipeline.execute()
+        return int(value)
+
+    def get_or_set(self, key, loader, ttl=None, cacheable=None):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f"{key}:lock"
+        if not self._client.set(lock_key, b"1", nx=True, ex=self.lock_timeout):
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = self.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+                if not self._client.exists(lock_key):
+                    break
+
+        try:
+            value = loader()
+            if cacheable is None or cacheable(value):
+                self.set(key, value, ttl)
+        finally:
+            self._client.delete(lock_key)
+        return value
+
+    def stats(self):
+        return {"backend": "redis"}
+
+    @staticmethod
+    def _loads(data):
+        # Integer counters are stored as plain INCR values, not pickles.
+        if data.isdigit():
+            return int(data)
+        return pickle.loads(data)
+
+
+class CacheNamespace:
+    """
+    View of a cache backend whose keys are prefixed with a namespace,
+    e.g. "rvcp:trips:<key>".
+
+    Namespaces can also hold version counters: version(scope) is folded into
+    keys by the caller, and bump(scope) invalidates every key built with the
+    old version at once, on every worker sharing the backend.
+    """
+
+    def __init__(self, backend, name):
+        self.backend = backend
+        self.name = name
+        self._prefix = f"{backend.prefix}:{name}:"
+
+    def key(self, key):
+        return self._prefix + str(key)
+
+    def get(self, key, default=None):
+        return self.backend.get(self.key(key), default)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(self.key(key), value, ttl)
+
+    def delete(self, key):
+        self.backend.delete(self.key(key))
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = self.backend.get_many([self.key(key) for key in keys])
+        return {key: found[self.key(key)] for key in keys if self.key(key) in found}
+
+    def set_many(self, mapping, ttl=None):
+        self.backend.set_many({self.key(key): value for key, value in mapping.items()}, ttl)
+
+    def get_or_set(self, key, loader, ttl=None, cacheable=None):
+        return self.backend.get_or_set(self.key(key), loader, ttl, cacheable)
+
+    def version(self, scope):
+        return self.backend.get(self.key(f"version:{scope}"), 0)
+
+    def versions(self, scopes):
+        """
+        Returns the version of each scope in one bulk read.
+        """
+        scopes = list(scopes)
+        found = self.get_many(f"version:{scope}" for scope in scopes)
+        return [found.get(f"version:{scope}", 0) for scope in scopes]
+
+    def bump(self, scope):
+        return self.backend.incr(self.key(f"version:{scope}"))
+
+
+def create_cache(config):
+    """
+    Creates the cache backend selected by CACHE_BACKEND.
+    """
+    backend = config["CACHE_BACKEND"]
+    if backend == "redis":
+        return RedisCache(url=config["CACHE_URL"], default_ttl=config["CACHE_DEFAULT_TTL"])
+    return LocalCache(
+        max_entries=config["CACHE_MAX_ENTRIES"],
+        default_ttl=config["CACHE_DEFAULT_TTL"],
+    )
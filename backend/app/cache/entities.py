@@ -0,0 +1,56 @@
+"""
+Versioned read-through cache of database rows by primary key.
+
+Rows are cached under "<kind>:<id>:v<version>". Write handlers call
+invalidate_entity(), which bumps the entity's version once the request
+transaction commits, so a reader that loaded the old row concurrently can
+only store it under the old version, which is never read again.
+
+The cache is enabled by ENTITY_CACHE. With the local backend each worker
+holds its own copy (other workers see writes after CACHE_DEFAULT_TTL);
+use CACHE_BACKEND=redis to share versions across workers.
+"""
+
+from flask import current_app
+
+from app.cache.route_cache import get_cache
+from app.db.query import on_commit
+
+
+def entity_cache_enabled():
+    return current_app.config["ENTITY_CACHE"]
+
+
+def get_entity(kind, entity_id, load):
+    """
+    Returns the row of an entity, calling load() on a miss.
+    Missing rows (None) are not cached.
+
+    Parameters:
+    - kind: entity type, e.g. "campsite"
+    - entity_id: primary key
+    - load: zero-argument callable returning the row or None
+    """
+    if not entity_cache_enabled():
+        return load()
+
+    entities = get_cache().namespace("entities")
+    scope = f"{kind}:{entity_id}"
+    return entities.get_or_set(
+        f"{scope}:v{entities.version(scope)}",
+        load,
+        cacheable=lambda row: row is not None,
+    )
+
+
+def invalidate_entity(kind, entity_id):
+    """
+    Invalidates the cached row of an entity once the request transaction
+    commits.
+    """
+    if not entity_cache_enabled():
+        return
+
+    entities = get_cache().namespace("entities")
+    scope = f"{kind}:{entity_id}"
+    on_commit(lambda: entities.bump(scope))
@@ -0,0 +1,74 @@
+"""
+Conditional GET support.
+
+Views decorated with @conditional_route get a strong ETag built from a
+cheap version token (a row's updated_at or collection version counters,
+see app.db.versions) instead of from the response body. A request whose
+If-None-Match matches is answered with 304 before the view runs, so the
+full query and serialization are skipped. ETags of compressed responses
+are weak, which If-None-Match still matches (weak comparison).
+
+Enabled by ETAGS, once migrations/003_row_versions.sql is applied.
+"""
+
+import functools
+import hashlib
+
+from flask import Response, current_app, g, request
+
+from app.http.wire import wire_format
+
+
+def etags_enabled():
+    return current_app.config["ETAGS"]
+
+
+def conditional_route(version_of):
+    """
+    Adds ETag / If-None-Match handling to a GET view.
+
+    Parameters:
+    - version_of: callable(user_id, **view_args) returning a token that
+      changes whenever the view's response would, or None to skip
+      (e.g. for rows the user cannot see)
+
+    The ETag also covers the endpoint, view arguments, query string and
+    user, so one token can serve every variant of a route. Versions are
+    read before the view runs: a write racing with the request can only
+    make the ETag older than the body, which costs one extra download.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not etags_enabled():
+                return view(*args, **kwargs)
+
+            token = version_of(g.user_id, **kwargs)
+            if token is None:
+                return view(*args, **kwargs)
+
+            etag = hashlib.sha1(repr((
+                request.endpoint,
+                sorted(kwargs.items()),
+                request.query_string,
+                wire_format(),
+                g.user_id,
+                token,
+            )).encode()).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak="Content-Encoding" in response.headers)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,100 @@
+"""
+Opt-in response caching for GET routes.
+
+Views decorated with @cached_route are only cached when their endpoint is
+listed in CACHE_ROUTES, so caching can be rolled out one route at a time.
+Cached entries are keyed by endpoint, view arguments, user (for per-user
+data), query string and negotiated wire format, plus a version counter
+that write handlers bump with invalidate_route() once their transaction
+commits.
+
+Entries also store a digest of their body; compressed copies are cached
+under it (see app.http.compression.precompress), so a hit is not
+recompressed for every request.
+"""
+
+import functools
+import hashlib
+
+from flask import Response, current_app, g, request
+
+from app.cache.backends import create_cache
+from app.db.query import on_commit
+from app.http.compression import precompress
+from app.http.wire import wire_format
+
+# Response headers stored alongside cached bodies.
+CACHED_HEADERS = ("X-Next-Cursor",)
+
+
+def get_cache():
+    """
+    Returns this app's cache backend, creating it on first use.
+    """
+    cache = current_app.extensions.get("cache")
+    if cache is None:
+        cache = current_app.extensions.setdefault("cache", create_cache(current_app.config))
+    return cache
+
+
+def route_scope(endpoint, view_args, user_id=None):
+    """
+    Returns the invalidation scope of a route: an endpoint, its view
+    arguments and (for per-user data) the user.
+    """
+    args = ",".join(f"{name}={view_args[name]}" for name in sorted(view_args))
+    return f"{endpoint}|{args}|{user_id}"
+
+
+def cached_route(ttl=None, vary_user=True):
+    """
+    Caches 200 responses of a GET view when its endpoint is in CACHE_ROUTES.
+
+    Parameters:
+    - ttl: entry lifetime in seconds (None uses CACHE_DEFAULT_TTL)
+    - vary_user: cache separately per g.user_id
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.endpoint not in current_app.config["CACHE_ROUTES"]:
+                return view(*args, **kwargs)
+
+            routes = get_cache().namespace("routes")
+            scope = route_scope(request.endpoint, kwargs, g.user_id if vary_user else None)
+            key = f"{scope}|v{routes.version(scope)}|{request.query_string.decode()}|{wire_format()}"
+
+            def load():
+                response = current_app.make_response(view(*args, **kwargs))
+                headers = {
+                    name: response.headers[name]
+                    for name in CACHED_HEADERS
+                    if name in response.headers
+                }
+                body = response.get_data()
+                digest = hashlib.sha1(body).hexdigest()
+                return response.status_code, body, response.mimetype, headers, digest
+
+            status, body, mimetype, headers, digest = routes.get_or_set(
+                key, load, ttl, cacheable=lambda entry: entry[0] == 200
+            )
+            response = Response(body, status=status, mimetype=mimetype, headers=headers)
+            return precompress(response, digest, get_cache().namespace("compressed"))
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_route(endpoint, user_id=None, **view_args):
+    """
+    Invalidates every cached response of a route scope once the request
+    transaction commits. No-op unless the endpoint is in CACHE_ROUTES.
+    """
+    if endpoint not in current_app.config["CACHE_ROUTES"]:
+        return
+
+    routes = get_cache().namespace("routes")
+    scope = route_scope(endpoint, view_args, user_id)
+    on_commit(lambda: routes.bump(scope))
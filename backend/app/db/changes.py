@@ -0,0 +1,254 @@
+"""
+Campsite change log (migrations/004_campsite_changes.sql).
+
+Campsite writes append a row per changed campsite as the last statements
+of their own transaction, after locking the log's row in
+change_log_locks. The lock is held until the write commits, so appends
+are serialized: a change_id only becomes visible after every smaller one,
+and a sync token never skips a change that commits later, however long
+the write ran before appending (e.g. an import batch). A client syncs by
+asking for the changes after the last change_id it has seen (its sync
+token) and gets, per changed campsite, either the current row (an
+upsert) or a tombstone when the campsite was deleted or is no longer
+visible to it.
+
+Pages are read as a range scan of the change_id primary key, so paging
+through the whole log (e.g. a since=0 snapshot) reads each row once.
+
+Compaction (`flask compact-campsite-changes`) keeps only the latest row
+per campsite, folding the older rows' visibility into it, and purges
+tombstones older than the retention period. Tokens from before the newest
+purged tombstone could miss a deletion, so they are rejected and the
+client resyncs from since=0, which returns every visible campsite.
+
+Changes are only logged while CHANGE_FEED is enabled.
+"""
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.db.query import begin, commit, execute_query, rollback
+
+# Name of the campsite log in change_log_locks and change_log_compactions.
+CAMPSITE_LOG = "campsites"
+
+
+def change_feed_enabled():
+    return current_app.config["CHANGE_FEED"]
+
+
+def append_changes(statement, params):
+    """
+    Runs an INSERT into the campsite log in the current transaction, after
+    locking the log's row so appends commit in change_id order.
+    """
+    begin()
+    execute_query(
+        "SELECT log FROM change_log_locks WHERE log = %s FOR UPDATE;",
+        (CAMPSITE_LOG,),
+        fetch_one=True,
+    )
+    execute_query(statement, params)
+
+
+def log_upserts(*campsite_ids, was_public=False):
+    """
+    Logs the state of the given campsites in the current transaction,
+    e.g. after an INSERT or UPDATE. Call it after the transaction's other
+    writes: the log stays locked until the transaction ends.
+
+    Parameters:
+    - was_public: whether the campsites were public before the write
+    """
+    if not change_feed_enabled() or not campsite_ids:
+        return
+
+    placeholders = ", ".join(["%s"] * len(campsite_ids))
+    params = (bool(was_public), *campsite_ids)
+    append_changes(
+        f"""
+        INSERT INTO campsite_changes (campsite_id, user_id, is_public, was_public)
+        SELECT campsite_id, user_id, is_public, is_public OR %s
+        FROM campsites
+        WHERE campsite_id IN ({placeholders})
+        ORDER BY campsite_id;
+        """,
+        params,
+    )
+
+
+def log_delete(campsite, user_id):
+    """
+    Logs the deletion of a campsite in the current transaction.
+
+    Parameters:
+    - campsite: the row before the DELETE (campsite_id, is_public)
+    - user_id: its owner
+    """
+    if not change_feed_enabled():
+        return
+
+    params = (campsite["campsite_id"], user_id, bool(campsite["is_public"]))
+    append_changes(
+        """
+        INSERT INTO campsite_changes (campsite_id, user_id, is_public, was_public, deleted)
+        VALUES (%s, %s, FALSE, %s, TRUE);
+        """,
+        params,
+    )
+
+
+def compacted_through():
+    """
+    Returns the oldest sync token still accepted (0 before any purge).
+    """
+    row, _, _ = execute_query(
+        "SELECT compacted_through FROM change_log_compactions WHERE log = %s;",
+        (CAMPSITE_LOG,),
+        fetch_one=True,
+    )
+    return row["compacted_through"] if row else 0
+
+
+def read_changes(since, user_id, limit):
+    """
+    Reads up to `limit` log rows after `since` that the user could see
+    before or after the change. A campsite changed more than once among
+    them is listed once, at its latest change.
+
+    Returns:
+    - list of {"campsite_id", "change_id"}, oldest change first
+    - change_id of the last row read (the next sync token)
+    - whether more rows follow
+    """
+    rows, _, _ = execute_query(
+        """
+        SELECT change_id, campsite_id
+        FROM campsite_changes
+        WHERE change_id > %s
+          AND (is_public = TRUE OR was_public = TRUE OR user_id = %s)
+        ORDER BY change_id
+        LIMIT %s;
+        """,
+        (since, user_id, limit + 1),
+        fetch_all=True,
+    )
+    rows = rows or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for row in rows:
+        latest.pop(row["campsite_id"], None)
+        latest[row["campsite_id"]] = row["change_id"]
+    changes = [
+        {"campsite_id": campsite_id, "change_id": change_id}
+        for campsite_id, change_id in latest.items()
+    ]
+    return changes, rows[-1]["change_id"] if rows else since, has_more
+
+
+def compact_changes(retention_days):
+    """
+    Compacts the campsite log in one transaction.
+
+    Returns:
+    - (superseded rows removed, tombstones purged)
+    """
+    row, _, _ = execute_query(
+        "SELECT MAX(change_id) AS change_id FROM campsite_changes;",
+        fetch_one=True,
+    )
+    through = row["change_id"] if row else None
+    if through is None:
+        return 0, 0
+
+    try:
+        execute_query(
+            """
+            UPDATE campsite_changes latest
+            JOIN (
+                SELECT MAX(change_id) AS change_id,
+                       MAX(is_public OR was_public) AS seen_public
+                FROM campsite_changes
+                WHERE change_id <= %s
+                GROUP BY campsite_id
+                HAVING COUNT(*) > 1
+            ) merged ON latest.change_id = merged.change_id
+            SET latest.was_public = latest.was_public OR merged.seen_public;
+            """,
+            (through,),
+        )
+        _, superseded, _ = execute_query(
+            """
+            DELETE older
+            FROM campsite_changes older
+            JOIN (
+                SELECT campsite_id, MAX(change_id) AS change_id
+                FROM campsite_changes
+                WHERE change_id <= %s
+                GROUP BY campsite_id
+            ) latest ON older.campsite_id = latest.campsite_id
+                    AND older.change_id < latest.change_id;
+            """,
+            (through,),
+        )
+
+        expired, _, _ = execute_query(
+            """
+            SELECT MAX(change_id) AS change_id
+            FROM campsite_changes
+            WHERE deleted = TRUE
+              AND change_id <= %s
+              AND changed_at < NOW(6) - INTERVAL %s DAY;
+            """,
+            (through, retention_days),
+            fetch_one=True,
+        )
+        purged = 0
+        if expired and expired["change_id"] is not None:
+            _, purged, _ = execute_query(
+                "DELETE FROM campsite_changes WHERE deleted = TRUE AND change_id <= %s;",
+                (expired["change_id"],),
+            )
+            execute_query(
+                """
+                INSERT INTO change_log_compactions (log, compacted_through)
+                VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE
+                    compacted_through = GREATEST(compacted_through, VALUES(compacted_through));
+                """,
+                (CAMPSITE_LOG, expired["change_id"]),
+            )
+        commit()
+    except Exception:
+        rollback()
+        raise
+
+    return superseded, purged
+
+
+# ------------------------
+# CLI
+# ------------------------
+
+@click.command("compact-campsite-changes")
+@click.option("--retention-days", type=click.IntRange(0), default=None,
+              help="Keep tombstones this long (default CHANGE_LOG_RETENTION_DAYS).")
+@with_appcontext
+def compact_changes_command(retention_days):
+    """
+    Compacts the campsite change log.
+    """
+    if retention_days is None:
+        retention_days = current_app.config["CHANGE_LOG_RETENTION_DAYS"]
+    superseded, purged = compact_changes(retention_days)
+    click.echo(f"superseded={superseded} purged={purged}")
+
+
+def init_app(app):
+    """
+    Registers the compact-campsite-changes CLI command.
+    """
+    app.cli.add_command(compact_changes_command)
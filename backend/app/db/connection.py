@@ -1,15 +1,432 @@
 """
 Database connection utilities.
-Connects to the OSU MySQL database
+Connects to the OSU MySQL database through a process-wide connection pool.
+
+Every blueprint draws its connections from the pool returned by get_pool().
+Calling close() on a pooled connection hands it back to the pool instead of
+tearing down the socket. Connections run in autocommit mode; write paths
+open explicit transactions (see app.db.query).
+
+Pool behaviour is configured through environment variables:
+- DB_POOL_SIZE: connections kept open while idle (default 5)
+- DB_POOL_MAX_OVERFLOW: extra connections allowed under load (default 10)
+- DB_POOL_TIMEOUT: seconds to wait for a free connection (default 30)
+- DB_POOL_RECYCLE: maximum connection age in seconds (default 3600)
+- DB_POOL_IDLE_TIMEOUT: idle seconds before a connection is reaped (default 300)
+- DB_POOL_PRE_PING: ping connections before handing them out (default true)
 """
 
-import mysql.connector
 import os
+import threading
+import time
+from collections import deque
 
-def get_db_connection():
+import mysql.connector
+from mysql.connector.constants import ClientFlag
+
+
+class PoolTimeoutError(Exception):
+    """
+    Raised when no connection becomes available within the pool timeout.
+    """
+
+
+class PooledConnection:
+    """
+    Thin proxy around a MySQL connection checked out from a ConnectionPool.
+    Attribute access is forwarded to the real connection.
+    close() returns the connection to the pool.
+    """
+
+    def __init__(self, pool, record):
+        self._pool = pool
+        self._record = record
+
+    def __getattr__(self, name):
+        return getattr(self._record.conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """
+        Returns the connection to the pool.
+        Calling close() more than once is a no-op.
+        """
+        if self._record is not None:
+            record, self._record = self._record, None
+            self._pool._release(record)
+
+    def invalidate(self):
+        """
+        Closes the underlying connection instead of returning it to the pool.
+        Use after an error that leaves the connection in an unknown state.
+        """
+        if self._record is not None:
+            record, self._record = self._record, None
+            self._pool._discard(record, checked_out=True)
+
+
+class _ConnectionRecord:
+    """
+    Bookkeeping for a single physical connection.
+    """
+
+    __slots__ = ("conn", "generation", "created_at", "last_used")
+
+    def __init__(self, conn, generation):
+        now = time.monotonic()
+        self.conn = conn
+        self.generation = generation
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """
+    Thread-safe, fork-aware pool of MySQL connections.
+
+    Parameters:
+    - connect: zero-argument callable returning a new DB-API connection
+    - size: connections kept open while idle
+    - max_overflow: extra connections opened under load and closed on release
+    - timeout: seconds acquire() waits before raising PoolTimeoutError
+    - recycle: connections older than this many seconds are replaced
+    - idle_timeout: idle connections unused for this many seconds are reaped
+    - pre_ping: validate connections with a ping before handing them out
+    """
+
+    def __init__(
+        self,
+        connect,
+        size=5,
+        max_overflow=10,
+        timeout=30.0,
+        recycle=3600,
+        idle_timeout=300,
+        pre_ping=True,
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        if max_overflow < 0:
+            raise ValueError("max_overflow cannot be negative")
+
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+
+        self._lock = threading.Condition(threading.Lock())
+        self._reset_state()
+
+    def _reset_state(self):
+        """
+        Initializes (or re-initializes after fork) all mutable pool state.
+        """
+        self._pid = os.getpid()
+        self._generation = getattr(self, "_generation", 0) + 1
+        self._idle = deque()
+        self._checked_out = 0
+        self._created = 0
+        self._closed = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._invalidated = 0
+
+    # ------------------------
+    # Public API
+    # ------------------------
+
+    def acquire(self):
+        """
+        Checks out a connection, creating one if the pool has capacity.
+        Blocks up to `timeout` seconds when the pool is exhausted.
+        """
+        self._check_fork()
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            record = None
+            create = False
+
+            with self._lock:
+                stale = self._reap_idle_locked()
+
+                while record is None and not create:
+                    if self._idle:
+                        record = self._idle.pop()
+                    elif self._total_locked() < self.size + self.max_overflow:
+                        create = True
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise PoolTimeoutError(
+                                "Connection pool exhausted "
+                                f"(size={self.size}, max_overflow={self.max_overflow})"
+                            )
+                        self._waits += 1
+                        self._lock.wait(remaining)
+
+                self._checked_out += 1
+
+            self._close_all(stale)
+
+            if create:
+                try:
+                    record = _ConnectionRecord(self._connect(), self._generation)
+                except Exception:
+                    with self._lock:
+                        self._checked_out -= 1
+                        self._lock.notify()
+                    raise
+                with self._lock:
+                    self._created += 1
+                return PooledConnection(self, record)
+
+            # Validate reused connections outside the lock (ping is a round trip).
+            if self._is_usable(record):
+                record.last_used = time.monotonic()
+                return PooledConnection(self, record)
+
+            self._discard(record, checked_out=True)
+
+    def stats(self):
+        """
+        Returns a snapshot of pool counters.
+        """
+        with self._lock:
+            return {
+                "pid": self._pid,
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "checked_out": self._checked_out,
+                "idle": len(self._idle),
+                "total": self._total_locked(),
+                "created": self._created,
+                "closed": self._closed,
+                "invalidated": self._invalidated,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+            }
+
+    def reap_idle(self):
+        """
+        Closes idle connections that exceeded idle_timeout or recycle age.
+        """
+        with self._lock:
+            stale = self._reap_idle_locked()
+        self._close_all(stale)
+
+    def dispose(self):
+        """
+        Closes every idle connection.
+        Checked-out connections are returned to the pool as usual.
+        """
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        self._close_all(idle)
+        with self._lock:
+            self._closed += len(idle)
+
+    def reset_after_fork(self):
+        """
+        Drops connections inherited from the parent process.
+        Inherited sockets are abandoned, not closed, so the parent's
+        sessions stay intact.
+        """
+        self._lock = threading.Condition(threading.Lock())
+        self._reset_state()
+
+    # ------------------------
+    # Internals
+    # ------------------------
+
+    def _total_locked(self):
+        return self._checked_out + len(self._idle)
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+
+    def _is_usable(self, record):
+        now = time.monotonic()
+        if self.recycle is not None and now - record.created_at > self.recycle:
+            return False
+        if not self.pre_ping:
+            return True
+        try:
+            record.conn.ping(reconnect=False)
+        except Exception:
+            return False
+        return True
+
+    def _release(self, record):
+        if record.generation != self._generation:
+            # Checked out before a fork; the socket belongs to the parent.
+            return
+
+        conn = record.conn
+        try:
+            if getattr(conn, "in_transaction", False):
+                conn.rollback()
+        except Exception:
+            self._discard(record, checked_out=True)
+            return
+
+        close = False
+        with self._lock:
+            self._checked_out -= 1
+            if len(self._idle) >= self.size:
+                close = True
+                self._closed += 1
+            else:
+                record.last_used = time.monotonic()
+                self._idle.append(record)
+            self._lock.notify()
+
+        if close:
+            self._close_quietly(conn)
+
+    def _discard(self, record, checked_out):
+        if record.generation != self._generation:
+            return
+        with self._lock:
+            if checked_out:
+                self._checked_out -= 1
+            self._invalidated += 1
+            self._closed += 1
+            self._lock.notify()
+        self._close_quietly(record.conn)
+
+    def _reap_idle_locked(self):
+        """
+        Removes expired idle records and returns them for closing.
+        Sockets are closed by the caller after the lock is released.
+        """
+        if not self._idle:
+            return []
+        now = time.monotonic()
+        keep = deque()
+        stale = []
+        for record in self._idle:
+            too_idle = (
+                self.idle_timeout is not None
+                and now - record.last_used > self.idle_timeout
+            )
+            too_old = (
+                self.recycle is not None
+                and now - record.created_at > self.recycle
+            )
+            if too_idle or too_old:
+                stale.append(record)
+            else:
+                keep.append(record)
+        if stale:
+            self._idle = keep
+            self._closed += len(stale)
+        return stale
+
+    @classmethod
+    def _close_all(cls, records):
+        for record in records:
+            cls._close_quietly(record.conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+# ------------------------
+# Process-wide pool
+# ------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _env_flag(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _connect():
     return mysql.connector.connect(
         host=os.getenv("DB_HOST"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
         database=os.getenv("DB_NAME"),
+        autocommit=True,
+        # rowcount of UPDATE = rows matched, not rows changed, so handlers
+        # can tell "no such row / not authorized" from "no-op update"
+        client_flags=[ClientFlag.FOUND_ROWS],
     )
+
+
+def create_pool():
+    """
+    Builds a ConnectionPool configured from environment variables.
+    """
+    return ConnectionPool(
+        _connect,
+        size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+        timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        recycle=int(os.getenv("DB_POOL_RECYCLE", "3600")),
+        idle_timeout=int(os.getenv("DB_POOL_IDLE_TIMEOUT", "300")),
+        pre_ping=_env_flag("DB_POOL_PRE_PING", True),
+    )
+
+
+def get_pool():
+    """
+    Returns the process-wide connection pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = create_pool()
+    return _pool
+
+
+def get_db_connection():
+    """
+    Checks out a pooled connection.
+    Call close() on the result to return it to the pool.
+    """
+    return get_pool().acquire()
+
+
+def pool_stats():
+    """
+    Returns statistics for the process-wide pool.
+    Reports an empty pool if no connection has been requested yet.
+    """
+    if _pool is None:
+        return {"initialized": False}
+    return {"initialized": True, **_pool.stats()}
+
+
+def _reinit_after_fork():
+    global _pool_lock
+    _pool_lock = threading.Lock()
+    if _pool is not None:
+        _pool.reset_after_fork()
+
+
+# Pre-forking servers (gunicorn, uwsgi) fork after the app is imported.
+# Children must never share the parent's sockets.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
@@ -0,0 +1,55 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered by primary key and resume after the last key of the
+previous page, so every page is an index range scan however deep the
+client pages, and concurrent inserts never shift page boundaries.
+
+The response body stays an array of rows (in the wire format negotiated
+by app.http.wire). When more rows exist, the cursor for the next page is
+returned in the X-Next-Cursor header and is passed back as `after`.
+"""
+
+from app.http.wire import send
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def parse_page_args(args, default_limit=DEFAULT_PAGE_SIZE):
+    """
+    Reads `limit` and `after` from request args.
+    `limit` is clamped to MAX_PAGE_SIZE; `after` defaults to 0 (first page).
+
+    Returns:
+    - (limit, after) tuple
+    - None if either value is not a valid integer
+    """
+    try:
+        limit = int(args.get("limit", default_limit))
+        after = int(args.get("after", 0))
+    except (TypeError, ValueError):
+        return None
+
+    if limit < 1 or after < 0:
+        return None
+
+    return min(limit, MAX_PAGE_SIZE), after
+
+
+def page_response(rows, limit, key):
+    """
+    Builds the response for one page.
+
+    Parameters:
+    - rows: up to limit + 1 rows ordered by `key`; the extra row only
+      signals that another page exists and is not returned
+    - limit: page size
+    - key: name of the primary key column the page is ordered by
+    """
+    page = rows[:limit]
+    response = send(page)
+    if len(rows) > limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(page[-1][key])
+    return response
@@ -0,0 +1,273 @@
+"""
+Per-request data-access layer.
+Binds a single pooled connection to the Flask request context (g).
+
+- Read-only requests (GET, HEAD, OPTIONS) run in autocommit mode and never
+  issue a COMMIT.
+- Mutating requests open one transaction on first use. It is committed after
+  a successful response and rolled back on errors or exceptions.
+- The connection is returned to the pool when the app context tears down.
+"""
+
+from flask import g, request, has_request_context
+from app.db import connection
+
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+# ------------------------
+# Connection Binding
+# ------------------------
+
+def get_connection():
+    """
+    Returns the connection bound to the current app context.
+    Checks one out from the pool on first use.
+    """
+    conn = g.get("db_conn")
+    if conn is None:
+        conn = connection.get_db_connection()
+        g.db_conn = conn
+        g.db_in_transaction = False
+    return conn
+
+
+def _begin_if_needed(conn, query):
+    """
+    Starts the request transaction before the first statement of a mutating
+    request, or before any write statement.
+    """
+    if g.db_in_transaction:
+        return
+    mutating = has_request_context() and request.method not in READ_ONLY_METHODS
+    if mutating or not is_read_only(query):
+        conn.start_transaction()
+        g.db_in_transaction = True
+
+
+def is_read_only(query):
+    """
+    Returns True if the statement only reads data.
+    """
+    words = query.split(None, 1)
+    return bool(words) and words[0].upper() in ("SELECT", "SHOW", "EXPLAIN", "DESCRIBE")
+
+
+# ------------------------
+# Statement Execution
+# ------------------------
+
+def execute_query(query, params=None, fetch_one=False, fetch_all=False):
+    """
+    Executes a database query on the request connection.
+
+    Parameters:
+    - query: SQL query string
+    - params: tuple of parameters
+    - fetch_one: return a single row
+    - fetch_all: return all rows
+
+    Returns:
+    - result (if applicable)
+    - rowcount (number of affected rows)
+    - lastrowid (for INSERT operations)
+    """
+    conn = get_connection()
+    _begin_if_needed(conn, query)
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query, params or ())
+
+        result = None
+        if fetch_one:
+            result = cursor.fetchone()
+        elif fetch_all:
+            result = cursor.fetchall()
+
+        rowcount = cursor.rowcount
+        lastrowid = cursor.lastrowid
+    finally:
+        cursor.close()
+
+    return result, rowcount, lastrowid
+
+
+def execute_many(query, seq_params):
+    """
+    Executes one statement for every parameter tuple in seq_params.
+    INSERT statements are sent as a single multi-row statement.
+
+    Returns:
+    - rowcount (number of affected rows)
+    - lastrowid (first generated ID for INSERT operations)
+    """
+    conn = get_connection()
+    _begin_if_needed(conn, query)
+
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(query, seq_params)
+        rowcount = cursor.rowcount
+        lastrowid = cursor.lastrowid
+    finally:
+        cursor.close()
+
+    return rowcount, lastrowid
+
+
+def iter_query(query, params=None, batch_size=500):
+    """
+    Streams rows of a SELECT in batches of batch_size using fetchmany.
+    Yields one row (dict) at a time without materializing the full result.
+
+    The cursor is unbuffered, so the request connection cannot run other
+    statements until the generator is exhausted or closed. Closing it early
+    reads past the remaining rows, which the server sends regardless.
+    """
+    conn = get_connection()
+    _begin_if_needed(conn, query)
+
+    cursor = conn.cursor(dictionary=True)
+    unread = False
+    try:
+        cursor.execute(query, params or ())
+        unread = True
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                unread = False
+                break
+            yield from rows
+    finally:
+        try:
+            # Unread rows block the connection and make close() raise.
+            # A failed execute() left no result set to read.
+            if unread:
+                while cursor.fetchmany(batch_size):
+                    pass
+        finally:
+            cursor.close()
+
+
+# ------------------------
+# Transaction Control
+# ------------------------
+
+def begin():
+    """
+    Opens a transaction on the request connection if none is open, even
+    for a request or statement that would otherwise run in autocommit.
+    """
+    conn = get_connection()
+    if not g.db_in_transaction:
+        conn.start_transaction()
+        g.db_in_transaction = True
+    return conn
+
+
+def savepoint(name):
+    """
+    Marks a savepoint in the request transaction, opening the transaction
+    if needed, so a later rollback_to(name) can undo only what follows.
+    """
+    conn = begin()
+    _execute_control(conn, f"SAVEPOINT {name}")
+    g.setdefault("db_savepoints", {})[name] = len(g.get("db_on_commit", []))
+
+
+def rollback_to(name):
+    """
+    Undoes the statements (and drops the on_commit() callbacks) since
+    savepoint(name), keeping the rest of the transaction.
+    """
+    _execute_control(get_connection(), f"ROLLBACK TO SAVEPOINT {name}")
+    callbacks = g.get("db_on_commit", [])
+    del callbacks[g.db_savepoints.pop(name):]
+
+
+def release_savepoint(name):
+    """
+    Forgets a savepoint; its statements stay part of the transaction.
+    """
+    _execute_control(get_connection(), f"RELEASE SAVEPOINT {name}")
+    g.db_savepoints.pop(name, None)
+
+
+def _execute_control(conn, statement):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+def on_commit(callback):
+    """
+    Registers a zero-argument callback to run after the request transaction
+    commits. Runs immediately when no transaction is open.
+    Callbacks are dropped if the transaction rolls back.
+    """
+    if not g.get("db_in_transaction"):
+        callback()
+        return
+    g.setdefault("db_on_commit", []).append(callback)
+
+
+def commit():
+    """
+    Commits the request transaction, if one was started, then runs
+    callbacks registered with on_commit().
+    """
+    conn = g.get("db_conn")
+    if conn is not None and g.get("db_in_transaction"):
+        conn.commit()
+        g.db_in_transaction = False
+        g.pop("db_savepoints", None)
+        for callback in g.pop("db_on_commit", []):
+            callback()
+
+
+def rollback():
+    """
+    Rolls back the request transaction, if one was started.
+    """
+    conn = g.get("db_conn")
+    g.pop("db_on_commit", None)
+    g.pop("db_savepoints", None)
+    if conn is not None and g.get("db_in_transaction"):
+        conn.rollback()
+        g.db_in_transaction = False
+
+
+def release(exc=None):
+    """
+    Rolls back any unfinished transaction and returns the connection
+    to the pool.
+    """
+    conn = g.pop("db_conn", None)
+    g.pop("db_on_commit", None)
+    if conn is None:
+        return
+    try:
+        if g.pop("db_in_transaction", False):
+            conn.rollback()
+    finally:
+        conn.close()
+
+
+def init_app(app):
+    """
+    Registers request hooks that finish the transaction and release
+    the connection.
+    """
+
+    @app.after_request
+    def finish_transaction(response):
+        if response.status_code < 400:
+            commit()
+        else:
+            rollback()
+        return response
+
+    app.teardown_appcontext(release)
@@ -0,0 +1,69 @@
+"""
+Version counters of API collections (migrations/003_row_versions.sql).
+
+A scope names one collection a client can fetch, e.g. "trips:user:7" for a
+user's trip list. Write handlers bump the scopes they change inside the
+request transaction, so a version moves exactly when its data commits;
+conditional GETs read the versions with one primary-key lookup to build
+their ETags (see app.cache.etags).
+
+Counters are only maintained while ETAGS is enabled.
+"""
+
+from flask import current_app
+
+from app.db.query import execute_query
+
+
+def campsite_scopes(user_id):
+    """
+    Scopes of the campsites visible to a user: public ones and their own.
+    """
+    return ("campsites:public", f"campsites:user:{user_id}")
+
+
+def trip_scopes(user_id):
+    return (f"trips:user:{user_id}",)
+
+
+def entry_scopes(trip_id):
+    return (f"trip_entries:trip:{trip_id}",)
+
+
+def bump_versions(*scopes):
+    """
+    Increments the version of each scope (created at 1) in the request
+    transaction. Scopes are locked in sorted order so concurrent writers
+    cannot deadlock on them.
+    """
+    if not current_app.config["ETAGS"] or not scopes:
+        return
+
+    scopes = sorted(set(scopes))
+    execute_query(
+        f"""
+        INSERT INTO collection_versions (scope, version)
+        VALUES {", ".join(["(%s, 1)"] * len(scopes))}
+        ON DUPLICATE KEY UPDATE version = version + 1;
+        """,
+        tuple(scopes),
+    )
+
+
+def read_versions(scopes):
+    """
+    Returns the versions of the scopes, in order (0 for scopes never
+    written), with one primary-key lookup.
+    """
+    scopes = list(scopes)
+    rows, _, _ = execute_query(
+        f"""
+        SELECT scope, version
+        FROM collection_versions
+        WHERE scope IN ({", ".join(["%s"] * len(scopes))});
+        """,
+        tuple(scopes),
+        fetch_all=True,
+    )
+    found = {row["scope"]: row["version"] for row in rows or ()}
+    return tuple(found.get(scope, 0) for scope in scopes)
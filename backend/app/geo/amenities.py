@@ -0,0 +1,58 @@
+"""
+Amenity filters for campsite search.
+
+The seven boolean amenity columns are packed into one bitmask per campsite
+(bit order below, matching the amenity_mask column added by
+migrations/002_campsites_amenity_mask.sql). A filter is the mask of the
+wanted amenities, and a campsite matches when it has all of them.
+"""
+
+AMENITIES = (
+    ("dump", "dump_available"),
+    ("electric", "electric_hookup_available"),
+    ("water", "water_available"),
+    ("restroom", "restroom_available"),
+    ("shower", "shower_available"),
+    ("pets", "pets_allowed"),
+    ("wifi", "wifi_available"),
+)
+
+AMENITY_BITS = {name: 1 << bit for bit, (name, _) in enumerate(AMENITIES)}
+
+
+def parse_amenities(value):
+    """
+    Parses an amenities= parameter such as "water,electric,pets".
+
+    Returns:
+    - mask of the requested amenities (0 for an empty value)
+    - None if the value names an unknown amenity
+    """
+    mask = 0
+    for name in value.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in AMENITY_BITS:
+            return None
+        mask |= AMENITY_BITS[name]
+    return mask
+
+
+def amenity_mask(row):
+    """
+    Returns the packed amenity bitmask of a campsite row.
+    """
+    mask = 0
+    for bit, (_, column) in enumerate(AMENITIES):
+        if row.get(column):
+            mask |= 1 << bit
+    return mask
+
+
+def has_amenities(row, mask):
+    """
+    Returns True if a campsite row has every amenity in `mask`.
+    """
+    return amenity_mask(row) & mask == mask
+
@@ -0,0 +1,281 @@
+"""
+Precomputed marker clusters of public campsites.
+
+Campsites are aggregated into a quad-tree of Web Mercator grid cells with
+one level per map zoom. Each tile is split into 2**CELL_BITS x 2**CELL_BITS
+cells, so a cluster covers roughly 32 screen pixels at its zoom level.
+
+Every cell stores count, coordinate sums (for the centroid), bounding box
+and an XOR of member IDs, which identifies the member of a single-campsite
+cell. Only the finest level keeps member lists; coarser bounding boxes are
+rebuilt from their four children when a campsite is removed, so writes
+update the tree incrementally in O(levels).
+"""
+
+import threading
+import time
+
+from app.geo.distance import longitude_ranges
+from app.geo.tiles import MAX_MERCATOR_LAT, tile_xy
+
+CELL_BITS = 3
+MAX_CLUSTER_ZOOM = 16
+
+# Aggregate layout: [count, sum_lat, sum_lon, min_lat, min_lon, max_lat, max_lon, id_xor]
+COUNT, SUM_LAT, SUM_LON, MIN_LAT, MIN_LON, MAX_LAT, MAX_LON, ID_XOR = range(8)
+
+
+def new_aggregate():
+    return [0, 0.0, 0.0, 90.0, 180.0, -90.0, -180.0, 0]
+
+
+def add_point(aggregate, campsite_id, latitude, longitude):
+    """
+    Adds one point to an aggregate in place.
+    """
+    aggregate[COUNT] += 1
+    aggregate[SUM_LAT] += latitude
+    aggregate[SUM_LON] += longitude
+    aggregate[MIN_LAT] = min(aggregate[MIN_LAT], latitude)
+    aggregate[MIN_LON] = min(aggregate[MIN_LON], longitude)
+    aggregate[MAX_LAT] = max(aggregate[MAX_LAT], latitude)
+    aggregate[MAX_LON] = max(aggregate[MAX_LON], longitude)
+    aggregate[ID_XOR] ^= campsite_id
+
+
+def merge_aggregate(target, other):
+    """
+    Merges aggregate `other` into `target` in place.
+    """
+    target[COUNT] += other[COUNT]
+    target[SUM_LAT] += other[SUM_LAT]
+    target[SUM_LON] += other[SUM_LON]
+    target[MIN_LAT] = min(target[MIN_LAT], other[MIN_LAT])
+    target[MIN_LON] = min(target[MIN_LON], other[MIN_LON])
+    target[MAX_LAT] = max(target[MAX_LAT], other[MAX_LAT])
+    target[MAX_LON] = max(target[MAX_LON], other[MAX_LON])
+    target[ID_XOR] ^= other[ID_XOR]
+
+
+def cluster_level(zoom):
+    """
+    Returns the grid level used for clusters at a map zoom.
+    """
+    return max(0, min(zoom, MAX_CLUSTER_ZOOM)) + CELL_BITS
+
+
+def cell_key(latitude, longitude, level):
+    return tile_xy(latitude, longitude, level)
+
+
+def to_cluster(aggregate):
+    """
+    Renders an aggregate as a JSON-ready cluster.
+    Single-campsite clusters include the campsite_id.
+    """
+    count = aggregate[COUNT]
+    cluster = {
+        "cluster": True,
+        "count": count,
+        "latitude": aggregate[SUM_LAT] / count,
+        "longitude": aggregate[SUM_LON] / count,
+        "bbox": [
+            aggregate[MIN_LAT],
+            aggregate[MIN_LON],
+            aggregate[MAX_LAT],
+            aggregate[MAX_LON],
+        ],
+    }
+    if count == 1:
+        cluster["campsite_id"] = aggregate[ID_XOR]
+    return cluster
+
+
+def aggregate_points(points, level):
+    """
+    Aggregates (campsite_id, latitude, longitude) tuples into cells at
+    `level`. Used for small per-user overlays that are not precomputed.
+    """
+    cells = {}
+    for campsite_id, latitude, longitude in points:
+        key = cell_key(latitude, longitude, level)
+        add_point(cells.setdefault(key, new_aggregate()), campsite_id, latitude, longitude)
+    return cells
+
+
+class ClusterIndex:
+    """
+    Quad-tree of public campsite clusters for zoom levels 0..MAX_CLUSTER_ZOOM.
+
+    Parameters:
+    - load_points: callable returning public campsite rows with campsite_id,
+      latitude and longitude
+    - refresh_seconds: rebuild from the database after this long
+      (None disables periodic rebuilds)
+    """
+
+    def __init__(self, load_points, refresh_seconds=60):
+        self._load_points = load_points
+        self.refresh_seconds = refresh_seconds
+
+        self._lock = threading.RLock()
+        self._finest = cluster_level(MAX_CLUSTER_ZOOM)
+        self._levels = {}
+        self._members = {}
+        self._positions = {}
+        self._loaded_at = None
+
+    # ------------------------
+    # Queries
+    # ------------------------
+
+    def cells_in(self, min_lat, min_lon, max_lat, max_lon, zoom):
+        """
+        Returns {cell_key: aggregate copy} for cells at `zoom` that overlap
+        the viewport.
+        """
+        self._ensure_loaded()
+        level = cluster_level(zoom)
+
+        min_lat = max(min_lat, -MAX_MERCATOR_LAT)
+        max_lat = min(max_lat, MAX_MERCATOR_LAT)
+        _, y_lo = cell_key(max_lat, 0, level)
+        _, y_hi = cell_key(min_lat, 0, level)
+
+        result = {}
+        with self._lock:
+            cells = self._levels.get(level, {})
+            for lo, hi in longitude_ranges(min_lon, max_lon):
+                x_lo, _ = cell_key(0, lo, level)
+                x_hi, _ = cell_key(0, hi, level)
+
+                if (x_hi - x_lo + 1) * (y_hi - y_lo + 1) > len(cells):
+                    for (x, y), aggregate in cells.items():
+                        if x_lo <= x <= x_hi and y_lo <= y <= y_hi:
+                            result[(x, y)] = list(aggregate)
+                else:
+                    for x in range(x_lo, x_hi + 1):
+                        for y in range(y_lo, y_hi + 1):
+                            aggregate = cells.get((x, y))
+                            if aggregate is not None:
+                                result[(x, y)] = list(aggregate)
+        return result
+
+    def cells_in_tile(self, z, x, y):
+        """
+        Returns {cell_key: aggregate copy} for the cells that partition map
+        tile z/x/y. Requires z <= MAX_CLUSTER_ZOOM.
+        """
+        self._ensure_loaded()
+        level = cluster_level(z)
+        side = 1 << CELL_BITS
+
+        result = {}
+        with self._lock:
+            cells = self._levels.get(level, {})
+            for cx in range(x * side, (x + 1) * side):
+                for cy in range(y * side, (y + 1) * side):
+                    aggregate = cells.get((cx, cy))
+                    if aggregate is not None:
+                        result[(cx, cy)] = list(aggregate)
+        return result
+
+    # ------------------------
+    # Write-through Updates
+    # ------------------------
+
+    def apply(self, row):
+        """
+        Applies the current state of a campsite after a create or update.
+        Private campsites are removed from the public clusters.
+        """
+        with self._lock:
+            self._remove_locked(row["campsite_id"])
+            if row["is_public"]:
+                self._insert_locked(
+                    row["campsite_id"], float(row["latitude"]), float(row["longitude"])
+                )
+
+    def remove(self, campsite_id):
+        """
+        Removes a deleted campsite from the clusters.
+        """
+        with self._lock:
+            self._remove_locked(campsite_id)
+
+    def invalidate(self):
+        """
+        Drops all clusters; the next query rebuilds from the database.
+        """
+        with self._lock:
+            self._levels = {}
+            self._members = {}
+            self._positions = {}
+            self._loaded_at = None
+
+    # ------------------------
+    # Internals
+    # ------------------------
+
+    def _ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and (
+            self.refresh_seconds is None
+            or time.monotonic() - loaded_at <= self.refresh_seconds
+        ):
+            return
+
+        rows = self._load_points()
+        with self._lock:
+            self._levels = {}
+            self._members = {}
+            self._positions = {}
+            for row in rows:
+                self._insert_locked(
+                    row["campsite_id"], float(row["latitude"]), float(row["longitude"])
+                )
+            self._loaded_at = time.monotonic()
+
+    def _insert_locked(self, campsite_id, latitude, longitude):
+        x, y = cell_key(latitude, longitude, self._finest)
+        self._positions[campsite_id] = (x, y, latitude, longitude)
+        self._members.setdefault((x, y), {})[campsite_id] = (latitude, longitude)
+
+        for level in range(self._finest, CELL_BITS - 1, -1):
+            shift = self._finest - level
+            key = (x >> shift, y >> shift)
+            aggregate = self._levels.setdefault(level, {}).setdefault(key, new_aggregate())
+            add_point(aggregate, campsite_id, latitude, longitude)
+
+    def _remove_locked(self, campsite_id):
+        position = self._positions.pop(campsite_id, None)
+        if position is None:
+            return
+        x, y, latitude, longitude = position
+
+        members = self._members[(x, y)]
+        del members[campsite_id]
+        if not members:
+            del self._members[(x, y)]
+
+        for level in range(self._finest, CELL_BITS - 1, -1):
+            shift = self._finest - level
+            key = (x >> shift, y >> shift)
+            cells = self._levels[level]
+            aggregate = cells[key]
+
+            if aggregate[COUNT] == 1:
+                del cells[key]
+                continue
+
+            rebuilt = new_aggregate()
+            if level == self._finest:
+                for member_id, (lat, lon) in members.items():
+                    add_point(rebuilt, member_id, lat, lon)
+            else:
+                children = self._levels[level + 1]
+                cx, cy = key[0] << 1, key[1] << 1
+                for child in ((cx, cy), (cx + 1, cy), (cx, cy + 1), (cx + 1, cy + 1)):
+                    if child in children:
+                        merge_aggregate(rebuilt, children[child])
+            cells[key] = rebuilt
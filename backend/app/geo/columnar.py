@@ -0,0 +1,203 @@
+"""
+Vectorized campsite search over a columnar in-memory store.
+
+Coordinates, visibility flags and packed amenity masks of every campsite are kept in contiguous
+NumPy arrays, so filtering a query point against all campsites is a single
+vectorized Haversine pass instead of per-row trig work in MySQL.
+
+NumPy is an optional dependency; it is only required when GEO_ENGINE is
+set to "numpy".
+"""
+
+import threading
+import time
+
+from app.geo.amenities import amenity_mask
+from app.geo.distance import EARTH_RADIUS_MILES, bbox_center, longitude_ranges
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+# Upper bound on (query points x campsites) evaluated in one batch chunk.
+MAX_BATCH_CELLS = 4_000_000
+
+
+class ColumnarCampsiteStore:
+    """
+    Columnar store of all campsites with vectorized nearby search.
+
+    Parameters:
+    - load_all: callable returning every campsite row (public and private)
+    - refresh_seconds: reload from the database after this long
+      (None disables periodic reloads)
+    """
+
+    def __init__(self, load_all, refresh_seconds=60):
+        if np is None:
+            raise RuntimeError("GEO_ENGINE 'numpy' requires the numpy package")
+
+        self._load_all = load_all
+        self.refresh_seconds = refresh_seconds
+
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._columns = None
+        self._loaded_at = None
+
+    # ------------------------
+    # Queries
+    # ------------------------
+
+    def nearby(self, latitude, longitude, radius_miles, user_id, amenities=0, limit=None):
+        """
+        Returns campsites visible to user_id within radius_miles, sorted by
+        distance, up to `limit` of them (None for all). Each row is a copy
+        with a `distance` key added.
+        Only campsites with every amenity in the `amenities` mask match.
+        """
+        return self.nearby_many([(latitude, longitude)], radius_miles, user_id, amenities, limit)[0]
+
+    def nearby_many(self, points, radius_miles, user_id, amenities=0, limit=None):
+        """
+        Runs nearby() for several (latitude, longitude) points at once.
+        Returns one result list per point, in input order.
+        """
+        columns = self._get_columns()
+        if not points:
+            return []
+        if columns is None:
+            return [[] for _ in points]
+
+        rows, _, _, lat_rad, lon_rad, cos_lat, owner, is_public, amenity = columns
+        visible = is_public | (owner == user_id)
+        if amenities:
+            visible &= (amenity & amenities) == amenities
+
+        query = np.radians(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+        chunk = max(1, MAX_BATCH_CELLS // max(1, len(rows)))
+        results = []
+
+        for start in range(0, len(query), chunk):
+            q_lat = query[start:start + chunk, 0:1]
+            q_lon = query[start:start + chunk, 1:2]
+
+            a = (
+                np.sin((lat_rad - q_lat) / 2) ** 2
+                + np.cos(q_lat) * cos_lat * np.sin((lon_rad - q_lon) / 2) ** 2
+            )
+            distances = 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+            matches = visible & (distances <= radius_miles)
+
+            for point_distances, point_matches in zip(distances, matches):
+                hits = np.flatnonzero(point_matches)
+                hits = hits[np.argsort(point_distances[hits], kind="stable")][:limit]
+                results.append([
+                    dict(rows[i], distance=float(point_distances[i])) for i in hits
+                ])
+
+        return results
+
+    def in_bbox(self, min_lat, min_lon, max_lat, max_lon, user_id, limit, amenities=0):
+        """
+        Returns up to `limit` campsites visible to user_id inside the viewport,
+        nearest to its center first. Each row has a `distance` key added.
+        """
+        columns = self._get_columns()
+        if columns is None:
+            return []
+
+        rows, lat, lon, lat_rad, lon_rad, cos_lat, owner, is_public, amenity = columns
+
+        in_lon = np.zeros(len(rows), dtype=np.bool_)
+        for lo, hi in longitude_ranges(min_lon, max_lon):
+            in_lon |= (lon >= lo) & (lon <= hi)
+        matches = (is_public | (owner == user_id)) & in_lon & (lat >= min_lat) & (lat <= max_lat)
+        if amenities:
+            matches &= (amenity & amenities) == amenities
+
+        hits = np.flatnonzero(matches)
+        center_lat, center_lon = np.radians(bbox_center(min_lat, min_lon, max_lat, max_lon))
+        a = (
+            np.sin((lat_rad[hits] - center_lat) / 2) ** 2
+            + np.cos(center_lat) * cos_lat[hits] * np.sin((lon_rad[hits] - center_lon) / 2) ** 2
+        )
+        distances = 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+        order = np.argsort(distances, kind="stable")[:limit]
+        return [dict(rows[hits[i]], distance=float(distances[i])) for i in order]
+
+    # ------------------------
+    # Write-through Updates
+    # ------------------------
+
+    def apply(self, row, owner_id=None):
+        """
+        Applies the current state of a campsite after a create or update.
+        Columns are rebuilt lazily on the next query.
+        """
+        with self._lock:
+            self._rows[row["campsite_id"]] = row
+            self._columns = None
+
+    def remove(self, campsite_id, owner_id=None):
+        """
+        Removes a deleted campsite.
+        """
+        with self._lock:
+            if self._rows.pop(campsite_id, None) is not None:
+                self._columns = None
+
+    def invalidate(self):
+        """
+        Drops all cached data; the next query reloads from the database.
+        """
+        with self._lock:
+            self._rows = {}
+            self._columns = None
+            self._loaded_at = None
+
+    def stats(self):
+        """
+        Returns store size counters.
+        """
+        with self._lock:
+            return {"campsites": len(self._rows)}
+
+    # ------------------------
+    # Internals
+    # ------------------------
+
+    def _get_columns(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None or (
+            self.refresh_seconds is not None
+            and time.monotonic() - loaded_at > self.refresh_seconds
+        ):
+            rows = self._load_all()
+            with self._lock:
+                self._rows = {row["campsite_id"]: row for row in rows}
+                self._columns = None
+                self._loaded_at = time.monotonic()
+
+        with self._lock:
+            if self._columns is None and self._rows:
+                self._columns = self._build_columns(list(self._rows.values()))
+            return self._columns
+
+    @staticmethod
+    def _build_columns(rows):
+        count = len(rows)
+        lat = np.fromiter((float(row["latitude"]) for row in rows), np.float64, count)
+        lon = np.fromiter((float(row["longitude"]) for row in rows), np.float64, count)
+        owner = np.fromiter(
+            (-1 if row["user_id"] is None else row["user_id"] for row in rows),
+            np.int64,
+            count,
+        )
+        is_public = np.fromiter((bool(row["is_public"]) for row in rows), np.bool_, count)
+        amenity = np.fromiter((amenity_mask(row) for row in rows), np.uint8, count)
+
+        lat_rad = np.radians(lat)
+        return rows, lat, lon, lat_rad, np.radians(lon), np.cos(lat_rad), owner, is_public, amenity
@@ -0,0 +1,102 @@
+"""
+Great-circle distance helpers shared by the campsite search paths.
+All distances are in statute miles, matching the Haversine SQL in the
+campsite routes.
+"""
+
+import math
+
+EARTH_RADIUS_MILES = 3959
+MILES_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_MILES / 180
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance between two points in miles.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_miles):
+    """
+    Returns the lat/lon envelope that contains every point within
+    radius_miles of (latitude, longitude).
+
+    Returns:
+    - min_lat, max_lat
+    - list of (min_lon, max_lon) ranges; two ranges when the envelope
+      crosses the antimeridian, one full range when it covers a pole
+    """
+    d_lat = radius_miles / MILES_PER_DEGREE_LAT
+    min_lat = latitude - d_lat
+    max_lat = latitude + d_lat
+
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+
+    # Widest longitude span occurs at the envelope edge closest to a pole.
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    d_lon = radius_miles / (MILES_PER_DEGREE_LAT * cos_lat)
+
+    if d_lon >= 180:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+
+    min_lon = longitude - d_lon
+    max_lon = longitude + d_lon
+
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def longitude_ranges(min_lon, max_lon):
+    """
+    Splits a viewport's longitude span into ranges that do not cross the
+    antimeridian. A viewport crossing 180 degrees has min_lon > max_lon.
+    """
+    if min_lon <= max_lon:
+        return [(min_lon, max_lon)]
+    return [(min_lon, 180.0), (-180.0, max_lon)]
+
+
+def bbox_center(min_lat, min_lon, max_lat, max_lon):
+    """
+    Returns the (latitude, longitude) center of a viewport, accounting for
+    viewports that cross the antimeridian.
+    """
+    if min_lon > max_lon:
+        max_lon += 360
+    center_lon = (min_lon + max_lon) / 2
+    if center_lon > 180:
+        center_lon -= 360
+    return (min_lat + max_lat) / 2, center_lon
+
+
+def parse_bbox(value):
+    """
+    Parses a "minLat,minLon,maxLat,maxLon" viewport string.
+
+    Returns:
+    - (min_lat, min_lon, max_lat, max_lon), or None if the value is invalid
+    """
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(part) for part in value.split(","))
+    except (AttributeError, ValueError):
+        return None
+
+    if not (-90 <= min_lat <= max_lat <= 90):
+        return None
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        return None
+    return min_lat, min_lon, max_lat, max_lon
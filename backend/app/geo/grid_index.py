@@ -0,0 +1,252 @@
+"""
+In-process spatial index of campsites.
+
+Public campsites are bucketed into a uniform latitude/longitude grid so a
+nearby query only visits the handful of cells that overlap its search
+envelope. A user's private campsites are overlaid from a small per-user
+LRU cache, since each user only ever sees their own. Every indexed row
+keeps its packed amenity mask, so an amenity filter is one AND per
+candidate.
+
+The index is kept current by write-through updates from the campsite routes.
+Other worker processes pick up those writes when their copy expires after
+`refresh_seconds`.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from app.geo.amenities import amenity_mask
+from app.geo.distance import bbox_center, bounding_box, haversine_miles, longitude_ranges
+
+
+class CampsiteGridIndex:
+    """
+    Grid index of public campsites with a per-user private overlay.
+
+    Parameters:
+    - load_public: callable returning every public campsite row
+    - load_private: callable taking a user_id, returning that user's
+      private campsite rows
+    - cell_degrees: grid cell size in degrees
+    - refresh_seconds: reload everything from the database after this long
+      (None disables periodic reloads)
+    - private_cache_size: number of users whose private rows are cached
+    """
+
+    def __init__(
+        self,
+        load_public,
+        load_private,
+        cell_degrees=0.5,
+        refresh_seconds=60,
+        private_cache_size=1024,
+    ):
+        self._load_public = load_public
+        self._load_private = load_private
+        self.cell_degrees = cell_degrees
+        self.refresh_seconds = refresh_seconds
+        self.private_cache_size = private_cache_size
+
+        self._lock = threading.RLock()
+        # campsite_id -> (row, amenity mask); private overlays hold the same pairs
+        self._rows = {}
+        self._cells = {}
+        self._private = OrderedDict()
+        self._loaded_at = None
+
+    # ------------------------
+    # Queries
+    # ------------------------
+
+    def nearby(self, latitude, longitude, radius_miles, user_id, amenities=0, limit=None):
+        """
+        Returns campsites visible to user_id within radius_miles, sorted by
+        distance, up to `limit` of them (None for all). Each row is a copy
+        with a `distance` key added.
+        Only campsites with every amenity in the `amenities` mask match.
+        """
+        self._ensure_loaded()
+        min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius_miles)
+
+        candidates = self._candidates(min_lat, max_lat, lon_ranges, user_id, amenities)
+
+        results = []
+        for row in candidates:
+            distance = haversine_miles(
+                latitude, longitude, float(row["latitude"]), float(row["longitude"])
+            )
+            if distance <= radius_miles:
+                results.append((distance, row))
+
+        results.sort(key=lambda result: result[0])
+        return [dict(row, distance=distance) for distance, row in results[:limit]]
+
+    def nearby_many(self, points, radius_miles, user_id, amenities=0, limit=None):
+        """
+        Runs nearby() for several (latitude, longitude) points.
+        Returns one result list per point, in input order.
+        """
+        return [
+            self.nearby(latitude, longitude, radius_miles, user_id, amenities, limit)
+            for latitude, longitude in points
+        ]
+
+    def in_bbox(self, min_lat, min_lon, max_lat, max_lon, user_id, limit, amenities=0):
+        """
+        Returns up to `limit` campsites visible to user_id inside the viewport,
+        nearest to its center first. Each row has a `distance` key added.
+        """
+        self._ensure_loaded()
+        lon_ranges = longitude_ranges(min_lon, max_lon)
+
+        candidates = self._candidates(min_lat, max_lat, lon_ranges, user_id, amenities)
+
+        center_lat, center_lon = bbox_center(min_lat, min_lon, max_lat, max_lon)
+        results = []
+        for row in candidates:
+            latitude = float(row["latitude"])
+            longitude = float(row["longitude"])
+            if not min_lat <= latitude <= max_lat:
+                continue
+            if not any(lo <= longitude <= hi for lo, hi in lon_ranges):
+                continue
+            distance = haversine_miles(center_lat, center_lon, latitude, longitude)
+            results.append(dict(row, distance=distance))
+
+        results.sort(key=lambda row: row["distance"])
+        return results[:limit]
+
+    # ------------------------
+    # Write-through Updates
+    # ------------------------
+
+    def apply(self, row, owner_id=None):
+        """
+        Applies the current state of a campsite after a create or update.
+        Public rows are (re)indexed; private rows are removed from the public
+        grid. The owner's private overlay is invalidated either way.
+        """
+        campsite_id = row["campsite_id"]
+        with self._lock:
+            previous = self._rows.get(campsite_id)
+            self._remove_locked(campsite_id)
+            if row["is_public"]:
+                self._insert_locked(row)
+            owners = {owner_id, row.get("user_id")}
+            if previous is not None:
+                owners.add(previous[0].get("user_id"))
+            for owner in owners:
+                self._private.pop(owner, None)
+
+    def remove(self, campsite_id, owner_id=None):
+        """
+        Removes a deleted campsite from the grid and the owner's overlay.
+        """
+        with self._lock:
+            self._remove_locked(campsite_id)
+            self._private.pop(owner_id, None)
+
+    def invalidate(self):
+        """
+        Drops all cached data; the next query reloads from the database.
+        """
+        with self._lock:
+            self._rows = {}
+            self._cells = {}
+            self._private.clear()
+            self._loaded_at = None
+
+    def stats(self):
+        """
+        Returns index size counters.
+        """
+        with self._lock:
+            return {
+                "public_campsites": len(self._rows),
+                "cells": len(self._cells),
+                "cached_users": len(self._private),
+            }
+
+    # ------------------------
+    # Internals
+    # ------------------------
+
+    def _cell(self, latitude, longitude):
+        return (
+            int(math.floor((float(latitude) + 90) / self.cell_degrees)),
+            int(math.floor((float(longitude) + 180) / self.cell_degrees)),
+        )
+
+    def _cells_in(self, min_lat, max_lat, lon_ranges):
+        lat_lo, _ = self._cell(min_lat, 0)
+        lat_hi, _ = self._cell(max_lat, 0)
+        for min_lon, max_lon in lon_ranges:
+            _, lon_lo = self._cell(0, min_lon)
+            _, lon_hi = self._cell(0, max_lon)
+            for i in range(lat_lo, lat_hi + 1):
+                for j in range(lon_lo, lon_hi + 1):
+                    yield (i, j)
+
+    def _candidates(self, min_lat, max_lat, lon_ranges, user_id, amenities):
+        with self._lock:
+            indexed = [
+                self._rows[campsite_id]
+                for cell in self._cells_in(min_lat, max_lat, lon_ranges)
+                for campsite_id in self._cells.get(cell, ())
+            ]
+        indexed.extend(self._private_rows(user_id))
+        return [row for row, mask in indexed if mask & amenities == amenities]
+
+    def _insert_locked(self, row):
+        campsite_id = row["campsite_id"]
+        self._rows[campsite_id] = (row, amenity_mask(row))
+        self._cells.setdefault(self._cell(row["latitude"], row["longitude"]), set()).add(campsite_id)
+
+    def _remove_locked(self, campsite_id):
+        entry = self._rows.pop(campsite_id, None)
+        if entry is None:
+            return
+        row = entry[0]
+        cell = self._cell(row["latitude"], row["longitude"])
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(campsite_id)
+            if not members:
+                del self._cells[cell]
+
+    def _expired(self, loaded_at):
+        return loaded_at is None or (
+            self.refresh_seconds is not None
+            and time.monotonic() - loaded_at > self.refresh_seconds
+        )
+
+    def _ensure_loaded(self):
+        if not self._expired(self._loaded_at):
+            return
+
+        rows = self._load_public()
+        with self._lock:
+            self._rows = {}
+            self._cells = {}
+            self._private.clear()
+            for row in rows:
+                self._insert_locked(row)
+            self._loaded_at = time.monotonic()
+
+    def _private_rows(self, user_id):
+        with self._lock:
+            entry = self._private.get(user_id)
+            if entry is not None and not self._expired(entry[0]):
+                self._private.move_to_end(user_id)
+                return entry[1]
+
+        rows = [(row, amenity_mask(row)) for row in self._load_private(user_id)]
+        with self._lock:
+            self._private[user_id] = (time.monotonic(), rows)
+            self._private.move_to_end(user_id)
+            while len(self._private) > self.private_cache_size:
+                self._private.popitem(last=False)
+        return rows
@@ -0,0 +1,150 @@
+"""
+Cache of nearby-search results keyed on quantized query centers.
+
+Map clients re-query whenever the map moves, even by a few meters. Query
+centers are snapped to their geohash cell, and each cell caches the
+campsites within `radius + (distance from cell center to its farthest
+corner)` of the cell center: a superset of the results for any center
+inside the cell. A hit trims that superset to the exact radius around the
+real query center, so cached answers equal uncached ones.
+
+Writes drop only the entries whose superset circle covers the campsite's
+old or new position.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from app.geo import geohash
+from app.geo.distance import haversine_miles
+
+
+class NearbyCache:
+    """
+    LRU + TTL cache of nearby-search supersets.
+
+    Parameters:
+    - max_entries: maximum number of cached (cell, radius, user, variant)
+      entries
+    - ttl_seconds: age after which an entry is reloaded, so writes handled
+      by other worker processes are picked up (None disables expiry)
+    - precision: geohash length of a cell (6 is about 1.2 x 0.6 km)
+    """
+
+    def __init__(self, max_entries=4096, ttl_seconds=60, precision=6):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.precision = precision
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def nearby(self, latitude, longitude, radius_miles, user_id, load, variant=None, limit=None):
+        """
+        Returns the rows within radius_miles of a point, sorted by distance,
+        up to `limit` of them (None for all).
+        Each row is a copy with a `distance` key added.
+
+        Parameters:
+        - user_id: visibility scope of the results (the requesting user)
+        - load: callable(center_lat, center_lon, radius_miles) returning the
+          visible rows nearest to a point, at most `limit` of them; called
+          on a miss
+        - variant: any other hashable input that changes the rows loaded
+          (e.g. selected columns and filters)
+
+        A cell whose load hit `limit` may be missing rows near the query
+        point, so such queries load the point itself instead.
+        """
+        cell = geohash.encode(latitude, longitude, self.precision)
+        key = (cell, radius_miles, user_id, variant, limit)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                self.ttl_seconds is None or time.monotonic() - entry[0] <= self.ttl_seconds
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                rows = entry[4]
+            else:
+                entry = None
+                self.misses += 1
+                generation = self._generation
+
+        if entry is None:
+            center_lat, center_lon, reach = self._cell_reach(cell, radius_miles)
+            rows = load(center_lat, center_lon, reach)
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (time.monotonic(), center_lat, center_lon, reach, rows)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+
+        if limit is not None and len(rows) >= limit:
+            rows = load(latitude, longitude, radius_miles)
+
+        results = []
+        for row in rows:
+            distance = haversine_miles(
+                latitude, longitude, float(row["latitude"]), float(row["longitude"])
+            )
+            if distance <= radius_miles:
+                results.append((distance, row))
+        results.sort(key=lambda result: result[0])
+        return [dict(row, distance=distance) for distance, row in results[:limit]]
+
+    def invalidate_point(self, latitude, longitude, user_id=None):
+        """
+        Drops every entry whose superset covers a point.
+        `user_id` limits this to one user's entries (a private campsite);
+        None drops matching entries of every user.
+        """
+        latitude = float(latitude)
+        longitude = float(longitude)
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key
+                for key, (_, center_lat, center_lon, reach, _) in self._entries.items()
+                if (user_id is None or key[2] == user_id)
+                and haversine_miles(center_lat, center_lon, latitude, longitude) <= reach
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    @staticmethod
+    def _cell_reach(cell, radius_miles):
+        min_lat, min_lon, max_lat, max_lon = geohash.bounds(cell)
+        center_lat = (min_lat + max_lat) / 2
+        center_lon = (min_lon + max_lon) / 2
+        corner = max(
+            haversine_miles(center_lat, center_lon, lat, lon)
+            for lat in (min_lat, max_lat)
+            for lon in (min_lon, max_lon)
+        )
+        return center_lat, center_lon, radius_miles + corner
@@ -0,0 +1,88 @@
+"""
+In-process cache of encoded campsite map tiles.
+
+Entries are keyed by (z, x, y) and hold the encoded body and its ETag.
+A campsite write only evicts the tiles containing its old and new
+positions, one per zoom level, so every other tile stays warm.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from app.geo.tiles import tile_xy
+
+
+class TileCache:
+    """
+    LRU + TTL cache of encoded tiles.
+
+    Parameters:
+    - max_tiles: maximum number of cached tiles
+    - ttl_seconds: age after which an entry is rebuilt, so writes handled
+      by other worker processes are picked up (None disables expiry)
+    - max_zoom: highest zoom level served
+    """
+
+    def __init__(self, max_tiles=10_000, ttl_seconds=60, max_zoom=22):
+        self.max_tiles = max_tiles
+        self.ttl_seconds = ttl_seconds
+        self.max_zoom = max_zoom
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, z, x, y):
+        """
+        Returns (body, etag) for a cached tile, or None.
+        """
+        with self._lock:
+            entry = self._entries.get((z, x, y))
+            if entry is not None:
+                stored_at, body, etag = entry
+                if self.ttl_seconds is None or time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end((z, x, y))
+                    self.hits += 1
+                    return body, etag
+                del self._entries[(z, x, y)]
+            self.misses += 1
+            return None
+
+    def put(self, z, x, y, body, etag):
+        """
+        Stores an encoded tile, evicting the least recently used if full.
+        """
+        with self._lock:
+            self._entries[(z, x, y)] = (time.monotonic(), body, etag)
+            self._entries.move_to_end((z, x, y))
+            while len(self._entries) > self.max_tiles:
+                self._entries.popitem(last=False)
+
+    def invalidate_point(self, latitude, longitude):
+        """
+        Evicts every cached tile (one per zoom) that contains a point.
+        """
+        keys = [
+            (z, *tile_xy(latitude, longitude, z))
+            for z in range(self.max_zoom + 1)
+        ]
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tiles": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
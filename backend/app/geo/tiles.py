@@ -0,0 +1,41 @@
+"""
+Web Mercator (slippy map) tile math.
+Tiles follow the z/x/y scheme used by Google Maps and OpenStreetMap.
+"""
+
+import math
+
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def tile_xy(latitude, longitude, zoom):
+    """
+    Returns the (x, y) tile containing a point at the given zoom level.
+    Latitudes beyond the Mercator limit are clamped.
+    """
+    n = 1 << zoom
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, float(latitude)))
+    lat_rad = math.radians(lat)
+
+    x = int((float(longitude) + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(zoom, x, y):
+    """
+    Returns the (min_lat, min_lon, max_lat, max_lon) bounds of a tile.
+    """
+    n = 1 << zoom
+    min_lon = x / n * 360.0 - 180.0
+    max_lon = (x + 1) / n * 360.0 - 180.0
+    max_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    min_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def is_valid_tile(zoom, x, y, max_zoom=22):
+    """
+    Returns True if z/x/y addresses an existing tile.
+    """
+    return 0 <= zoom <= max_zoom and 0 <= x < (1 << zoom) and 0 <= y < (1 << zoom)
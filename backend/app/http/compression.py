@@ -0,0 +1,197 @@
+"""
+Response compression.
+
+Responses are compressed with the best encoding the client accepts among
+COMPRESS_ALGORITHMS (brotli, zstd, gzip), once their body reaches
+COMPRESS_MIN_SIZE bytes. Streamed responses (exports, import progress) are
+compressed chunk by chunk and flushed after every chunk so they still
+arrive progressively.
+
+Bodies served from a server-side cache (map tiles, @cached_route entries)
+go through precompress() instead, which stores the compressed bytes in the
+cache under a digest of the body so later hits skip compression.
+
+brotli and zstandard are optional dependencies; gzip is always available.
+"""
+
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - exercised only without zstandard
+    zstandard = None
+
+from flask import current_app, request
+
+# Encodings in server preference order (best ratio first).
+ENCODINGS = ("br", "zstd", "gzip")
+
+# Package providing each encoding.
+ENCODING_PACKAGES = {"br": "brotli", "zstd": "zstandard", "gzip": "gzip"}
+
+# Maximum level of each encoding; COMPRESS_LEVEL is clamped to it.
+MAX_LEVELS = {"br": 11, "zstd": 22, "gzip": 9}
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/geo+json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "application/vnd.rvcp.columns+json",
+    "application/vnd.rvcp.columns+msgpack",
+)
+
+
+def available_encodings():
+    """
+    Returns the encodings whose libraries are installed, in ENCODINGS order.
+    """
+    modules = {"br": brotli, "zstd": zstandard, "gzip": gzip}
+    return tuple(encoding for encoding in ENCODINGS if modules[encoding] is not None)
+
+
+def is_compressible(response):
+    """
+    Returns whether a response's body may be compressed, in which case it
+    also varies by Accept-Encoding.
+    """
+    mimetype = response.mimetype or ""
+    return bool(current_app.config["COMPRESS_ALGORITHMS"]) and (
+        mimetype in COMPRESSIBLE_TYPES or mimetype.startswith("text/")
+    )
+
+
+def choose_encoding(response, size=None):
+    """
+    Returns the encoding to send a response with, or None to send it as is.
+
+    Parameters:
+    - size: body length in bytes (None for streamed bodies)
+    """
+    if (
+        request.method == "HEAD"
+        or response.status_code in (204, 206, 304)
+        or "Content-Encoding" in response.headers
+    ):
+        return None
+    if size is not None and size < current_app.config["COMPRESS_MIN_SIZE"]:
+        return None
+    return request.accept_encodings.best_match(current_app.config["COMPRESS_ALGORITHMS"])
+
+
+def level_for(encoding):
+    return max(1, min(current_app.config["COMPRESS_LEVEL"], MAX_LEVELS[encoding]))
+
+
+def compress(data, encoding, level):
+    """
+    Compresses a complete body.
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks, encoding, level):
+    """
+    Compresses a streamed body, flushing after every chunk so the client
+    receives each chunk without waiting for the next.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    elif encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        process = compressor.compress
+        flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        finish = compressor.flush
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+
+    for chunk in chunks:
+        if chunk:
+            yield process(chunk) + flush()
+    yield finish()
+
+
+def set_encoding(response, encoding):
+    """
+    Marks a response as encoded. Strong ETags become weak, since the bytes
+    now differ from the identity representation; If-None-Match uses weak
+    comparison, so revalidation keeps working.
+    """
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def precompress(response, digest, store):
+    """
+    Compresses a response served from a server-side cache, reusing the
+    compressed bytes stored in `store` for the same body and encoding.
+
+    Parameters:
+    - digest: hash identifying the body, e.g. its strong ETag
+    - store: CacheNamespace holding compressed bodies
+    """
+    if not is_compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+
+    body = response.get_data()
+    encoding = choose_encoding(response, len(body))
+    if encoding is None:
+        return response
+
+    response.set_data(store.get_or_set(
+        f"{digest}:{encoding}",
+        lambda: compress(body, encoding, level_for(encoding)),
+    ))
+    set_encoding(response, encoding)
+    return response
+
+
+def compress_response(response):
+    """
+    after_request hook compressing eligible responses on the fly.
+    """
+    if not is_compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+
+    if response.is_streamed:
+        encoding = choose_encoding(response)
+        if encoding is None:
+            return response
+        response.response = compress_stream(
+            response.iter_encoded(), encoding, level_for(encoding)
+        )
+        response.headers.pop("Content-Length", None)
+    else:
+        encoding = choose_encoding(response, response.calculate_content_length())
+        if encoding is None:
+            return response
+        response.set_data(compress(response.get_data(), encoding, level_for(encoding)))
+
+    set_encoding(response, encoding)
+    return response
+
+
+def init_app(app):
+    """
+    Registers the compression hook. Call before app.db.query.init_app so
+    compression runs after the request transaction is committed.
+    """
+    app.after_request(compress_response)
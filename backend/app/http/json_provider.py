@@ -0,0 +1,84 @@
+"""
+JSON provider for API responses.
+
+MySQL returns DECIMAL columns (latitude, longitude) as Decimal and DATE
+columns (begin_date, date_created) as date. Flask's default provider sends
+those as strings ("44.5000000", "Mon, 05 Jan 2026 00:00:00 GMT") through
+the slow json.JSONEncoder.default path and sorts every object's keys.
+FastJSONProvider sends Decimals as numbers and dates as ISO 8601 strings,
+keeps keys in row order and encodes with orjson when it is installed
+(an optional dependency), falling back to the stdlib json module.
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+from flask.json.provider import JSONProvider
+
+
+def default(o):
+    """
+    Converts values neither encoder handles natively.
+    """
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Compact JSON provider (indented in debug mode, like Flask's default).
+    """
+
+    mimetype = "application/json"
+    compact = None
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode("utf-8")
+
+    def dumps_bytes(self, obj, **kwargs):
+        """
+        Serializes obj to UTF-8 bytes. Keyword arguments other than indent
+        force the stdlib encoder, which is the only one supporting them.
+        """
+        indent = kwargs.pop("indent", None)
+        if orjson is not None and not kwargs:
+            option = orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=default, option=option)
+
+        kwargs.setdefault("default", default)
+        kwargs.setdefault("ensure_ascii", False)
+        if indent:
+            kwargs["indent"] = indent
+        else:
+            kwargs.setdefault("separators", (",", ":"))
+        return json.dumps(obj, **kwargs).encode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        body = self.dumps_bytes(obj, indent=indent)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
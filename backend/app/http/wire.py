@@ -0,0 +1,108 @@
+"""
+Wire formats negotiated via the Accept header.
+
+List and trip payloads can be sent as:
+- application/json (default, also for */* and missing Accept headers)
+- application/msgpack: the same structure, MessagePack-encoded
+- application/vnd.rvcp.columns+msgpack and application/vnd.rvcp.columns+json:
+  lists of rows as parallel column arrays ({"count": n, "columns":
+  {"campsite_id": [...], "latitude": [...], ...}}) with the boolean amenity
+  columns packed into one amenity_mask column (bit order in
+  app.geo.amenities.AMENITIES)
+
+The columnar layout repeats no keys and is far cheaper to parse on low-end
+devices than arrays of objects. msgpack is an optional dependency; without
+it only the JSON formats are offered.
+"""
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - exercised only without msgpack
+    msgpack = None
+
+from flask import current_app, jsonify, request
+
+from app.geo.amenities import AMENITIES, amenity_mask
+from app.http.json_provider import default
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+COLUMNS_MSGPACK = "application/vnd.rvcp.columns+msgpack"
+COLUMNS_JSON = "application/vnd.rvcp.columns+json"
+
+COLUMNAR_FORMATS = (COLUMNS_MSGPACK, COLUMNS_JSON)
+MSGPACK_FORMATS = (MSGPACK, COLUMNS_MSGPACK)
+
+AMENITY_COLUMNS = tuple(column for _, column in AMENITIES)
+
+
+def offered_formats():
+    """
+    Returns the formats this process can send, JSON first so it wins ties.
+    """
+    if msgpack is None:
+        return (JSON, COLUMNS_JSON)
+    return (JSON, MSGPACK, COLUMNS_MSGPACK, COLUMNS_JSON)
+
+
+def wire_format():
+    """
+    Returns the format of the current request's response.
+    """
+    return request.accept_mimetypes.best_match(offered_formats(), default=JSON)
+
+
+def to_columns(rows):
+    """
+    Converts a list of rows to parallel columns. Rows may lack some keys
+    (e.g. only single-campsite clusters have a campsite_id); their cells
+    are None.
+    """
+    if not rows:
+        return {"count": 0, "columns": {}}
+
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    packed = [name for name in names if name in AMENITY_COLUMNS]
+    columns = {
+        name: [row.get(name) for row in rows]
+        for name in names
+        if name not in packed
+    }
+    if packed:
+        columns["amenity_mask"] = [amenity_mask(row) for row in rows]
+    return {"count": len(rows), "columns": columns}
+
+
+def columnar(payload):
+    """
+    Converts every list of rows in a payload to columns, e.g. a trip's
+    embedded entries.
+    """
+    if isinstance(payload, list) and all(isinstance(row, dict) for row in payload):
+        return to_columns([
+            {name: columnar(value) for name, value in row.items()}
+            for row in payload
+        ])
+    if isinstance(payload, dict):
+        return {name: columnar(value) for name, value in payload.items()}
+    return payload
+
+
+def send(payload):
+    """
+    Builds the response for a payload in the negotiated wire format.
+    """
+    fmt = wire_format()
+    if fmt == JSON:
+        response = jsonify(payload)
+    else:
+        if fmt in COLUMNAR_FORMATS:
+            payload = columnar(payload)
+        if fmt in MSGPACK_FORMATS:
+            body = msgpack.packb(payload, default=default)
+        else:
+            body = current_app.json.dumps_bytes(payload) + b"\n"
+        response = current_app.response_class(body, mimetype=fmt)
+
+    response.vary.add("Accept")
+    return response
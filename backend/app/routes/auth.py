@@ -7,7 +7,7 @@ import jwt
 import datetime
 from flask import Blueprint, request, jsonify, current_app, g
 from werkzeug.security import generate_password_hash, check_password_hash
-from app.db.connection import get_db_connection
+from app.db.query import execute_query
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -24,37 +24,6 @@ def error_response(message, status_code):
     return jsonify({"error": message}), status_code
 
 
-def execute_query(query, params=None, fetch_one=False):
-    """
-    Executes a database query for authentication routes.
-
-    Parameters:
-    - query: SQL query string
-    - params: tuple of parameters
-    - fetch_one: return a single row
-
-    Returns:
-    - result (if applicable)
-    - lastrowid (for INSERT operations)
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute(query, params or ())
-
-    result = None
-    if fetch_one:
-        result = cursor.fetchone()
-
-    conn.commit()
-    lastrowid = cursor.lastrowid
-
-    cursor.close()
-    conn.close()
-
-    return result, lastrowid
-
-
 def create_token(user_id):
     """
     Creates a JWT token for authenticated users.
@@ -88,7 +57,7 @@ def register():
     if not data or "email" not in data or "password" not in data:
         return error_response("Email and password required", 400)
 
-    existing_user, _ = execute_query(
+    existing_user, _, _ = execute_query(
         "SELECT user_id FROM users WHERE email = %s",
         (data["email"],),
         fetch_one=True
@@ -99,7 +68,7 @@ def register():
 
     password_hash = generate_password_hash(data["password"])
 
-    _, user_id = execute_query(
+    _, _, user_id = execute_query(
         """
         INSERT INTO users (email, password_hash, first_name, last_name)
         VALUES (%s, %s, %s, %s)
@@ -127,7 +96,7 @@ def login():
     if not data or "email" not in data or "password" not in data:
         return error_response("Email and password required", 400)
 
-    user, _ = execute_query(
+    user, _, _ = execute_query(
         """
         SELECT user_id, password_hash
         FROM users
@@ -0,0 +1,215 @@
+"""
+Batch API route.
+Runs several API calls in one HTTP request so mobile clients on slow
+connections pay a single round trip.
+
+Sub-requests are dispatched in-process through the registered blueprints.
+They share the batch request's authentication (g.user_id), its database
+connection and its transaction; each write runs inside a savepoint that is
+rolled back if the sub-request fails, so a failed write never leaves partial
+changes behind while the others still commit with the batch. Endpoints
+that commit on their own or stream their response would break that, so
+they cannot be batched.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, current_app, g, jsonify, request
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from app.db.query import release_savepoint, rollback_to, savepoint
+
+BATCH_METHODS = ("GET", "POST", "PUT", "DELETE")
+
+# Endpoints that commit their own transactions while streaming progress.
+UNBATCHABLE_ENDPOINTS = frozenset({"bulk.import_campsites"})
+
+batch_bp = Blueprint("batch", __name__)
+
+
+# ------------------------
+# Helper Functions
+# ------------------------
+
+def error_response(message, status_code):
+    """
+    Returns a standardized JSON error response.
+    """
+    return jsonify({"error": message}), status_code
+
+
+def resolve_endpoint(path, method):
+    """
+    Returns the endpoint a sub-request path is routed to, or None if it
+    matches no route (dispatch then answers 404 or 405).
+    """
+    adapter = current_app.url_map.bind("localhost")
+    try:
+        endpoint, _ = adapter.match(path.split("?", 1)[0], method=method)
+    except HTTPException:
+        return None
+    return endpoint
+
+
+def parse_batch(data, max_requests):
+    """
+    Validates a batch payload.
+
+    Parameters:
+    - data: {"requests": [{"method", "path", "body"?}], "concurrent"?: bool}
+    - max_requests: maximum number of sub-requests
+
+    Returns:
+    - (sub-requests, None) on success
+    - (None, error message) if the payload is invalid
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("requests"), list):
+        return None, "requests must be a list"
+
+    items = data["requests"]
+    if not items:
+        return None, "requests must not be empty"
+    if len(items) > max_requests:
+        return None, f"Batch exceeds {max_requests} requests"
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            return None, f"requests[{index}]: Invalid request"
+        method = str(item.get("method", "")).upper()
+        if method not in BATCH_METHODS:
+            return None, f"requests[{index}]: Unsupported method"
+        path = item.get("path")
+        if not isinstance(path, str) or not path.startswith("/api/"):
+            return None, f"requests[{index}]: path must start with /api/"
+        if resolve_endpoint(path, method) in UNBATCHABLE_ENDPOINTS:
+            return None, f"requests[{index}]: {path} cannot be batched"
+
+    return items, None
+
+
+def dispatch(app, item):
+    """
+    Runs one sub-request through the app's URL map and view functions,
+    without the before/after request hooks of a real request: the batch
+    request already authenticated the user and owns the transaction.
+    Streamed responses (e.g. exports) are closed unread and answered 400.
+
+    Returns:
+    - {"status", "headers", "body", "elapsed_ms"}
+    """
+    started = time.perf_counter()
+    builder = EnvironBuilder(
+        path=item["path"],
+        method=item["method"].upper(),
+        json=item.get("body"),
+    )
+
+    with app.request_context(builder.get_environ()):
+        if request.endpoint == "batch.batch":
+            response = app.make_response(error_response("Batches cannot be nested", 400))
+        else:
+            try:
+                response = app.make_response(app.dispatch_request())
+            except HTTPException as error:
+                response = app.make_response(app.handle_user_exception(error))
+            else:
+                if response.is_streamed:
+                    response.close()
+                    response = app.make_response(
+                        error_response("Streaming responses cannot be batched", 400)
+                    )
+
+    body = response.get_json(silent=True) if response.is_json else response.get_data(as_text=True)
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name not in ("Content-Type", "Content-Length")
+    }
+    return {
+        "status": response.status_code,
+        "headers": headers,
+        "body": body,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def dispatch_in_savepoint(app, index, item):
+    """
+    Runs a sub-request on the shared connection. Writes are wrapped in a
+    savepoint so a failed sub-request undoes only its own changes.
+    """
+    if item["method"].upper() == "GET":
+        return dispatch(app, item)
+
+    name = f"batch_{index}"
+    savepoint(name)
+    result = dispatch(app, item)
+    if result["status"] >= 400:
+        rollback_to(name)
+    else:
+        release_savepoint(name)
+    return result
+
+
+def dispatch_isolated(app, user_id, item):
+    """
+    Runs a read-only sub-request in its own app context (and therefore on
+    its own pooled connection), for concurrent execution.
+    """
+    with app.app_context():
+        g.user_id = user_id
+        return dispatch(app, item)
+
+
+# ------------------------
+# Routes
+# ------------------------
+
+@batch_bp.route("/batch", methods=["POST"])
+def batch():
+    """
+    Executes a list of API calls and returns all responses together,
+    in request order.
+
+    Body:
+    - requests: [{"method": "GET", "path": "/api/trips/1?include=entries"},
+      {"method": "PUT", "path": "/api/trips/1", "body": {...}}, ...]
+    - concurrent: run the sub-requests in parallel, each on its own
+      connection; honored only when every sub-request is a GET
+
+    Sub-requests run in order on the batch's connection and transaction.
+    A sub-request that fails (status >= 400) has its writes rolled back;
+    the others are committed when the batch returns.
+
+    Returns:
+    - {"responses": [{"status", "headers", "body", "elapsed_ms"}],
+      "elapsed_ms": total}
+    """
+    data = request.get_json(silent=True)
+    items, message = parse_batch(data, current_app.config["BATCH_MAX_REQUESTS"])
+    if message:
+        return error_response(message, 400)
+
+    app = current_app._get_current_object()
+    user_id = g.user_id
+    started = time.perf_counter()
+
+    reads_only = all(item["method"].upper() == "GET" for item in items)
+    if data.get("concurrent") and reads_only and len(items) > 1:
+        workers = min(len(items), current_app.config["BATCH_MAX_WORKERS"])
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = list(executor.map(
+                lambda item: dispatch_isolated(app, user_id, item), items
+            ))
+    else:
+        responses = [
+            dispatch_in_savepoint(app, index, item)
+            for index, item in enumerate(items)
+        ]
+
+    return jsonify({
+        "responses": responses,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    })
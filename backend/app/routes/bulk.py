@@ -0,0 +1,87 @@
+"""
+Bulk campsite API routes.
+Streams large campsite data sets in and out of the OSU MySQL database.
+"""
+
+import io
+import json
+
+from flask import Blueprint, Response, g, jsonify, request, stream_with_context
+from mysql.connector import Error as DatabaseError
+
+from app.bulk.campsite_import import (
+    DEFAULT_BATCH_SIZE,
+    MAX_BATCH_SIZE,
+    CampsiteImport,
+    infer_format,
+)
+
+bulk_bp = Blueprint("bulk", __name__)
+
+
+# ------------------------
+# Helper Functions
+# ------------------------
+
+def error_response(message, status_code):
+    """
+    Returns a standardized JSON error response.
+    """
+    return jsonify({"error": message}), status_code
+
+
+def parse_flag(value):
+    return (value or "").lower() in ("1", "true", "yes")
+
+
+# ------------------------
+# Routes
+# ------------------------
+
+@bulk_bp.route("/campsites/import", methods=["POST"])
+def import_campsites():
+    """
+    Imports campsites owned by the current user from a CSV or GeoJSON
+    request body, which is parsed while it uploads.
+
+    Parameters (query string):
+    - format: csv or geojson (defaults to the Content-Type)
+    - batch_size: rows per INSERT transaction (default 1000, max 5000)
+    - start: source rows to skip, to resume an earlier import
+    - dry_run: validate without inserting
+
+    Returns:
+    - application/x-ndjson: one progress object per committed batch
+      ({"rows", "inserted", "invalid", "next_start", "dry_run", "errors"}),
+      then a final one with "done": true, or with "error" if the import
+      stopped; resume by passing its next_start as start
+    """
+    fmt = request.args.get("format") or infer_format(request.mimetype)
+    if fmt not in ("csv", "geojson"):
+        return error_response("Unknown import format", 400)
+
+    try:
+        batch_size = int(request.args.get("batch_size", DEFAULT_BATCH_SIZE))
+        start = int(request.args.get("start", 0))
+    except ValueError:
+        return error_response("Invalid batch_size or start", 400)
+    if not 1 <= batch_size <= MAX_BATCH_SIZE or start < 0:
+        return error_response("Invalid batch_size or start", 400)
+
+    job = CampsiteImport(
+        g.user_id,
+        fmt,
+        batch_size=batch_size,
+        start=start,
+        dry_run=parse_flag(request.args.get("dry_run")),
+    )
+    stream = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+
+    def lines():
+        try:
+            for progress in job.run(stream):
+                yield json.dumps(progress) + "\n"
+        except (ValueError, DatabaseError) as error:
+            yield json.dumps({**job.progress(), "error": str(error)}) + "\n"
+
+    return Response(stream_with_context(lines()), mimetype="application/x-ndjson")
@@ -4,8 +4,86 @@ Provides CRUD access to campsite data.
 Interacts with the OSU MySQL database.
 """
 
-from flask import Blueprint, jsonify, g, request
-from app.db.connection import get_db_connection
+import hashlib
+import json
+import math
+from collections import namedtuple
+from functools import lru_cache
+from flask import Blueprint, Response, current_app, jsonify, g, request, stream_with_context
+from app.bulk.campsite_export import EXPORT_FORMATS, export_campsites
+from app.cache.entities import entity_cache_enabled, get_entity, invalidate_entity
+from app.cache.etags import conditional_route
+from app.cache.route_cache import get_cache
+from app.db.changes import (
+    change_feed_enabled,
+    compacted_through,
+    log_delete,
+    log_upserts,
+    read_changes,
+)
+from app.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, page_response, parse_page_args
+from app.db.query import execute_query, on_commit
+from app.db.versions import bump_versions, campsite_scopes, read_versions
+from app.geo.amenities import parse_amenities
+from app.geo.distance import bbox_center, bounding_box, longitude_ranges, parse_bbox
+from app.geo.clusters import (
+    COUNT,
+    MAX_CLUSTER_ZOOM,
+    ClusterIndex,
+    aggregate_points,
+    cluster_level,
+    merge_aggregate,
+    to_cluster,
+)
+from app.geo.columnar import ColumnarCampsiteStore
+from app.geo.grid_index import CampsiteGridIndex
+from app.geo.nearby_cache import NearbyCache
+from app.geo.tile_cache import TileCache
+from app.geo.tiles import is_valid_tile, tile_bounds
+from app.http.compression import precompress
+from app.http.wire import send
+
+NEARBY_RADIUS_MILES = 50
+MAX_NEARBY_POINTS = 25
+MAX_VIEWPORT_RESULTS = 500
+MAX_NEARBY_RESULTS = 500
+CLUSTER_THRESHOLD = 200
+MAX_TILE_ZOOM = 22
+
+CAMPSITE_FIELDS = (
+    "campsite_id",
+    "campsite_name",
+    "user_id",
+    "latitude",
+    "longitude",
+    "campsite_type",
+    "campsite_identifier",
+    "is_public",
+    "dump_available",
+    "electric_hookup_available",
+    "water_available",
+    "restroom_available",
+    "shower_available",
+    "pets_allowed",
+    "wifi_available",
+    "cell_carrier",
+    "cell_quality",
+    "nearby_recreation",
+)
+CAMPSITE_COLUMNS = ", ".join(CAMPSITE_FIELDS)
+
+# Fields computed by search queries rather than stored in a column.
+COMPUTED_FIELDS = ("distance",)
+
+# Named field sets accepted as fields=<name>.
+FIELD_SETS = {
+    "map": ("campsite_id", "campsite_name", "latitude", "longitude"),
+}
+
+# Projection of a response onto a field subset.
+# - fields: output fields in canonical order (always includes campsite_id)
+# - columns: SQL select list for the stored fields
+Projection = namedtuple("Projection", ["fields", "columns"])
 
 campsites_bp = Blueprint("campsites", __name__)
 
@@ -20,41 +98,6 @@ def error_response(message, status_code):
     """
     return jsonify({"error": message}), status_code
 
-def execute_query(query, params=None, fetch_one=False, fetch_all=False):
-    """
-    Executes a database query.
-
-    Parameters:
-    - query: SQL query string
-    - params: tuple of parameters
-    - fetch_one: return a single row
-    - fetch_all: return all rows
-
-    Returns:
-    - result (if applicable)
-    - rowcount (number of affected rows)
-    - lastrowid (for INSERT operations)
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute(query, params or ())
-
-    result = None
-    if fetch_one:
-        result = cursor.fetchone()
-    elif fetch_all:
-        result = cursor.fetchall()
-
-    conn.commit()
-    rowcount = cursor.rowcount
-    lastrowid = cursor.lastrowid
-
-    cursor.close()
-    conn.close()
-
-    return result, rowcount, lastrowid
-
 def validate_campsite_payload(data):
     """
     Validates required fields for campsite creation and update.
@@ -80,124 +123,951 @@ def validate_campsite_payload(data):
 
     return all(field in data for field in required_fields)
 
-def has_access(campsite_id, user_id):
+def load_campsite(campsite_id):
+    """
+    Returns a campsite row by ID through the entity cache, or None.
+    """
+    def load():
+        campsite, _, _ = execute_query(
+            f"SELECT {CAMPSITE_COLUMNS} FROM campsites WHERE campsite_id = %s;",
+            (campsite_id,),
+            fetch_one=True,
+        )
+        return campsite
+
+    return get_entity("campsite", campsite_id, load)
+
+def can_view(campsite, user_id):
+    """
+    Returns True if a campsite row is visible to a user.
+    """
+    return campsite is not None and bool(campsite["is_public"] or campsite["user_id"] == user_id)
+
+def make_projection(fields):
+    """
+    Builds the Projection for a set of whitelisted field names.
+    """
+    fields = tuple(
+        field for field in CAMPSITE_FIELDS + COMPUTED_FIELDS
+        if field in fields or field == "campsite_id"
+    )
+    columns = ", ".join(field for field in fields if field in CAMPSITE_FIELDS)
+    return Projection(fields, columns)
+
+PROJECTIONS = {name: make_projection(fields) for name, fields in FIELD_SETS.items()}
+
+@lru_cache(maxsize=256)
+def parse_fields(value):
+    """
+    Parses a fields= parameter: either a FIELD_SETS name or a
+    comma-separated list of campsite fields.
+
+    Returns:
+    - Projection (precomputed for named sets, memoized otherwise)
+    - None if the value names an unknown field
+    """
+    value = value.strip()
+    if value in PROJECTIONS:
+        return PROJECTIONS[value]
+
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    if not names or not names <= set(CAMPSITE_FIELDS + COMPUTED_FIELDS):
+        return None
+    return make_projection(names)
+
+def project(rows, projection):
+    """
+    Narrows rows to the projection's fields. Rows are returned unchanged
+    when no projection was requested.
+    """
+    if projection is None:
+        return rows
+    fields = projection.fields
+    return [{field: row[field] for field in fields if field in row} for row in rows]
+
+def campsite_list_version(user_id):
     """
-    Checks whether a user can access a campsite.
-    Access is allowed if:
-    - The campsite is public
-    - The user is the creator
+    Version token of every campsite list a user can fetch: the versions of
+    the public campsites and of the user's own.
+    """
+    return read_versions(campsite_scopes(user_id))
+
+def campsite_version(user_id, campsite_id):
+    """
+    Version token of a single campsite (its updated_at), or None if the
+    user cannot see it.
+    """
+    campsite, _, _ = execute_query(
+        "SELECT updated_at, is_public, user_id FROM campsites WHERE campsite_id = %s;",
+        (campsite_id,),
+        fetch_one=True,
+    )
+    if not can_view(campsite, user_id):
+        return None
+    return campsite["updated_at"]
+
+def campsite_exists(campsite_id):
+    """
+    Returns True if a campsite with this ID exists, regardless of owner.
     """
     campsite, _, _ = execute_query(
+        "SELECT campsite_id FROM campsites WHERE campsite_id = %s;",
+        (campsite_id,),
+        fetch_one=True,
+    )
+    return campsite is not None
+
+def build_amenity_clause(amenities):
+    """
+    Builds the SQL filter for an amenities mask against the packed
+    amenity_mask column (see migrations/002_campsites_amenity_mask.sql).
+
+    Returns:
+    - clause: SQL fragment ("" when there is no filter)
+    - params: tuple of parameters
+    """
+    if not amenities:
+        return "", ()
+    return "AND amenity_mask & %s = %s", (amenities, amenities)
+
+def build_nearby_query(
+    latitude,
+    longitude,
+    user_id,
+    radius_miles=NEARBY_RADIUS_MILES,
+    columns=CAMPSITE_COLUMNS,
+    amenities=0,
+    limit=None,
+):
+    """
+    Builds the nearby-campsite query, selecting `columns`, for the nearest
+    `limit` campsites (None for all).
+    A non-zero `amenities` mask keeps only campsites having all of them.
+
+    Candidates are restricted to the search envelope with range predicates
+    on idx_campsites_lat_lon (see migrations/001_campsites_geo_prefilter.sql),
+    then ranked by exact Haversine distance using the precomputed
+    sin_lat / cos_lat / lon_rad columns.
+
+    Returns:
+    - query: SQL query string
+    - params: tuple of parameters
+    """
+    min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius_miles)
+    lon_clause = " OR ".join(["longitude BETWEEN %s AND %s"] * len(lon_ranges))
+    amenity_clause, amenity_params = build_amenity_clause(amenities)
+
+    query = f"""
+        SELECT
+            {columns},
+            (
+                3959 * ACOS(LEAST(1,
+                    %s * cos_lat * COS(lon_rad - %s) +
+                    %s * sin_lat
+                ))
+            ) AS distance
+        FROM campsites
+        WHERE latitude BETWEEN %s AND %s
+          AND ({lon_clause})
+          AND (is_public = TRUE OR user_id = %s)
+          {amenity_clause}
+        HAVING distance <= %s
+        ORDER BY distance ASC
+        {"LIMIT %s" if limit is not None else ""};
+        """
+
+    lat_rad = math.radians(latitude)
+    params = (
+        math.cos(lat_rad),
+        math.radians(longitude),
+        math.sin(lat_rad),
+        min_lat,
+        max_lat,
+        *[bound for lon_range in lon_ranges for bound in lon_range],
+        user_id,
+        *amenity_params,
+        radius_miles,
+    )
+    if limit is not None:
+        params += (limit,)
+    return query, params
+
+def build_viewport_query(
+    min_lat,
+    min_lon,
+    max_lat,
+    max_lon,
+    user_id,
+    limit,
+    columns=CAMPSITE_COLUMNS,
+    amenities=0,
+):
+    """
+    Builds the viewport (bounding-box) query, selecting `columns`.
+    A non-zero `amenities` mask keeps only campsites having all of them.
+
+    Uses range predicates on idx_campsites_lat_lon, splitting the longitude
+    range when the viewport crosses the antimeridian. At most `limit` rows
+    are returned, nearest to the viewport center first.
+
+    Returns:
+    - query: SQL query string
+    - params: tuple of parameters
+    """
+    lon_ranges = longitude_ranges(min_lon, max_lon)
+    lon_clause = " OR ".join(["longitude BETWEEN %s AND %s"] * len(lon_ranges))
+    amenity_clause, amenity_params = build_amenity_clause(amenities)
+
+    query = f"""
+        SELECT
+            {columns},
+            (
+                3959 * ACOS(LEAST(1,
+                    %s * cos_lat * COS(lon_rad - %s) +
+                    %s * sin_lat
+                ))
+            ) AS distance
+        FROM campsites
+        WHERE latitude BETWEEN %s AND %s
+          AND ({lon_clause})
+          AND (is_public = TRUE OR user_id = %s)
+          {amenity_clause}
+        ORDER BY distance ASC
+        LIMIT %s;
         """
-        SELECT campsite_id
+
+    center_lat, center_lon = bbox_center(min_lat, min_lon, max_lat, max_lon)
+    center_lat_rad = math.radians(center_lat)
+    params = (
+        math.cos(center_lat_rad),
+        math.radians(center_lon),
+        math.sin(center_lat_rad),
+        min_lat,
+        max_lat,
+        *[bound for lon_range in lon_ranges for bound in lon_range],
+        user_id,
+        *amenity_params,
+        limit,
+    )
+    return query, params
+
+def load_public_campsites():
+    """
+    Loads every public campsite for the in-process index.
+    """
+    campsites, _, _ = execute_query(
+        f"SELECT {CAMPSITE_COLUMNS} FROM campsites WHERE is_public = TRUE;",
+        fetch_all=True,
+    )
+    return campsites
+
+def load_private_campsites(user_id):
+    """
+    Loads the private campsites owned by a user for the index overlay.
+    """
+    campsites, _, _ = execute_query(
+        f"SELECT {CAMPSITE_COLUMNS} FROM campsites WHERE user_id = %s AND is_public = FALSE;",
+        (user_id,),
+        fetch_all=True,
+    )
+    return campsites
+
+def load_all_campsites():
+    """
+    Loads every campsite (public and private) for the columnar store.
+    """
+    campsites, _, _ = execute_query(
+        f"SELECT {CAMPSITE_COLUMNS} FROM campsites;",
+        fetch_all=True,
+    )
+    return campsites
+
+def get_geo_engine():
+    """
+    Returns this app's in-process geo engine, creating it on first use.
+    Returns None when GEO_ENGINE is "sql" (search runs in MySQL).
+    """
+    name = current_app.config["GEO_ENGINE"]
+    if name == "sql":
+        return None
+
+    engine = current_app.extensions.get("geo_engine")
+    if engine is None:
+        refresh_seconds = current_app.config["GEO_INDEX_REFRESH_SECONDS"]
+        if name == "numpy":
+            engine = ColumnarCampsiteStore(load_all_campsites, refresh_seconds=refresh_seconds)
+        else:
+            engine = CampsiteGridIndex(
+                load_public_campsites,
+                load_private_campsites,
+                refresh_seconds=refresh_seconds,
+            )
+        engine = current_app.extensions.setdefault("geo_engine", engine)
+    return engine
+
+def load_public_points():
+    """
+    Loads the coordinates of every public campsite for the cluster index.
+    """
+    points, _, _ = execute_query(
+        "SELECT campsite_id, latitude, longitude FROM campsites WHERE is_public = TRUE;",
+        fetch_all=True,
+    )
+    return points
+
+def get_cluster_index():
+    """
+    Returns this app's precomputed cluster index, creating it on first use.
+    """
+    index = current_app.extensions.get("cluster_index")
+    if index is None:
+        index = current_app.extensions.setdefault(
+            "cluster_index",
+            ClusterIndex(
+                load_public_points,
+                refresh_seconds=current_app.config["GEO_INDEX_REFRESH_SECONDS"],
+            ),
+        )
+    return index
+
+def get_tile_cache():
+    """
+    Returns this app's map tile cache, creating it on first use.
+    """
+    cache = current_app.extensions.get("tile_cache")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "tile_cache",
+            TileCache(
+                ttl_seconds=current_app.config["GEO_INDEX_REFRESH_SECONDS"],
+                max_zoom=MAX_TILE_ZOOM,
+            ),
+        )
+    return cache
+
+def get_nearby_cache():
+    """
+    Returns this app's nearby-search cache, creating it on first use.
+    Returns None when NEARBY_CACHE_SIZE is 0 (caching disabled).
+    """
+    size = current_app.config["NEARBY_CACHE_SIZE"]
+    if not size:
+        return None
+
+    cache = current_app.extensions.get("nearby_cache")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "nearby_cache",
+            NearbyCache(
+                max_entries=size,
+                ttl_seconds=current_app.config["GEO_INDEX_REFRESH_SECONDS"],
+            ),
+        )
+    return cache
+
+def stream_campsites(fmt, user_id, projection, amenities, viewport=None):
+    """
+    Streams every campsite visible to the user (public, or owned by the
+    user) as NDJSON or GeoJSON, ordered by campsite_id, reading the rows
+    through an unbuffered cursor.
+    """
+    fields = [
+        field for field in (projection.fields if projection else CAMPSITE_FIELDS)
+        if field in CAMPSITE_FIELDS
+    ]
+    selected = fields
+    if fmt == "geojson":
+        selected = fields + [field for field in ("latitude", "longitude") if field not in fields]
+
+    amenity_clause, amenity_params = build_amenity_clause(amenities)
+    query = f"""
+        SELECT {", ".join(selected)}
         FROM campsites
-        WHERE campsite_id = %s
-          AND (is_public = TRUE OR user_id = %s);
-        """,
-        (campsite_id, user_id),
+        WHERE (is_public = TRUE OR user_id = %s)
+          {amenity_clause}
+        """
+    params = [user_id, *amenity_params]
+
+    if viewport is not None:
+        min_lat, min_lon, max_lat, max_lon = viewport
+        lon_ranges = longitude_ranges(min_lon, max_lon)
+        query += " AND latitude BETWEEN %s AND %s AND ({})".format(
+            " OR ".join(["longitude BETWEEN %s AND %s"] * len(lon_ranges))
+        )
+        params += [min_lat, max_lat, *[bound for lon_range in lon_ranges for bound in lon_range]]
+
+    chunks = export_campsites(fmt, query + " ORDER BY campsite_id;", tuple(params), fields)
+    return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt])
+
+def reset_campsite_indexes():
+    """
+    Drops this worker's in-process geo indexes and caches after a bulk
+    change (e.g. an import); they are rebuilt from the database on next use.
+    Other workers catch up within GEO_INDEX_REFRESH_SECONDS.
+    """
+    for name in ("geo_engine", "cluster_index"):
+        index = current_app.extensions.get(name)
+        if index is not None:
+            index.invalidate()
+    for name in ("tile_cache", "nearby_cache"):
+        cache = current_app.extensions.get(name)
+        if cache is not None:
+            cache.clear()
+
+def campsite_indexes_active():
+    """
+    Returns True when campsite writes must be written through to an
+    in-process geo engine, cluster index or cache of this worker.
+    """
+    return current_app.config["GEO_ENGINE"] != "sql" or any(
+        current_app.extensions.get(name) is not None
+        for name in ("cluster_index", "tile_cache", "nearby_cache")
+    )
+
+def fetch_previous_row(campsite_id):
+    """
+    Returns the owner, position and visibility of a campsite before an
+    update, which decide the cached tiles and nearby results to evict and
+    whether the change log needs a tombstone for it. Skipped (None) when
+    no index is active and the change feed is disabled.
+    """
+    if not campsite_indexes_active() and not change_feed_enabled():
+        return None
+
+    row, _, _ = execute_query(
+        "SELECT user_id, latitude, longitude, is_public FROM campsites WHERE campsite_id = %s;",
+        (campsite_id,),
         fetch_one=True,
     )
-    return campsite is not None
+    return row
+
+def written_row(campsite_id, user_id, data):
+    """
+    Returns the stored row of a campsite written from a validated payload.
+    """
+    row = {field: data.get(field) for field in CAMPSITE_FIELDS}
+    row.update(campsite_id=campsite_id, user_id=user_id)
+    return row
+
+def sync_campsite_indexes(campsite_id, user_id, deleted=False, previous=None, row=None):
+    """
+    Writes a campsite change through to the in-process geo engine, the
+    cluster index, the tile cache and the nearby cache once the request
+    transaction commits. Indexes that have not been built in this worker
+    are skipped.
+
+    `row` is the campsite as written (see written_row) and `user_id` its
+    owner. `previous` holds the campsite's latitude, longitude and
+    is_public before the write, so entries at its old position are
+    evicted too.
+    """
+    targets = []
+    engine = get_geo_engine()
+    if engine is not None:
+        targets.append(lambda row: engine.apply(row, owner_id=user_id))
+    clusters = current_app.extensions.get("cluster_index")
+    if clusters is not None:
+        targets.append(clusters.apply)
+    tiles = current_app.extensions.get("tile_cache")
+    if tiles is not None:
+        targets.append(lambda row: evict_tiles(tiles, row))
+    nearby = current_app.extensions.get("nearby_cache")
+    if nearby is not None:
+        targets.append(lambda row: evict_nearby(nearby, row, user_id))
+
+    if not targets:
+        return
+
+    def evict_previous():
+        if previous:
+            if tiles is not None:
+                evict_tiles(tiles, previous)
+            if nearby is not None:
+                evict_nearby(nearby, previous, user_id)
+
+    if deleted:
+        def remove():
+            if engine is not None:
+                engine.remove(campsite_id, owner_id=user_id)
+            if clusters is not None:
+                clusters.remove(campsite_id)
+            evict_previous()
+        on_commit(remove)
+        return
+
+    def apply():
+        for target in targets:
+            target(row)
+        evict_previous()
+    on_commit(apply)
+
+def evict_tiles(tiles, row):
+    """
+    Evicts the cached public tiles containing a campsite, if it is public.
+    """
+    if row["is_public"]:
+        tiles.invalidate_point(float(row["latitude"]), float(row["longitude"]))
+
+def evict_nearby(cache, row, user_id):
+    """
+    Evicts the cached nearby results that could contain a campsite.
+    Private campsites only appear in their owner's results.
+    """
+    cache.invalidate_point(
+        row["latitude"], row["longitude"], None if row["is_public"] else user_id
+    )
+
+def find_nearby(
+    points,
+    user_id,
+    radius_miles=NEARBY_RADIUS_MILES,
+    columns=CAMPSITE_COLUMNS,
+    amenities=0,
+    limit=MAX_NEARBY_RESULTS,
+):
+    """
+    Runs nearby search for each (latitude, longitude) point using the
+    configured GEO_ENGINE. Returns one list of up to `limit` campsites per
+    point, nearest first.
+    `columns` narrows the SQL select list; in-process engines ignore it.
+    Results come from the nearby cache when it is enabled.
+    """
+    cache = get_nearby_cache()
+    if cache is None:
+        return search_nearby(points, user_id, radius_miles, columns, amenities, limit)
+
+    # Hits are trimmed by distance, so cached rows need their coordinates.
+    fields = [field.strip() for field in columns.split(",")]
+    columns = ", ".join(fields + [field for field in ("latitude", "longitude") if field not in fields])
+
+    def load(center_lat, center_lon, reach):
+        return search_nearby(
+            [(center_lat, center_lon)], user_id, reach, columns, amenities, limit
+        )[0]
+
+    return [
+        cache.nearby(latitude, longitude, radius_miles, user_id, load, (columns, amenities), limit)
+        for latitude, longitude in points
+    ]
+
+def search_nearby(points, user_id, radius_miles, columns, amenities, limit):
+    """
+    Runs uncached nearby search for each (latitude, longitude) point.
+    """
+    engine = get_geo_engine()
+    if engine is not None:
+        return engine.nearby_many(points, radius_miles, user_id, amenities, limit)
+
+    results = []
+    for latitude, longitude in points:
+        query, params = build_nearby_query(
+            latitude, longitude, user_id, radius_miles, columns, amenities, limit
+        )
+        campsites, _, _ = execute_query(query, params, fetch_all=True)
+        results.append(campsites)
+    return results
+
+def find_in_viewport(viewport, user_id, limit, columns=CAMPSITE_COLUMNS, amenities=0):
+    """
+    Returns up to `limit` campsites inside a (min_lat, min_lon, max_lat,
+    max_lon) viewport using the configured GEO_ENGINE.
+    `columns` narrows the SQL select list; in-process engines ignore it.
+    """
+    engine = get_geo_engine()
+    if engine is not None:
+        return engine.in_bbox(*viewport, user_id, limit, amenities)
+
+    query, params = build_viewport_query(*viewport, user_id, limit, columns, amenities)
+    campsites, _, _ = execute_query(query, params, fetch_all=True)
+    return campsites
+
+def find_clusters(viewport, zoom, user_id):
+    """
+    Returns marker clusters for a viewport at a map zoom level, combining
+    the precomputed public clusters with the user's private campsites.
+    Returns None when the viewport holds few enough campsites to send
+    raw points instead.
+    """
+    cells = get_cluster_index().cells_in(*viewport, zoom)
+
+    min_lat, min_lon, max_lat, max_lon = viewport
+    lon_ranges = longitude_ranges(min_lon, max_lon)
+    lon_clause = " OR ".join(["longitude BETWEEN %s AND %s"] * len(lon_ranges))
+    private, _, _ = execute_query(
+        f"""
+        SELECT campsite_id, latitude, longitude
+        FROM campsites
+        WHERE user_id = %s
+          AND is_public = FALSE
+          AND latitude BETWEEN %s AND %s
+          AND ({lon_clause});
+        """,
+        (user_id, min_lat, max_lat, *[bound for lon_range in lon_ranges for bound in lon_range]),
+        fetch_all=True,
+    )
+
+    overlay = aggregate_points(
+        ((row["campsite_id"], float(row["latitude"]), float(row["longitude"])) for row in private),
+        cluster_level(zoom),
+    )
+    for key, aggregate in overlay.items():
+        if key in cells:
+            merge_aggregate(cells[key], aggregate)
+        else:
+            cells[key] = aggregate
+
+    if sum(aggregate[COUNT] for aggregate in cells.values()) <= CLUSTER_THRESHOLD:
+        return None
+
+    return [to_cluster(aggregate) for aggregate in cells.values()]
+
+def encode_points(rows):
+    """
+    Encodes campsite points as parallel arrays (compact tile encoding).
+    """
+    return {
+        "type": "points",
+        "ids": [row["campsite_id"] for row in rows],
+        "lat": [round(float(row["latitude"]), 6) for row in rows],
+        "lon": [round(float(row["longitude"]), 6) for row in rows],
+        "names": [row["campsite_name"] for row in rows],
+    }
+
+def build_tile(z, x, y):
+    """
+    Builds the public content of map tile z/x/y.
+    Returns clusters while the tile holds more than CLUSTER_THRESHOLD public
+    campsites at a clustered zoom, and points otherwise.
+
+    Returns:
+    - body: compact JSON bytes
+    - etag: strong ETag derived from the body
+    """
+    payload = None
+    if z <= MAX_CLUSTER_ZOOM:
+        cells = get_cluster_index().cells_in_tile(z, x, y)
+        if sum(aggregate[COUNT] for aggregate in cells.values()) > CLUSTER_THRESHOLD:
+            clusters = [to_cluster(cells[key]) for key in sorted(cells)]
+            payload = {
+                "type": "clusters",
+                "count": [cluster["count"] for cluster in clusters],
+                "lat": [round(cluster["latitude"], 6) for cluster in clusters],
+                "lon": [round(cluster["longitude"], 6) for cluster in clusters],
+            }
+
+    if payload is None:
+        min_lat, min_lon, max_lat, max_lon = tile_bounds(z, x, y)
+        rows, _, _ = execute_query(
+            """
+            SELECT campsite_id, campsite_name, latitude, longitude
+            FROM campsites
+            WHERE latitude > %s AND latitude <= %s
+              AND longitude >= %s AND longitude < %s
+              AND is_public = TRUE
+            ORDER BY campsite_id;
+            """,
+            (min_lat, max_lat, min_lon, max_lon),
+            fetch_all=True,
+        )
+        payload = encode_points(rows)
+
+    payload.update({"z": z, "x": x, "y": y})
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return body, hashlib.sha1(body).hexdigest()
 
 # ------------------------
 # Routes
 # ------------------------
 
 @campsites_bp.route("/campsites", methods=["GET"])
+@conditional_route(campsite_list_version)
 def list_campsites():
     """
-    Retrieves all campsites visible to the current user within 50 miles or all campsites if coordinates not provided.
-    Uses the Haversine formula for calculating distance
+    Retrieves the campsites visible to the current user within 50 miles (nearest first, up to `limit`,
+    at most MAX_NEARBY_RESULTS), or pages through all visible campsites
+    (ordered by campsite_id, with limit and after=<last campsite_id>) if coordinates are not provided.
+    With bbox=minLat,minLon,maxLat,maxLon, returns up to `limit` campsites inside that map viewport instead.
+    Adding zoom=<map zoom> returns marker clusters (count, centroid, bbox) while the viewport
+    holds more than CLUSTER_THRESHOLD campsites, and raw campsites otherwise.
+    fields=<name>[,<name>...] or a FIELD_SETS name (e.g. fields=map) narrows the
+    campsite fields selected and returned; campsite_id is always included.
+    amenities=water,electric,pets (see AMENITIES) keeps only campsites having all
+    of the listed amenities. Filtered viewports are never clustered.
+    format=ndjson or format=geojson streams every visible campsite (optionally
+    within bbox) instead, unpaginated, with flat memory use.
+    Lists are sent as JSON, msgpack or columns depending on Accept (see app.http.wire).
+    Uses an indexed bounding-box prefilter, then the Haversine formula for exact distance
+    (or an in-process engine when GEO_ENGINE is "grid" or "numpy")
     Includes:
     - Public campsites
     - Private campsites owned by the user
     """
     user_id = g.user_id
 
+    projection = None
+    if "fields" in request.args:
+        projection = parse_fields(request.args["fields"])
+        if projection is None:
+            return error_response("Unknown field in fields", 400)
+    columns = projection.columns if projection else CAMPSITE_COLUMNS
+
+    amenities = parse_amenities(request.args.get("amenities", ""))
+    if amenities is None:
+        return error_response("Unknown amenity in amenities", 400)
+
+    if "format" in request.args:
+        fmt = request.args["format"]
+        if fmt not in EXPORT_FORMATS:
+            return error_response("format must be ndjson or geojson", 400)
+        viewport = None
+        if "bbox" in request.args:
+            viewport = parse_bbox(request.args["bbox"])
+            if viewport is None:
+                return error_response("bbox must be minLat,minLon,maxLat,maxLon", 400)
+        return stream_campsites(fmt, user_id, projection, amenities, viewport)
+
+    if "bbox" in request.args:
+        viewport = parse_bbox(request.args["bbox"])
+        if viewport is None:
+            return error_response("bbox must be minLat,minLon,maxLat,maxLon", 400)
+
+        limit = request.args.get("limit", MAX_VIEWPORT_RESULTS, type=int)
+        if limit < 1:
+            return error_response("limit must be a positive integer", 400)
+
+        if "zoom" in request.args:
+            zoom = request.args.get("zoom", type=int)
+            if zoom is None or zoom < 0:
+                return error_response("zoom must be a non-negative integer", 400)
+
+            if zoom <= MAX_CLUSTER_ZOOM and not amenities:
+                clusters = find_clusters(viewport, zoom, user_id)
+                if clusters is not None:
+                    return send(clusters)
+
+        campsites = find_in_viewport(
+            viewport, user_id, min(limit, MAX_VIEWPORT_RESULTS), columns, amenities
+        )
+        return send(project(campsites, projection))
+
     latitude = request.args.get("latitude", type=float)
     longitude = request.args.get("longitude", type=float)
     
     if latitude is not None and longitude is not None:
-        campsites, _, _ = execute_query(
-        """
-        SELECT
-            campsite_id,
-            campsite_name,
-            user_id,
-            latitude,
-            longitude,
-            campsite_type,
-            campsite_identifier,
-            is_public,
-            dump_available,
-            electric_hookup_available,
-            water_available,
-            restroom_available,
-            shower_available,
-            pets_allowed,
-            wifi_available,
-            cell_carrier,
-            cell_quality,
-            nearby_recreation,
-            (
-                3959 * ACOS(LEAST(1,
-                    COS(RADIANS(%s)) *
-                    COS(RADIANS(latitude)) *
-                    COS(RADIANS(longitude) - RADIANS(%s)) +
-                    SIN(RADIANS(%s)) *
-                    SIN(RADIANS(latitude))
-                ))
-            ) AS distance
-        FROM campsites
-        WHERE (is_public = TRUE OR user_id = %s)
-        HAVING distance <= 50
-        ORDER BY distance ASC;
-        """,
-        (latitude, longitude, latitude, user_id),
-        fetch_all=True,
-            )
+        limit = request.args.get("limit", MAX_NEARBY_RESULTS, type=int)
+        if limit < 1:
+            return error_response("limit must be a positive integer", 400)
+
+        campsites = find_nearby(
+            [(latitude, longitude)], user_id, columns=columns, amenities=amenities,
+            limit=min(limit, MAX_NEARBY_RESULTS),
+        )[0]
 
-        return jsonify(campsites)
+        return send(project(campsites, projection))
     
     else:
+        page = parse_page_args(request.args)
+        if page is None:
+            return error_response("Invalid limit or after", 400)
+        limit, after = page
+        amenity_clause, amenity_params = build_amenity_clause(amenities)
+
         campsites, _, _ = execute_query(
-            """
-            SELECT
-                campsite_id,
-                campsite_name,
-                user_id,
-                latitude,
-                longitude,
-                campsite_type,
-                campsite_identifier,
-                is_public,
-                dump_available,
-                electric_hookup_available,
-                water_available,
-                restroom_available,
-                shower_available,
-                pets_allowed,
-                wifi_available,
-                cell_carrier,
-                cell_quality,
-                nearby_recreation
+            f"""
+            SELECT {columns}
             FROM campsites
-            WHERE is_public = TRUE
-            OR user_id = %s;
+            WHERE (is_public = TRUE OR user_id = %s)
+              AND campsite_id > %s
+              {amenity_clause}
+            ORDER BY campsite_id
+            LIMIT %s;
             """,
-            (user_id,),
+            (user_id, after, *amenity_params, limit + 1),
             fetch_all=True,
         )
 
-        return jsonify(campsites)    
+        return page_response(project(campsites, projection), limit, "campsite_id")
+
+@campsites_bp.route("/campsites/nearby", methods=["POST"])
+def batch_nearby_campsites():
+    """
+    Runs nearby search for a batch of query points in one request.
+    Expects {"points": [{"latitude": ..., "longitude": ...}, ...]}.
+    Returns one list of up to MAX_NEARBY_RESULTS campsites per point, in
+    request order.
+    Accepts the same fields= and amenities= parameters as list_campsites.
+    """
+    user_id = g.user_id
+    data = request.get_json(silent=True)
+
+    projection = None
+    if "fields" in request.args:
+        projection = parse_fields(request.args["fields"])
+        if projection is None:
+            return error_response("Unknown field in fields", 400)
+
+    amenities = parse_amenities(request.args.get("amenities", ""))
+    if amenities is None:
+        return error_response("Unknown amenity in amenities", 400)
+
+    if not data or not isinstance(data.get("points"), list) or not data["points"]:
+        return error_response("Missing required fields", 400)
+
+    if len(data["points"]) > MAX_NEARBY_POINTS:
+        return error_response(f"At most {MAX_NEARBY_POINTS} points per request", 400)
+
+    try:
+        points = [
+            (float(point["latitude"]), float(point["longitude"]))
+            for point in data["points"]
+        ]
+    except (TypeError, KeyError, ValueError):
+        return error_response("Each point requires numeric latitude and longitude", 400)
+
+    columns = projection.columns if projection else CAMPSITE_COLUMNS
+    results = find_nearby(points, user_id, columns=columns, amenities=amenities)
+    return jsonify([project(campsites, projection) for campsites in results])
+
+@campsites_bp.route("/campsites/changes", methods=["GET"])
+def list_campsite_changes():
+    """
+    Retrieves the campsites changed since a sync token, for clients that
+    keep their own copy of the campsites they can see.
+
+    Parameters (query string):
+    - since: `next` of the previous sync (0 or absent for a full snapshot)
+    - limit: changed campsites per page (default 100, max 500)
+    - fields: as for list_campsites
+
+    Returns:
+    - {"upserts": [campsites], "deleted": [campsite_ids], "next": token,
+      "has_more": bool}; deleted also lists campsites that are no longer
+      visible. Call again with since=next while has_more is true.
+    - 410 when the token predates log compaction; resync with since=0
+    """
+    if not change_feed_enabled():
+        return error_response("Change feed is not enabled", 404)
+    user_id = g.user_id
+
+    projection = None
+    if "fields" in request.args:
+        projection = parse_fields(request.args["fields"])
+        if projection is None:
+            return error_response("Unknown field in fields", 400)
+    columns = projection.columns if projection else CAMPSITE_COLUMNS
+
+    try:
+        since = int(request.args.get("since", 0))
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return error_response("Invalid since or limit", 400)
+    if since < 0 or limit < 1:
+        return error_response("Invalid since or limit", 400)
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    if since and since < compacted_through():
+        return error_response("Sync token expired; resync with since=0", 410)
+
+    changes, next_token, has_more = read_changes(since, user_id, limit)
+    campsite_ids = [change["campsite_id"] for change in changes]
+
+    campsites = []
+    if campsite_ids:
+        campsites, _, _ = execute_query(
+            f"""
+            SELECT {columns}
+            FROM campsites
+            WHERE campsite_id IN ({", ".join(["%s"] * len(campsite_ids))})
+              AND (is_public = TRUE OR user_id = %s)
+            ORDER BY campsite_id;
+            """,
+            (*campsite_ids, user_id),
+            fetch_all=True,
+        )
+    visible = {campsite["campsite_id"] for campsite in campsites}
+
+    return send({
+        "upserts": project(campsites, projection),
+        "deleted": [campsite_id for campsite_id in campsite_ids if campsite_id not in visible],
+        "next": str(next_token),
+        "has_more": has_more,
+    })
+
+@campsites_bp.route("/campsites/tiles/<int:z>/<int:x>/<int:y>", methods=["GET"])
+def get_campsite_tile(z, x, y):
+    """
+    Retrieves the public campsites (or clusters) in slippy-map tile z/x/y.
+    Tiles contain no per-user data, so they carry a strong ETag and a
+    public Cache-Control that lets proxies share them across users.
+    Compressed tiles are cached by ETag, so each is compressed once.
+    """
+    if not is_valid_tile(z, x, y, MAX_TILE_ZOOM):
+        return error_response("Tile not found", 404)
+
+    cache = get_tile_cache()
+    cached = cache.get(z, x, y)
+    if cached is None:
+        cached = build_tile(z, x, y)
+        cache.put(z, x, y, *cached)
+    body, etag = cached
+
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["TILE_MAX_AGE_SECONDS"]
+    precompress(response, etag, get_cache().namespace("compressed"))
+    return response.make_conditional(request)
+
+@campsites_bp.route("/campsites/private", methods=["GET"])
+def list_private_campsites():
+    """
+    Retrieves the current user's private campsites in the compact tile
+    encoding. Clients overlay these on the shared public tiles.
+    Accepts an optional bbox=minLat,minLon,maxLat,maxLon filter.
+    """
+    user_id = g.user_id
+
+    query = """
+        SELECT campsite_id, campsite_name, latitude, longitude
+        FROM campsites
+        WHERE user_id = %s
+          AND is_public = FALSE
+        """
+    params = [user_id]
+
+    if "bbox" in request.args:
+        viewport = parse_bbox(request.args["bbox"])
+        if viewport is None:
+            return error_response("bbox must be minLat,minLon,maxLat,maxLon", 400)
+        min_lat, min_lon, max_lat, max_lon = viewport
+        lon_ranges = longitude_ranges(min_lon, max_lon)
+        query += " AND latitude BETWEEN %s AND %s AND ({})".format(
+            " OR ".join(["longitude BETWEEN %s AND %s"] * len(lon_ranges))
+        )
+        params += [min_lat, max_lat, *[bound for lon_range in lon_ranges for bound in lon_range]]
+
+    rows, _, _ = execute_query(query + " ORDER BY campsite_id;", tuple(params), fetch_all=True)
+
+    response = jsonify(encode_points(rows))
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 @campsites_bp.route("/campsites/<int:campsite_id>", methods=["GET"])
+@conditional_route(campsite_version)
 def get_campsite(campsite_id):
     """
     Retrieves a single campsite if accessible to the user.
+    Served from the entity cache when ENTITY_CACHE is enabled.
     """
     user_id = g.user_id
 
+    if entity_cache_enabled():
+        campsite = load_campsite(campsite_id)
+        if not can_view(campsite, user_id):
+            return error_response("Campsite not found", 404)
+        return jsonify(campsite)
+
     campsite, _, _ = execute_query(
         """
         SELECT
@@ -287,12 +1157,18 @@ def create_campsite():
         ),
     )
 
+    bump_versions(*campsite_scopes(user_id))
+    log_upserts(campsite_id)
+    sync_campsite_indexes(campsite_id, user_id, row=written_row(campsite_id, user_id, data))
+
     return jsonify({"campsite_id": campsite_id}), 201
 
 @campsites_bp.route("/campsites/<int:campsite_id>", methods=["PUT"])
 def update_campsite(campsite_id):
     """
     Updates an existing campsite if the user has access.
+    Access is enforced by the UPDATE itself; the campsite is only looked up
+    again when no row matched, to tell 404 from 403.
     """
     user_id = g.user_id
     data = request.get_json()
@@ -300,10 +1176,9 @@ def update_campsite(campsite_id):
     if not validate_campsite_payload(data):
         return error_response("Missing required fields", 400)
 
-    if not has_access(campsite_id, user_id):
-        return error_response("Not authorized", 403)
+    previous = fetch_previous_row(campsite_id)
 
-    execute_query(
+    _, rowcount, _ = execute_query(
         """
         UPDATE campsites
         SET campsite_name = %s,
@@ -322,7 +1197,8 @@ def update_campsite(campsite_id):
             cell_carrier = %s,
             cell_quality = %s,
             nearby_recreation = %s
-        WHERE campsite_id = %s;
+        WHERE campsite_id = %s
+          AND (is_public = TRUE OR user_id = %s);
         """,
         (
             data["campsite_name"],
@@ -342,9 +1218,25 @@ def update_campsite(campsite_id):
             data.get("cell_quality"),
             data.get("nearby_recreation"),
             campsite_id,
+            user_id,
         ),
     )
 
+    if rowcount == 0:
+        if campsite_exists(campsite_id):
+            return error_response("Not authorized", 403)
+        return error_response("Campsite not found", 404)
+
+    invalidate_entity("campsite", campsite_id)
+    bump_versions(*campsite_scopes(user_id))
+    log_upserts(campsite_id, was_public=previous and previous["is_public"])
+    if previous:
+        owner_id = previous["user_id"]
+        sync_campsite_indexes(
+            campsite_id, owner_id, previous=previous,
+            row=written_row(campsite_id, owner_id, data),
+        )
+
     return jsonify({"message": "Campsite updated"})
 
 @campsites_bp.route("/campsites/<int:campsite_id>", methods=["DELETE"])
@@ -357,7 +1249,7 @@ def delete_campsite(campsite_id):
 
     campsite, _, _ = execute_query(
         """
-        SELECT campsite_id
+        SELECT campsite_id, latitude, longitude, is_public
         FROM campsites
         WHERE campsite_id = %s
           AND user_id = %s;
@@ -374,6 +1266,11 @@ def delete_campsite(campsite_id):
         (campsite_id,),
     )
 
+    invalidate_entity("campsite", campsite_id)
+    bump_versions(*campsite_scopes(user_id))
+    log_delete(campsite, user_id)
+    sync_campsite_indexes(campsite_id, user_id, deleted=True, previous=campsite)
+
     return jsonify({"message": "Campsite deleted"})
 
 
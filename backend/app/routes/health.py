@@ -1,8 +1,23 @@
 # basic app health check
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify
+from app.db.connection import pool_stats
 
 health_bp = Blueprint("health", __name__)
 
 @health_bp.route("/health", methods=["GET"])
 def health():
     return jsonify({"status": "ok"})
+
+# connection pool counters for monitoring
+@health_bp.route("/health/db-pool", methods=["GET"])
+def db_pool():
+    return jsonify(pool_stats())
+
+# hit/miss/eviction counters of this worker's in-process caches and indexes
+@health_bp.route("/health/caches", methods=["GET"])
+def caches():
+    return jsonify({
+        name: extension.stats()
+        for name, extension in current_app.extensions.items()
+        if name in ("geo_engine", "tile_cache", "nearby_cache", "cache")
+    })
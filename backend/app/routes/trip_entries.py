@@ -6,11 +6,20 @@ Interacts with the OSU MySQL database.
 """
 
 from flask import Blueprint, jsonify, g, request
-from app.db.connection import get_db_connection
+from app.cache.entities import entity_cache_enabled
+from app.cache.etags import conditional_route
+from app.cache.route_cache import cached_route, invalidate_route
+from app.db.pagination import page_response, parse_page_args
+from app.db.query import execute_many, execute_query
+from app.db.versions import bump_versions, campsite_scopes, entry_scopes, read_versions
+from app.routes.trips import load_trip
 from datetime import datetime
 
 trip_entries_bp = Blueprint("trip_entries", __name__)
 
+# Maximum number of creates + updates + deletes in one batch request.
+MAX_BATCH_SIZE = 500
+
 
 # ------------------------
 # Helpers
@@ -23,38 +32,16 @@ def error_response(message, status_code):
     return jsonify({"error": message}), status_code
 
 
-def execute_query(query, params=None, fetch_one=False, fetch_all=False):
-    """
-    Executes a database query with optional fetch behavior.
-    Handles connection management and returns:
-        result, rowcount, lastrowid
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute(query, params or ())
-
-    result = None
-    if fetch_one:
-        result = cursor.fetchone()
-    elif fetch_all:
-        result = cursor.fetchall()
-
-    conn.commit()
-    rowcount = cursor.rowcount
-    lastrowid = cursor.lastrowid
-
-    cursor.close()
-    conn.close()
-
-    return result, rowcount, lastrowid
-
-
 def user_owns_trip(trip_id, user_id):
     """
     Verifies that the specified trip belongs to the current user.
     Prevents unauthorized trip access.
+    Consults the entity cache when ENTITY_CACHE is enabled.
     """
+    if entity_cache_enabled():
+        trip = load_trip(trip_id)
+        return trip is not None and trip["user_id"] == user_id
+
     trip, _, _ = execute_query(
         """
         SELECT trip_id
@@ -95,18 +82,87 @@ def validate_dates(begin_date, end_date):
     return True, None
 
 
+def parse_entry_batch(data):
+    """
+    Validates a batch of trip entry changes in one pass.
+
+    Parameters:
+    - data: {"create": [entry], "update": [entry with trip_entry_id],
+      "delete": [trip_entry_id]}; every key is optional
+
+    Returns:
+    - (creates, updates, deletes, None) on success
+    - (None, None, None, error message) if any item is invalid
+    """
+    if not isinstance(data, dict):
+        return None, None, None, "Missing required fields"
+
+    creates = data.get("create") or []
+    updates = data.get("update") or []
+    deletes = data.get("delete") or []
+    if not all(isinstance(items, list) for items in (creates, updates, deletes)):
+        return None, None, None, "create, update and delete must be lists"
+
+    if len(creates) + len(updates) + len(deletes) > MAX_BATCH_SIZE:
+        return None, None, None, f"Batch exceeds {MAX_BATCH_SIZE} changes"
+
+    for index, entry in enumerate(creates):
+        if not isinstance(entry, dict) or not validate_trip_entry_payload(entry):
+            return None, None, None, f"create[{index}]: Missing required fields"
+        valid, message = validate_dates(entry["begin_date"], entry["end_date"])
+        if not valid:
+            return None, None, None, f"create[{index}]: {message}"
+
+    for index, entry in enumerate(updates):
+        if not isinstance(entry, dict) or not all(
+            field in entry for field in ("trip_entry_id", "begin_date", "end_date")
+        ):
+            return None, None, None, f"update[{index}]: Missing required fields"
+        if not isinstance(entry["trip_entry_id"], int):
+            return None, None, None, f"update[{index}]: Invalid trip_entry_id"
+        valid, message = validate_dates(entry["begin_date"], entry["end_date"])
+        if not valid:
+            return None, None, None, f"update[{index}]: {message}"
+
+    if not all(isinstance(trip_entry_id, int) for trip_entry_id in deletes):
+        return None, None, None, "delete: Invalid trip_entry_id"
+
+    touched = [entry["trip_entry_id"] for entry in updates] + deletes
+    if len(set(touched)) != len(touched):
+        return None, None, None, "A trip entry appears more than once"
+
+    return creates, updates, deletes, None
+
+
+def entry_list_version(user_id, trip_id):
+    """
+    Version token of a trip's entry list, which also shows campsite names.
+    """
+    return read_versions(entry_scopes(trip_id) + campsite_scopes(user_id))
+
+
 # ------------------------
 # Routes
 # ------------------------
 
 @trip_entries_bp.route("/trips/<int:trip_id>/entries", methods=["GET"])
+@conditional_route(entry_list_version)
+@cached_route()
 def list_trip_entries(trip_id):
     """
-    Retrieves all campsite entries associated with a specific trip.
+    Retrieves the campsite entries of a specific trip one page at a time,
+    ordered by trip_entry_id. Accepts limit and after=<last trip_entry_id>.
     Only accessible to the trip owner.
+    Cached per user when "trip_entries.list_trip_entries" is in CACHE_ROUTES
+    (campsite renames show up once the entry expires).
     """
     user_id = g.user_id
 
+    page = parse_page_args(request.args)
+    if page is None:
+        return error_response("Invalid limit or after", 400)
+    limit, after = page
+
     if not user_owns_trip(trip_id, user_id):
         return error_response("Not authorized", 403)
 
@@ -121,20 +177,24 @@ def list_trip_entries(trip_id):
             c.campsite_name
         FROM trip_entries te
         JOIN campsites c ON te.campsite_id = c.campsite_id
-        WHERE te.trip_id = %s;
+        WHERE te.trip_id = %s
+          AND te.trip_entry_id > %s
+        ORDER BY te.trip_entry_id
+        LIMIT %s;
         """,
-        (trip_id,),
+        (trip_id, after, limit + 1),
         fetch_all=True,
     )
 
-    return jsonify(entries)
+    return page_response(entries, limit, "trip_entry_id")
 
 
 @trip_entries_bp.route("/trips/<int:trip_id>/entries", methods=["POST"])
 def add_trip_entry(trip_id):
     """
     Adds a campsite to a trip with associated date range and optional notes.
-    Only the trip owner may add entries.
+    Only the trip owner may add entries; ownership is enforced by the
+    INSERT ... SELECT, which inserts nothing for other users' trips.
     """
     user_id = g.user_id
     data = request.get_json()
@@ -146,10 +206,7 @@ def add_trip_entry(trip_id):
     if not valid:
         return error_response(message, 400)
 
-    if not user_owns_trip(trip_id, user_id):
-        return error_response("Not authorized", 403)
-
-    _, _, trip_entry_id = execute_query(
+    _, rowcount, trip_entry_id = execute_query(
         """
         INSERT INTO trip_entries (
             trip_id,
@@ -158,17 +215,27 @@ def add_trip_entry(trip_id):
             end_date,
             notes
         )
-        VALUES (%s, %s, %s, %s, %s);
+        SELECT trip_id, %s, %s, %s, %s
+        FROM trips
+        WHERE trip_id = %s
+          AND user_id = %s;
         """,
         (
-            trip_id,
             data["campsite_id"],
             data["begin_date"],
             data["end_date"],
             data.get("notes"),
+            trip_id,
+            user_id,
         ),
     )
 
+    if rowcount == 0:
+        return error_response("Not authorized", 403)
+
+    bump_versions(*entry_scopes(trip_id))
+    invalidate_route("trip_entries.list_trip_entries", user_id, trip_id=trip_id)
+
     return jsonify({"trip_entry_id": trip_entry_id}), 201
 
 
@@ -179,7 +246,8 @@ def add_trip_entry(trip_id):
 def update_trip_entry(trip_id, trip_entry_id):
     """
     Updates the date range and/or notes for a specific trip entry.
-    Only accessible to the trip owner.
+    Only accessible to the trip owner; ownership is enforced by joining
+    trips in the UPDATE and only checked separately when no row matched.
     """
     user_id = g.user_id
     data = request.get_json()
@@ -195,17 +263,16 @@ def update_trip_entry(trip_id, trip_entry_id):
     if not valid:
         return error_response(message, 400)
 
-    if not user_owns_trip(trip_id, user_id):
-        return error_response("Not authorized", 403)
-
     _, rowcount, _ = execute_query(
         """
-        UPDATE trip_entries
-        SET begin_date = %s,
-            end_date = %s,
-            notes = %s
-        WHERE trip_entry_id = %s
-          AND trip_id = %s;
+        UPDATE trip_entries te
+        JOIN trips t ON t.trip_id = te.trip_id
+        SET te.begin_date = %s,
+            te.end_date = %s,
+            te.notes = %s
+        WHERE te.trip_entry_id = %s
+          AND te.trip_id = %s
+          AND t.user_id = %s;
         """,
         (
             data["begin_date"],
@@ -213,12 +280,18 @@ def update_trip_entry(trip_id, trip_entry_id):
             data.get("notes"),
             trip_entry_id,
             trip_id,
+            user_id,
         ),
     )
 
     if rowcount == 0:
+        if not user_owns_trip(trip_id, user_id):
+            return error_response("Not authorized", 403)
         return error_response("Trip entry not found", 404)
 
+    bump_versions(*entry_scopes(trip_id))
+    invalidate_route("trip_entries.list_trip_entries", user_id, trip_id=trip_id)
+
     return jsonify({"message": "Trip entry updated"})
 
 
@@ -229,23 +302,125 @@ def update_trip_entry(trip_id, trip_entry_id):
 def delete_trip_entry(trip_id, trip_entry_id):
     """
     Removes a campsite entry from a trip.
-    Only the trip owner may delete entries.
+    Only the trip owner may delete entries; ownership is enforced by joining
+    trips in the DELETE and only checked separately when no row matched.
     """
     user_id = g.user_id
 
-    if not user_owns_trip(trip_id, user_id):
-        return error_response("Not authorized", 403)
-
     _, rowcount, _ = execute_query(
         """
-        DELETE FROM trip_entries
-        WHERE trip_entry_id = %s
-          AND trip_id = %s;
+        DELETE te
+        FROM trip_entries te
+        JOIN trips t ON t.trip_id = te.trip_id
+        WHERE te.trip_entry_id = %s
+          AND te.trip_id = %s
+          AND t.user_id = %s;
         """,
-        (trip_entry_id, trip_id),
+        (trip_entry_id, trip_id, user_id),
     )
 
     if rowcount == 0:
+        if not user_owns_trip(trip_id, user_id):
+            return error_response("Not authorized", 403)
         return error_response("Trip entry not found", 404)
 
+    bump_versions(*entry_scopes(trip_id))
+    invalidate_route("trip_entries.list_trip_entries", user_id, trip_id=trip_id)
+
     return jsonify({"message": "Trip entry removed"})
+
+
+@trip_entries_bp.route("/trips/<int:trip_id>/entries:batch", methods=["PUT"])
+def batch_trip_entries(trip_id):
+    """
+    Applies creates, updates and deletes of a trip's entries in one request.
+    Only accessible to the trip owner.
+
+    Every item is validated before anything is written, ownership is checked
+    once, deletes are one DELETE ... IN and updates are one executemany
+    call. Creates are inserted one row at a time, so each reports the ID
+    MySQL assigned it (the IDs of a multi-row INSERT need not be
+    consecutive). All statements run in the request transaction, so the
+    batch is applied completely or not at all.
+
+    Returns:
+    - {"created": [trip_entry_id], "updated": n, "deleted": n}
+    """
+    user_id = g.user_id
+
+    creates, updates, deletes, message = parse_entry_batch(request.get_json(silent=True))
+    if message:
+        return error_response(message, 400)
+
+    if not user_owns_trip(trip_id, user_id):
+        return error_response("Not authorized", 403)
+
+    if deletes:
+        placeholders = ", ".join(["%s"] * len(deletes))
+        _, rowcount, _ = execute_query(
+            f"""
+            DELETE FROM trip_entries
+            WHERE trip_id = %s
+              AND trip_entry_id IN ({placeholders});
+            """,
+            (trip_id, *deletes),
+        )
+        if rowcount != len(deletes):
+            return error_response("Trip entry not found", 404)
+
+    if updates:
+        rowcount, _ = execute_many(
+            """
+            UPDATE trip_entries
+            SET begin_date = %s,
+                end_date = %s,
+                notes = %s
+            WHERE trip_entry_id = %s
+              AND trip_id = %s;
+            """,
+            [
+                (
+                    entry["begin_date"],
+                    entry["end_date"],
+                    entry.get("notes"),
+                    entry["trip_entry_id"],
+                    trip_id,
+                )
+                for entry in updates
+            ],
+        )
+        if rowcount != len(updates):
+            return error_response("Trip entry not found", 404)
+
+    created = []
+    for entry in creates:
+        _, _, trip_entry_id = execute_query(
+            """
+            INSERT INTO trip_entries (
+                trip_id,
+                campsite_id,
+                begin_date,
+                end_date,
+                notes
+            )
+            VALUES (%s, %s, %s, %s, %s);
+            """,
+            (
+                trip_id,
+                entry["campsite_id"],
+                entry["begin_date"],
+                entry["end_date"],
+                entry.get("notes"),
+            ),
+        )
+        created.append(trip_entry_id)
+
+    if creates or updates or deletes:
+        bump_versions(*entry_scopes(trip_id))
+        invalidate_route("trip_entries.list_trip_entries", user_id, trip_id=trip_id)
+
+    return jsonify({
+        "created": created,
+        "updated": len(updates),
+        "deleted": len(deletes),
+    })
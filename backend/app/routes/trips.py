@@ -5,7 +5,28 @@ Interacts with the OSU MySQL database.
 """
 
 from flask import Blueprint, jsonify, g, request
-from app.db.connection import get_db_connection
+from app.cache.entities import entity_cache_enabled, get_entity, invalidate_entity
+from app.cache.etags import conditional_route
+from app.cache.route_cache import cached_route, invalidate_route
+from app.db.pagination import page_response, parse_page_args
+from app.db.query import execute_query
+from app.db.versions import (
+    bump_versions,
+    campsite_scopes,
+    entry_scopes,
+    read_versions,
+    trip_scopes,
+)
+from app.http.wire import send
+from app.routes.campsites import FIELD_SETS, can_view
+
+# Related data get_trip can embed with include=<name>[,<name>...].
+TRIP_INCLUDES = ("entries", "campsites")
+
+ENTRY_FIELDS = ("trip_entry_id", "campsite_id", "begin_date", "end_date", "notes", "campsite_name")
+
+# Campsite fields embedded by include=campsites (the map field set).
+CAMPSITE_SUMMARY_FIELDS = FIELD_SETS["map"]
 
 trips_bp = Blueprint("trips", __name__)
 
@@ -21,43 +42,137 @@ def error_response(message, status_code):
     return jsonify({"error": message}), status_code
 
 
-def execute_query(query, params=None, fetch_one=False, fetch_all=False):
+def validate_trip_payload(data):
+    """
+    Validates required fields for creating or updating a trip.
+    """
+    if not data or "trip_name" not in data:
+        return False
+    return True
+
+
+def load_trip(trip_id):
+    """
+    Returns a trip row (including its owner's user_id) by ID through the
+    entity cache, or None.
+    """
+    def load():
+        trip, _, _ = execute_query(
+            """
+            SELECT trip_id, user_id, trip_name, date_created
+            FROM trips
+            WHERE trip_id = %s;
+            """,
+            (trip_id,),
+            fetch_one=True,
+        )
+        return trip
+
+    return get_entity("trip", trip_id, load)
+
+
+def parse_include(value):
+    """
+    Parses an include= parameter into a set of TRIP_INCLUDES names.
+    Returns None if any name is unknown.
+    """
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    if not names <= set(TRIP_INCLUDES):
+        return None
+    return names
+
+
+def load_trip_with_includes(trip_id, user_id, include):
     """
-    Executes a database query and optionally fetches one or all results.
+    Loads a trip owned by the user together with its entries and the
+    summaries of the campsites they reference, using one joined query.
+    Returns None if the trip does not exist or belongs to another user.
 
-    Returns:
-        result: fetched row(s) if requested
-        rowcount: number of affected rows
-        lastrowid: ID of last inserted row (if applicable)
+    Entries are ordered by trip_entry_id. Campsites are listed once each,
+    in order of first use, and only if visible to the user.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    rows, _, _ = execute_query(
+        """
+        SELECT
+            t.trip_id,
+            t.trip_name,
+            t.date_created,
+            te.trip_entry_id,
+            te.campsite_id,
+            te.begin_date,
+            te.end_date,
+            te.notes,
+            c.campsite_name,
+            c.latitude,
+            c.longitude,
+            c.is_public,
+            c.user_id
+        FROM trips t
+        LEFT JOIN trip_entries te ON te.trip_id = t.trip_id
+        LEFT JOIN campsites c ON c.campsite_id = te.campsite_id
+        WHERE t.trip_id = %s
+          AND t.user_id = %s
+        ORDER BY te.trip_entry_id;
+        """,
+        (trip_id, user_id),
+        fetch_all=True,
+    )
 
-    cursor.execute(query, params or ())
+    if not rows:
+        return None
 
-    result = None
-    if fetch_one:
-        result = cursor.fetchone()
-    elif fetch_all:
-        result = cursor.fetchall()
+    first = rows[0]
+    trip = {
+        "trip_id": first["trip_id"],
+        "trip_name": first["trip_name"],
+        "date_created": first["date_created"],
+    }
+    # A trip without entries still yields one row, with NULL entry columns.
+    rows = [row for row in rows if row["trip_entry_id"] is not None]
 
-    conn.commit()
-    rowcount = cursor.rowcount
-    lastrowid = cursor.lastrowid
+    if "entries" in include:
+        trip["entries"] = [{field: row[field] for field in ENTRY_FIELDS} for row in rows]
 
-    cursor.close()
-    conn.close()
+    if "campsites" in include:
+        campsites = {}
+        for row in rows:
+            if row["campsite_id"] not in campsites and can_view(row, user_id):
+                campsites[row["campsite_id"]] = {
+                    field: row[field] for field in CAMPSITE_SUMMARY_FIELDS
+                }
+        trip["campsites"] = list(campsites.values())
 
-    return result, rowcount, lastrowid
+    return trip
 
 
-def validate_trip_payload(data):
+def trip_list_version(user_id):
     """
-    Validates required fields for creating or updating a trip.
+    Version token of a user's trip list.
     """
-    if not data or "trip_name" not in data:
-        return False
-    return True
+    return read_versions(trip_scopes(user_id))
+
+
+def trip_version(user_id, trip_id):
+    """
+    Version token of a trip: its updated_at, or with include= the versions
+    of everything embedded. None if the trip does not belong to the user.
+    """
+    if request.args.get("include"):
+        return read_versions(
+            trip_scopes(user_id) + entry_scopes(trip_id) + campsite_scopes(user_id)
+        )
+
+    trip, _, _ = execute_query(
+        """
+        SELECT updated_at
+        FROM trips
+        WHERE trip_id = %s
+          AND user_id = %s;
+        """,
+        (trip_id, user_id),
+        fetch_one=True,
+    )
+    return trip["updated_at"] if trip else None
 
 
 # ------------------------
@@ -65,32 +180,71 @@ def validate_trip_payload(data):
 # ------------------------
 
 @trips_bp.route("/trips", methods=["GET"])
+@conditional_route(trip_list_version)
+@cached_route()
 def list_trips():
     """
-    Retrieves all trips owned by the current user.
+    Retrieves the trips owned by the current user one page at a time,
+    ordered by trip_id. Accepts limit and after=<last trip_id>.
+    Cached per user when "trips.list_trips" is in CACHE_ROUTES.
     """
     user_id = g.user_id
 
+    page = parse_page_args(request.args)
+    if page is None:
+        return error_response("Invalid limit or after", 400)
+    limit, after = page
+
     trips, _, _ = execute_query(
         """
         SELECT trip_id, trip_name, date_created
         FROM trips
-        WHERE user_id = %s;
+        WHERE user_id = %s
+          AND trip_id > %s
+        ORDER BY trip_id
+        LIMIT %s;
         """,
-        (user_id,),
+        (user_id, after, limit + 1),
         fetch_all=True,
     )
 
-    return jsonify(trips)
+    return page_response(trips, limit, "trip_id")
 
 
 @trips_bp.route("/trips/<int:trip_id>", methods=["GET"])
+@conditional_route(trip_version)
 def get_trip(trip_id):
     """
     Retrieves a single trip owned by the current user.
+    Served from the entity cache when ENTITY_CACHE is enabled.
+
+    include=entries,campsites embeds the trip's entries (as returned by
+    list_trip_entries, unpaginated) and summaries of the campsites they
+    reference, loaded together with the trip in one query.
+    Sent as JSON, msgpack or columns depending on Accept (see app.http.wire).
     """
     user_id = g.user_id
 
+    if "include" in request.args:
+        include = parse_include(request.args["include"])
+        if include is None:
+            return error_response("Unknown name in include", 400)
+        if include:
+            trip = load_trip_with_includes(trip_id, user_id, include)
+            if not trip:
+                return error_response("Trip not found", 404)
+            return send(trip)
+
+    if entity_cache_enabled():
+        trip = load_trip(trip_id)
+        if not trip or trip["user_id"] != user_id:
+            return error_response("Trip not found", 404)
+        return send({
+            "trip_id": trip["trip_id"],
+            "trip_name": trip["trip_name"],
+            "date_created": trip["date_created"],
+        })
+
     trip, _, _ = execute_query(
         """
         SELECT trip_id, trip_name, date_created
@@ -105,7 +259,7 @@ def get_trip(trip_id):
     if not trip:
         return error_response("Trip not found", 404)
 
-    return jsonify(trip)
+    return send(trip)
 
 
 @trips_bp.route("/trips", methods=["POST"])
@@ -127,6 +281,9 @@ def create_trip():
         (user_id, data["trip_name"]),
     )
 
+    bump_versions(*trip_scopes(user_id))
+    invalidate_route("trips.list_trips", user_id)
+
     return jsonify({"trip_id": trip_id}), 201
 
 
@@ -134,6 +291,7 @@ def create_trip():
 def update_trip(trip_id):
     """
     Updates the name of a trip owned by the current user.
+    Ownership is enforced by the UPDATE itself.
     """
     user_id = g.user_id
     data = request.get_json()
@@ -141,28 +299,22 @@ def update_trip(trip_id):
     if not validate_trip_payload(data):
         return error_response("Missing required fields", 400)
 
-    trip, _, _ = execute_query(
+    _, rowcount, _ = execute_query(
         """
-        SELECT trip_id
-        FROM trips
+        UPDATE trips
+        SET trip_name = %s
         WHERE trip_id = %s
-        AND user_id = %s;
+          AND user_id = %s;
         """,
-        (trip_id, user_id),
-        fetch_one=True,
+        (data["trip_name"], trip_id, user_id),
     )
 
-    if not trip:
+    if rowcount == 0:
         return error_response("Trip not found", 404)
 
-    execute_query(
-        """
-        UPDATE trips
-        SET trip_name = %s
-        WHERE trip_id = %s;
-        """,
-        (data["trip_name"], trip_id),
-    )
+    invalidate_entity("trip", trip_id)
+    bump_versions(*trip_scopes(user_id))
+    invalidate_route("trips.list_trips", user_id)
 
     return jsonify({"message": "Trip updated"})
 
@@ -186,4 +338,9 @@ def delete_trip(trip_id):
     if rowcount == 0:
         return error_response("Trip not found", 404)
 
+    invalidate_entity("trip", trip_id)
+    bump_versions(*trip_scopes(user_id), *entry_scopes(trip_id))
+    invalidate_route("trips.list_trips", user_id)
+    invalidate_route("trip_entries.list_trip_entries", user_id, trip_id=trip_id)
+
     return jsonify({"message": "Trip deleted"})
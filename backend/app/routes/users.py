@@ -5,7 +5,9 @@ Interacts with the OSU MySQL database.
 """
 
 from flask import Blueprint, request, jsonify
-from app.db.connection import get_db_connection
+from app.cache.entities import get_entity, invalidate_entity
+from app.db.pagination import page_response, parse_page_args
+from app.db.query import execute_query
 
 users_bp = Blueprint("users", __name__)
 
@@ -43,42 +45,6 @@ def validate_user_payload(data, require_password=True):
     return True
 
 
-def execute_query(query, params=None, fetch_one=False, fetch_all=False):
-    """
-    Executes a database query.
-
-    Parameters:
-    - query: SQL query string
-    - params: tuple of parameters
-    - fetch_one: return a single row
-    - fetch_all: return all rows
-
-    Returns:
-    - result (if applicable)
-    - rowcount (number of affected rows)
-    - lastrowid (for INSERT operations)
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute(query, params or ())
-
-    result = None
-    if fetch_one:
-        result = cursor.fetchone()
-    elif fetch_all:
-        result = cursor.fetchall()
-
-    conn.commit()
-    rowcount = cursor.rowcount
-    lastrowid = cursor.lastrowid
-
-    cursor.close()
-    conn.close()
-
-    return result, rowcount, lastrowid
-
-
 # ------------------------
 # Routes
 # ------------------------
@@ -119,16 +85,21 @@ def get_user(user_id):
     """
     Retrieves a single user by ID.
     Does not return password information.
+    Served from the entity cache when ENTITY_CACHE is enabled.
     """
-    user, _, _ = execute_query(
-        """
-        SELECT user_id, email, first_name, last_name, bio
-        FROM users
-        WHERE user_id = %s
-        """,
-        (user_id,),
-        fetch_one=True,
-    )
+    def load():
+        user, _, _ = execute_query(
+            """
+            SELECT user_id, email, first_name, last_name, bio
+            FROM users
+            WHERE user_id = %s
+            """,
+            (user_id,),
+            fetch_one=True,
+        )
+        return user
+
+    user = get_entity("user", user_id, load)
 
     if not user:
         return error_response("User not found", 404)
@@ -168,6 +139,8 @@ def update_user(user_id):
     if rowcount == 0:
         return error_response("User not found", 404)
 
+    invalidate_entity("user", user_id)
+
     return jsonify({"message": "User updated"})
 
 
@@ -184,21 +157,33 @@ def delete_user(user_id):
     if rowcount == 0:
         return error_response("User not found", 404)
 
+    invalidate_entity("user", user_id)
+
     return jsonify({"message": "User deleted"})
 
 
 @users_bp.route("/users", methods=["GET"])
 def list_users():
     """
-    Retrieves all users.
+    Retrieves users one page at a time, ordered by user_id.
+    Accepts limit (capped at MAX_PAGE_SIZE) and after=<last user_id>.
     Does not include password information.
     """
+    page = parse_page_args(request.args)
+    if page is None:
+        return error_response("Invalid limit or after", 400)
+    limit, after = page
+
     users, _, _ = execute_query(
         """
         SELECT user_id, email, first_name, last_name, bio
         FROM users
+        WHERE user_id > %s
+        ORDER BY user_id
+        LIMIT %s
         """,
+        (after, limit + 1),
         fetch_all=True,
     )
 
-    return jsonify(users)
+    return page_response(users, limit, "user_id")
@@ -0,0 +1,16 @@
+-- Bounding-box prefilter for nearby campsite search.
+--
+-- GET /api/campsites?latitude=..&longitude=.. restricts candidates with a
+-- latitude/longitude range on idx_campsites_lat_lon before ranking them by
+-- exact distance. The trig terms of the Haversine formula that depend only
+-- on the stored row are precomputed so the remaining per-row work is a
+-- single COS() of the longitude difference.
+
+ALTER TABLE campsites
+    ADD COLUMN lon_rad DOUBLE
+        GENERATED ALWAYS AS (RADIANS(longitude)) STORED,
+    ADD COLUMN sin_lat DOUBLE
+        GENERATED ALWAYS AS (SIN(RADIANS(latitude))) STORED,
+    ADD COLUMN cos_lat DOUBLE
+        GENERATED ALWAYS AS (COS(RADIANS(latitude))) STORED,
+    ADD INDEX idx_campsites_lat_lon (latitude, longitude);
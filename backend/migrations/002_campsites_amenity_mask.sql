@@ -0,0 +1,17 @@
+-- Packed amenity bitmask for amenity-filtered campsite search.
+--
+-- GET /api/campsites?amenities=water,electric,pets filters with a single
+-- `amenity_mask & wanted = wanted` test instead of one predicate per
+-- boolean column. Bit order matches AMENITIES in app/geo/amenities.py.
+
+ALTER TABLE campsites
+    ADD COLUMN amenity_mask TINYINT UNSIGNED
+        GENERATED ALWAYS AS (
+              (dump_available IS TRUE)
+            | (electric_hookup_available IS TRUE) << 1
+            | (water_available IS TRUE) << 2
+            | (restroom_available IS TRUE) << 3
+            | (shower_available IS TRUE) << 4
+            | (pets_allowed IS TRUE) << 5
+            | (wifi_available IS TRUE) << 6
+        ) STORED;
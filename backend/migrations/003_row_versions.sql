@@ -0,0 +1,21 @@
+-- Row and collection versions for conditional GETs.
+--
+-- Read endpoints answer If-None-Match with 304 after one primary-key
+-- lookup instead of re-running their query (see app/cache/etags.py):
+-- - single rows use updated_at, maintained by MySQL on every change
+-- - lists use collection_versions, whose counters write handlers bump in
+--   the same transaction as the write (see app/db/versions.py), so
+--   deletes change a list's version too
+
+ALTER TABLE campsites
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+        DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+ALTER TABLE trips
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+        DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+CREATE TABLE collection_versions (
+    scope VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL
+);
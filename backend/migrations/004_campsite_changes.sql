@@ -0,0 +1,42 @@
+-- Campsite change log for incremental sync.
+--
+-- GET /api/campsites/changes?since=<token> returns the campsites changed
+-- after a client's last sync token (see app/db/changes.py):
+-- - campsite writes append one row each as the last statements of their
+--   transaction, holding the log's change_log_locks row until they
+--   commit, so change_ids commit in order and a token never skips a
+--   later-committing change
+-- - is_public is the campsite's visibility after the change and
+--   was_public whether it was public before, so users who could see a
+--   campsite that turned private or was deleted get a tombstone for it
+-- - `flask compact-campsite-changes` keeps only the latest row per
+--   campsite and purges old tombstones; tokens older than the newest
+--   purged tombstone (change_log_compactions) must resync from since=0
+
+CREATE TABLE campsite_changes (
+    change_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    campsite_id INT NOT NULL,
+    user_id INT NOT NULL,
+    is_public BOOLEAN NOT NULL,
+    was_public BOOLEAN NOT NULL,
+    deleted BOOLEAN NOT NULL DEFAULT FALSE,
+    changed_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_campsite_changes_campsite (campsite_id, change_id)
+);
+
+CREATE TABLE change_log_locks (
+    log VARCHAR(64) NOT NULL PRIMARY KEY
+);
+
+INSERT INTO change_log_locks (log) VALUES ('campsites');
+
+CREATE TABLE change_log_compactions (
+    log VARCHAR(64) NOT NULL PRIMARY KEY,
+    compacted_through BIGINT UNSIGNED NOT NULL
+);
+
+-- Existing campsites form the snapshot that since=0 returns.
+INSERT INTO campsite_changes (campsite_id, user_id, is_public, was_public)
+SELECT campsite_id, user_id, is_public, is_public
+FROM campsites
+ORDER BY campsite_id;
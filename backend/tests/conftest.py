@@ -1,8 +1,10 @@
 """
 Pytest configuration and fixtures for backend tests.
 """
+import jwt
 import pytest
 import sys
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -27,6 +29,20 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture
+def auth_header(app):
+    """Authorization header with a valid token for user 1."""
+    token = jwt.encode(
+        {
+            'user_id': 1,
+            'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+        },
+        app.config['SECRET_KEY'],
+        algorithm='HS256',
+    )
+    return {'Authorization': f'Bearer {token}'}
+
+
 @pytest.fixture
 def app_context(app):
     """Create an app context for testing."""
@@ -45,7 +61,7 @@ def mock_db_connection(mocker):
     mock_cursor.__exit__.return_value = None
     
     mocker.patch(
-        'app.routes.auth.get_db_connection',
+        'app.db.connection.get_db_connection',
         return_value=mock_conn
     )
     
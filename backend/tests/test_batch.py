@@ -0,0 +1,114 @@
+"""
+Tests routes/batch.py
+"""
+
+
+class TestBatch:
+    '''Tests the multiplexed /api/batch endpoint'''
+
+    def test_requires_authentication(self, client, app, mock_db_connection):
+        '''Test sub-requests cannot be used to skip authentication'''
+
+        response = client.post('/api/batch', json={'requests': [{'method': 'GET', 'path': '/api/trips'}]})
+
+        assert response.status_code == 401
+
+    def test_shared_connection_and_ordered_responses(self, client, app, auth_header, mock_db_connection):
+        '''Test sub-requests share one connection and transaction and report timing'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {'trip_id': 1, 'trip_name': 'Trip 1', 'date_created': '2026-01-01'}
+        mock_cursor.fetchall.return_value = []
+        mock_cursor.rowcount = 1
+
+        response = client.post('/api/batch', headers=auth_header, json={'requests': [
+            {'method': 'GET', 'path': '/api/trips/1'},
+            {'method': 'PUT', 'path': '/api/trips/1', 'body': {'trip_name': 'Renamed'}},
+            {'method': 'GET', 'path': '/api/trips/1/entries?limit=5'},
+        ]})
+
+        assert response.status_code == 200
+        responses = response.get_json()['responses']
+        assert [sub['status'] for sub in responses] == [200, 200, 200]
+        assert responses[0]['body']['trip_name'] == 'Trip 1'
+        assert all(sub['elapsed_ms'] >= 0 for sub in responses)
+
+        assert mock_conn.close.call_count == 1
+        assert mock_conn.start_transaction.call_count == 1
+        assert mock_conn.commit.call_count == 1
+
+    def test_failed_write_rolled_back_to_savepoint(self, client, app, auth_header, mock_db_connection):
+        '''Test a failing sub-request only undoes its own writes'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.rowcount = 0
+
+        response = client.post('/api/batch', headers=auth_header, json={'requests': [
+            {'method': 'PUT', 'path': '/api/trips/1', 'body': {'trip_name': 'Renamed'}},
+            {'method': 'GET', 'path': '/api/nope'},
+        ]})
+
+        assert response.status_code == 200
+        assert [sub['status'] for sub in response.get_json()['responses']] == [404, 404]
+
+        statements = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        assert 'SAVEPOINT batch_0' in statements
+        assert 'ROLLBACK TO SAVEPOINT batch_0' in statements
+        assert mock_conn.commit.call_count == 1
+
+    def test_concurrent_reads(self, client, app, auth_header, mock_db_connection):
+        '''Test concurrent GETs each run on their own connection'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {'trip_id': 1, 'trip_name': 'Trip 1', 'date_created': '2026-01-01'}
+
+        response = client.post('/api/batch', headers=auth_header, json={
+            'concurrent': True,
+            'requests': [{'method': 'GET', 'path': '/api/trips/1'}] * 3,
+        })
+
+        assert response.status_code == 200
+        assert [sub['status'] for sub in response.get_json()['responses']] == [200] * 3
+        assert mock_conn.close.call_count == 3
+        mock_conn.start_transaction.assert_not_called()
+
+    def test_limits_and_validation(self, client, app, auth_header, mock_db_connection):
+        '''Test oversized, malformed and nested batches are rejected'''
+
+        app.config['BATCH_MAX_REQUESTS'] = 2
+        too_many = {'requests': [{'method': 'GET', 'path': '/api/trips'}] * 3}
+        response = client.post('/api/batch', headers=auth_header, json=too_many)
+        assert response.status_code == 400
+
+        response = client.post('/api/batch', headers=auth_header, json={
+            'requests': [{'method': 'PATCH', 'path': '/api/trips'}],
+        })
+        assert response.get_json()['error'] == 'requests[0]: Unsupported method'
+
+        response = client.post('/api/batch', headers=auth_header, json={
+            'requests': [{'method': 'POST', 'path': '/api/batch', 'body': {'requests': []}}],
+        })
+        assert response.get_json()['responses'][0]['status'] == 400
+
+    def test_committing_and_streaming_endpoints_rejected(self, client, app, auth_header, mock_db_connection):
+        '''Test imports and streamed exports cannot run inside the batch transaction'''
+
+        mock_conn, mock_cursor = mock_db_connection
+
+        response = client.post('/api/batch', headers=auth_header, json={
+            'requests': [
+                {'method': 'GET', 'path': '/api/trips'},
+                {'method': 'POST', 'path': '/api/campsites/import?format=csv'},
+            ],
+        })
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'requests[1]: /api/campsites/import?format=csv cannot be batched'
+        mock_cursor.execute.assert_not_called()
+
+        response = client.post('/api/batch', headers=auth_header, json={
+            'requests': [{'method': 'GET', 'path': '/api/campsites?format=ndjson'}],
+        })
+        result = response.get_json()['responses'][0]
+        assert result['status'] == 400
+        assert result['body'] == {'error': 'Streaming responses cannot be batched'}
+        mock_cursor.execute.assert_not_called()
@@ -0,0 +1,239 @@
+"""
+Tests cache/backends.py and cache/route_cache.py
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.cache.backends import LocalCache, RedisCache
+
+
+@pytest.fixture(params=['local', 'redis'])
+def cache(request):
+    if request.param == 'local':
+        return LocalCache(max_entries=100)
+    fakeredis = pytest.importorskip('fakeredis')
+    return RedisCache(client=fakeredis.FakeRedis(), lock_timeout=1)
+
+
+class TestCacheBackends:
+    '''Tests behavior shared by every cache backend'''
+
+    def test_get_set_delete(self, cache):
+        '''Test single-key operations'''
+
+        cache.set('a', {'rows': [1, 2]})
+
+        assert cache.get('a') == {'rows': [1, 2]}
+        assert cache.get('missing', 'default') == 'default'
+
+        cache.delete('a')
+        assert cache.get('a') is None
+
+    def test_bulk_get_set(self, cache):
+        '''Test get_many returns only cached keys'''
+
+        cache.set_many({'a': 1, 'b': None})
+
+        assert cache.get_many(['a', 'b', 'c']) == {'a': 1, 'b': None}
+
+    def test_namespaces_and_versions(self, cache):
+        '''Test namespaces isolate keys and bump() changes versions'''
+
+        trips = cache.namespace('trips')
+        users = cache.namespace('users')
+        trips.set(1, 'trip')
+
+        assert users.get(1) is None
+        assert trips.versions(['user:1', 'user:2']) == [0, 0]
+
+        trips.bump('user:1')
+        assert trips.versions(['user:1', 'user:2']) == [1, 0]
+
+    def test_counters_expire_after_last_bump(self, cache):
+        '''Test counters get counter_ttl on every increment'''
+
+        cache.counter_ttl = 0 if isinstance(cache, LocalCache) else 1
+        first = cache.incr('v')
+        if isinstance(cache, LocalCache):
+            assert cache.get('v', 0) == 0
+        else:
+            assert 0 < cache._client.ttl('v') <= 1
+            time.sleep(1.1)
+            assert cache.get('v', 0) == 0
+        assert cache.incr('v') >= first
+
+    def test_get_or_set_loads_once_under_contention(self, cache):
+        '''Test concurrent misses on one key run the loader once'''
+
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_set('hot', loader)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ['value'] * 8
+        assert len(calls) == 1
+
+    def test_uncacheable_values_not_stored(self, cache):
+        '''Test values rejected by `cacheable` are returned but not cached'''
+
+        value = cache.get_or_set('k', lambda: 'error', cacheable=lambda value: value != 'error')
+
+        assert value == 'error'
+        assert cache.get('k') is None
+
+
+class TestLocalCache:
+    '''Tests the in-process backend'''
+
+    def test_ttl_and_lru_eviction(self):
+        '''Test entries expire and the least recently used is evicted'''
+
+        cache = LocalCache(max_entries=2)
+        cache.set('short', 1, ttl=0)
+        assert cache.get('short') is None
+
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.stats()['evictions'] == 1
+
+    def test_counters_bounded_and_never_repeat(self):
+        '''Test counters share the LRU bound and restart past earlier values'''
+
+        cache = LocalCache(max_entries=2)
+        assert [cache.incr('a'), cache.incr('b'), cache.incr('a')] == [1, 2, 3]
+        cache.incr('c')
+
+        assert cache.get('b', 0) == 0
+        assert cache.get('a') == 3
+        assert cache.incr('b') == 5
+
+
+class TestCachedRoute:
+    '''Tests opt-in response caching'''
+
+    def test_route_not_cached_unless_listed(self, client, app, auth_header, mock_db_connection):
+        '''Test routes missing from CACHE_ROUTES always hit the database'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = []
+
+        for _ in range(2):
+            client.get('/api/trips', headers=auth_header)
+
+        assert mock_cursor.execute.call_count == 2
+
+    def test_cached_until_write_commits(self, client, app, auth_header, mock_db_connection):
+        '''Test a listed route is served from cache until a write invalidates it'''
+
+        app.config['CACHE_ROUTES'] = frozenset(['trips.list_trips'])
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [
+            {'trip_id': 1, 'trip_name': 'Trip 1', 'date_created': '2026-01-01'},
+        ]
+        mock_cursor.lastrowid = 2
+
+        for _ in range(2):
+            response = client.get('/api/trips?limit=10', headers=auth_header)
+            assert response.get_json()[0]['trip_id'] == 1
+        assert mock_cursor.execute.call_count == 1
+
+        response = client.post('/api/trips', headers=auth_header, json={'trip_name': 'Trip 2'})
+        assert response.status_code == 201
+
+        client.get('/api/trips?limit=10', headers=auth_header)
+        assert mock_cursor.execute.call_count == 3
+
+
+class TestEntityCache:
+    '''Tests the read-through entity cache'''
+
+    def campsite_row(self, **overrides):
+        row = {
+            'campsite_id': 1, 'campsite_name': 'Site', 'user_id': 2,
+            'latitude': 44.5, 'longitude': -123.2, 'is_public': True,
+        }
+        row.update(overrides)
+        return row
+
+    def test_disabled_by_default(self, client, app, auth_header, mock_db_connection):
+        '''Test rows are read from the database unless ENTITY_CACHE is set'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = self.campsite_row()
+
+        for _ in range(2):
+            client.get('/api/campsites/1', headers=auth_header)
+
+        assert mock_cursor.execute.call_count == 2
+
+    def test_campsite_read_through_and_visibility(self, client, app, auth_header, mock_db_connection):
+        '''Test one load serves later reads and visibility is checked per user'''
+
+        app.config['ENTITY_CACHE'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = self.campsite_row(is_public=False)
+
+        for _ in range(2):
+            response = client.get('/api/campsites/1', headers=auth_header)
+            assert response.status_code == 404
+
+        assert mock_cursor.execute.call_count == 1
+
+    def test_update_invalidates_after_commit(self, client, app, auth_header, mock_db_connection):
+        '''Test a PUT invalidates the cached campsite'''
+
+        app.config['ENTITY_CACHE'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = self.campsite_row(user_id=1)
+
+        assert client.get('/api/campsites/1', headers=auth_header).status_code == 200
+
+        response = client.put('/api/campsites/1', headers=auth_header, json={
+            'campsite_name': 'Renamed', 'latitude': 44.5, 'longitude': -123.2,
+            'campsite_type': 'tent', 'is_public': True, 'dump_available': False,
+            'electric_hookup_available': False, 'water_available': False,
+            'restroom_available': False, 'shower_available': False,
+            'pets_allowed': False, 'wifi_available': False,
+        })
+        assert response.status_code == 200
+
+        mock_cursor.fetchone.return_value = self.campsite_row(user_id=1, campsite_name='Renamed')
+        response = client.get('/api/campsites/1', headers=auth_header)
+        assert response.get_json()['campsite_name'] == 'Renamed'
+
+    def test_trip_ownership_check_cached(self, client, app, auth_header, mock_db_connection):
+        '''Test user_owns_trip reuses the cached trip row'''
+
+        app.config['ENTITY_CACHE'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {
+            'trip_id': 5, 'user_id': 1, 'trip_name': 'Trip', 'date_created': '2026-01-01',
+        }
+        mock_cursor.fetchall.return_value = []
+
+        for _ in range(3):
+            response = client.get('/api/trips/5/entries', headers=auth_header)
+            assert response.status_code == 200
+
+        ownership = [call for call in mock_cursor.execute.call_args_list if 'FROM trips' in call[0][0]]
+        assert len(ownership) == 1
@@ -3,6 +3,7 @@ Test campsite.py
 """
 
 from datetime import datetime, timedelta, timezone
+import json
 import jwt
 
 
@@ -13,7 +14,7 @@ class TestGetCampsites:
         '''Test successful retrieval of campsites'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.campsites.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchall.return_value = []
 
         token = jwt.encode(
@@ -38,7 +39,7 @@ class TestGetCampsites:
         '''Test successful get of campsite'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.campsites.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = {'campsite_id': 1}
 
         token = jwt.encode(
@@ -69,7 +70,7 @@ class TestCreateCampsite:
         '''Test successful creation of campsite'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.campsites.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.lastrowid = 1
 
         token = jwt.encode(
@@ -116,7 +117,7 @@ class TestUpdateCampsite:
         '''Test successful updating of campsite'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.campsites.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = {'campsite_id': 1}
 
         token = jwt.encode(
@@ -163,7 +164,7 @@ class TestDeleteCampsite:
         '''Test successful deletion of campsite'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.campsites.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = {'campsite_id': 1}
 
         token = jwt.encode(
@@ -185,4 +186,136 @@ class TestDeleteCampsite:
         assert isinstance(data, dict)
         assert 'message' in data
         assert data['message'] == 'Campsite deleted'
-        
\ No newline at end of file
+        
+
+class TestSparseFieldsets:
+    '''Tests narrowing campsite responses with fields='''
+
+    def test_parse_fields(self):
+        '''Test named sets, explicit lists and unknown fields'''
+
+        from app.routes.campsites import PROJECTIONS, parse_fields
+
+        assert parse_fields('map') is PROJECTIONS['map']
+        assert parse_fields('longitude,latitude').fields == ('campsite_id', 'latitude', 'longitude')
+        assert parse_fields('distance,campsite_name').columns == 'campsite_id, campsite_name'
+        assert parse_fields('latitude,password_hash') is None
+
+    def test_fields_narrow_query_and_response(self, client, app, mock_db_connection):
+        '''Test fields= narrows the SQL select list and the JSON rows'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [
+            {'campsite_id': 1, 'campsite_name': 'A', 'latitude': 44.5, 'longitude': -123.2, 'distance': 1.5},
+        ]
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+
+        response = client.get(
+            '/api/campsites?latitude=44.5&longitude=-123.2&fields=map',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+        assert response.status_code == 200
+        assert response.get_json() == [
+            {'campsite_id': 1, 'campsite_name': 'A', 'latitude': 44.5, 'longitude': -123.2},
+        ]
+        query = mock_cursor.execute.call_args[0][0]
+        assert 'campsite_id, campsite_name, latitude, longitude,' in query
+        assert 'nearby_recreation' not in query
+
+    def test_unknown_field_rejected(self, client, app):
+        '''Test fields outside the whitelist return 400'''
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+
+        response = client.get(
+            '/api/campsites?fields=campsite_id,1;DROP',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+        assert response.status_code == 400
+
+
+class TestCampsiteExport:
+    '''Tests streaming export of visible campsites'''
+
+    def headers(self, app):
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+        return {'Authorization': f'Bearer {token}'}
+
+    def rows(self, count):
+        return [
+            {'campsite_id': i, 'campsite_name': f'Site {i}', 'latitude': 44.5, 'longitude': -123.2}
+            for i in range(1, count + 1)
+        ]
+
+    def test_ndjson_streamed_with_fetchmany(self, client, app, mock_db_connection):
+        '''Test NDJSON export reads the cursor in batches and honors visibility'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchmany.side_effect = [self.rows(2), self.rows(3)[2:], []]
+
+        response = client.get('/api/campsites?format=ndjson&fields=map', headers=self.headers(app))
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert response.is_streamed
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [line['campsite_id'] for line in lines] == [1, 2, 3]
+        mock_cursor.fetchall.assert_not_called()
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert '(is_public = TRUE OR user_id = %s)' in query
+        assert params[0] == 1
+
+    def test_geojson_feature_collection(self, client, app, mock_db_connection):
+        '''Test GeoJSON export builds one valid FeatureCollection'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchmany.side_effect = [self.rows(2), []]
+
+        response = client.get('/api/campsites?format=geojson&fields=campsite_name', headers=self.headers(app))
+
+        collection = response.get_json(force=True)
+        assert collection['type'] == 'FeatureCollection'
+        assert collection['features'][0] == {
+            'type': 'Feature',
+            'id': 1,
+            'geometry': {'type': 'Point', 'coordinates': [-123.2, 44.5]},
+            'properties': {'campsite_id': 1, 'campsite_name': 'Site 1'},
+        }
+        assert 'latitude, longitude' in mock_cursor.execute.call_args[0][0]
+
+    def test_empty_geojson_and_unknown_format(self, client, app, mock_db_connection):
+        '''Test an empty export is still valid and unknown formats are rejected'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchmany.side_effect = [[]]
+
+        response = client.get('/api/campsites?format=geojson', headers=self.headers(app))
+        assert response.get_json(force=True) == {'type': 'FeatureCollection', 'features': []}
+
+        response = client.get('/api/campsites?format=csv', headers=self.headers(app))
+        assert response.status_code == 400
@@ -0,0 +1,845 @@
+"""
+Tests nearby campsite search (geo/distance.py and the campsites.py query)
+"""
+
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+
+from app.geo.amenities import AMENITIES, has_amenities, parse_amenities
+from app.geo.clusters import ClusterIndex, to_cluster
+from app.geo.distance import bounding_box, haversine_miles, parse_bbox
+from app.geo import geohash
+from app.geo.grid_index import CampsiteGridIndex
+from app.geo.nearby_cache import NearbyCache
+from app.geo.tile_cache import TileCache
+from app.geo.tiles import tile_bounds, tile_xy
+from app.routes.campsites import (
+    MAX_NEARBY_RESULTS,
+    MAX_VIEWPORT_RESULTS,
+    build_nearby_query,
+    build_viewport_query,
+)
+
+
+class TestBoundingBox:
+    '''Tests the search envelope used to prefilter candidates'''
+
+    def test_envelope_contains_radius(self):
+        '''Test points on the search circle fall inside the envelope'''
+
+        min_lat, max_lat, lon_ranges = bounding_box(44.56, -123.26, 50)
+
+        assert len(lon_ranges) == 1
+        min_lon, max_lon = lon_ranges[0]
+        assert haversine_miles(44.56, -123.26, max_lat, -123.26) == pytest.approx(50, rel=1e-6)
+        assert haversine_miles(44.56, -123.26, 44.56, max_lon) >= 50
+        assert haversine_miles(44.56, -123.26, 44.56, min_lon) >= 50
+
+    def test_envelope_split_at_antimeridian(self):
+        '''Test envelopes crossing 180 degrees are split into two ranges'''
+
+        _, _, lon_ranges = bounding_box(0, 179.9, 50)
+
+        assert len(lon_ranges) == 2
+        assert lon_ranges[0][1] == 180.0
+        assert lon_ranges[1][0] == -180.0
+        assert lon_ranges[1][1] < -179
+
+    def test_envelope_covers_pole(self):
+        '''Test envelopes reaching a pole span every longitude'''
+
+        min_lat, max_lat, lon_ranges = bounding_box(89.9, 10, 50)
+
+        assert max_lat == 90.0
+        assert lon_ranges == [(-180.0, 180.0)]
+
+
+class TestNearbyQuery:
+    '''Tests the SQL built for nearby search'''
+
+    def test_query_prefilters_on_envelope(self):
+        '''Test the query restricts latitude and longitude ranges'''
+
+        query, params = build_nearby_query(44.56, -123.26, 7)
+
+        assert 'latitude BETWEEN %s AND %s' in query
+        assert 'longitude BETWEEN %s AND %s' in query
+        assert 'HAVING distance <= %s' in query
+        assert query.count('%s') == len(params)
+        assert params[-2:] == (7, 50)
+
+    def test_query_has_two_longitude_ranges_at_antimeridian(self):
+        '''Test the antimeridian case adds a second longitude range'''
+
+        query, params = build_nearby_query(0, 179.9, 7)
+
+        assert query.count('longitude BETWEEN %s AND %s') == 2
+        assert query.count('%s') == len(params)
+
+    def test_query_limited(self):
+        '''Test a limit keeps only the nearest rows'''
+
+        query, params = build_nearby_query(44.56, -123.26, 7, limit=25)
+
+        assert 'ORDER BY distance ASC\n        LIMIT %s;' in query
+        assert query.count('%s') == len(params)
+        assert params[-1] == 25
+
+    def test_route_caps_results(self, client, app, auth_header, mock_db_connection):
+        '''Test nearby searches never ask for more than MAX_NEARBY_RESULTS rows'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = []
+
+        client.get('/api/campsites?latitude=44.56&longitude=-123.26', headers=auth_header)
+        client.get('/api/campsites?latitude=44.56&longitude=-123.26&limit=100000', headers=auth_header)
+        client.get('/api/campsites?latitude=44.56&longitude=-123.26&limit=3', headers=auth_header)
+        client.post('/api/campsites/nearby', headers=auth_header, json={
+            'points': [{'latitude': 44.56, 'longitude': -123.26}],
+        })
+
+        limits = [call[0][1][-1] for call in mock_cursor.execute.call_args_list]
+        assert limits == [MAX_NEARBY_RESULTS, MAX_NEARBY_RESULTS, 3, MAX_NEARBY_RESULTS]
+
+        response = client.get('/api/campsites?latitude=44.56&longitude=-123.26&limit=0', headers=auth_header)
+        assert response.status_code == 400
+
+
+@pytest.mark.skipif(
+    not os.getenv('DB_TEST_HOST'),
+    reason='requires a MySQL 8 test database (set DB_TEST_HOST)',
+)
+class TestNearbyQueryPlan:
+    '''Runs EXPLAIN against MySQL to verify the envelope index is used'''
+
+    def test_explain_uses_lat_lon_index(self):
+        '''Test the nearby query is answered from idx_campsites_lat_lon'''
+
+        import mysql.connector
+
+        conn = mysql.connector.connect(
+            host=os.getenv('DB_TEST_HOST'),
+            user=os.getenv('DB_TEST_USER'),
+            password=os.getenv('DB_TEST_PASSWORD'),
+            database=os.getenv('DB_TEST_NAME'),
+        )
+        cursor = conn.cursor(dictionary=True)
+
+        # A session-local table shadows any real campsites table.
+        cursor.execute(
+            """
+            CREATE TEMPORARY TABLE campsites (
+                campsite_id INT AUTO_INCREMENT PRIMARY KEY,
+                campsite_name VARCHAR(255) NOT NULL,
+                user_id INT,
+                latitude DECIMAL(9, 6) NOT NULL,
+                longitude DECIMAL(9, 6) NOT NULL,
+                campsite_type VARCHAR(50),
+                campsite_identifier VARCHAR(50),
+                is_public BOOLEAN NOT NULL,
+                dump_available BOOLEAN,
+                electric_hookup_available BOOLEAN,
+                water_available BOOLEAN,
+                restroom_available BOOLEAN,
+                shower_available BOOLEAN,
+                pets_allowed BOOLEAN,
+                wifi_available BOOLEAN,
+                cell_carrier VARCHAR(50),
+                cell_quality INT,
+                nearby_recreation TEXT
+            )
+            """
+        )
+        with open(os.path.join(os.path.dirname(__file__), '..', 'migrations',
+                               '001_campsites_geo_prefilter.sql')) as migration:
+            statement = '\n'.join(
+                line for line in migration.read().splitlines()
+                if not line.startswith('--')
+            )
+        cursor.execute(statement)
+
+        rng = random.Random(467)
+        cursor.executemany(
+            "INSERT INTO campsites (campsite_name, latitude, longitude, is_public) "
+            "VALUES (%s, %s, %s, TRUE)",
+            [
+                (f'Site {i}', rng.uniform(25, 49), rng.uniform(-124, -67))
+                for i in range(5000)
+            ],
+        )
+        cursor.execute("ANALYZE TABLE campsites")
+        cursor.fetchall()
+
+        query, params = build_nearby_query(44.56, -123.26, 1)
+        cursor.execute('EXPLAIN ' + query, params)
+        plan = cursor.fetchall()
+
+        cursor.close()
+        conn.close()
+
+        assert plan[0]['key'] == 'idx_campsites_lat_lon'
+        assert plan[0]['type'] == 'range'
+
+
+def make_row(campsite_id, latitude, longitude, is_public=True, user_id=2):
+    return {
+        'campsite_id': campsite_id,
+        'campsite_name': f'Campsite {campsite_id}',
+        'user_id': user_id,
+        'latitude': latitude,
+        'longitude': longitude,
+        'is_public': is_public,
+    }
+
+
+class TestCampsiteGridIndex:
+    '''Tests the in-process campsite index'''
+
+    def test_nearby_matches_exact_radius(self):
+        '''Test only campsites inside the radius are returned, nearest first'''
+
+        rows = [
+            make_row(1, 44.60, -123.30),
+            make_row(2, 44.56, -123.26),
+            make_row(3, 45.60, -122.60),    # ~80 miles away
+        ]
+        index = CampsiteGridIndex(lambda: rows, lambda user_id: [])
+
+        results = index.nearby(44.56, -123.26, 50, user_id=1)
+
+        assert [row['campsite_id'] for row in results] == [2, 1]
+        assert results[0]['distance'] == pytest.approx(0)
+
+    def test_nearby_limit_keeps_nearest(self):
+        '''Test a limit truncates the results after sorting by distance'''
+
+        rows = [make_row(i, 44.56 + i * 0.01, -123.26) for i in range(10, 0, -1)]
+        index = CampsiteGridIndex(lambda: rows, lambda user_id: [])
+
+        results = index.nearby(44.56, -123.26, 50, user_id=1, limit=3)
+
+        assert [row['campsite_id'] for row in results] == [1, 2, 3]
+
+    def test_private_campsites_overlaid_for_owner(self):
+        '''Test a user's private campsites are merged into their results'''
+
+        private = {1: [make_row(9, 44.57, -123.27, is_public=False, user_id=1)]}
+        index = CampsiteGridIndex(lambda: [], lambda user_id: private.get(user_id, []))
+
+        assert [row['campsite_id'] for row in index.nearby(44.56, -123.26, 50, 1)] == [9]
+        assert index.nearby(44.56, -123.26, 50, 2) == []
+
+    def test_write_through_updates(self):
+        '''Test apply and remove update the grid without reloading'''
+
+        loads = []
+
+        def load_public():
+            loads.append(1)
+            return [make_row(1, 44.56, -123.26)]
+
+        index = CampsiteGridIndex(load_public, lambda user_id: [])
+        index.nearby(44.56, -123.26, 50, 1)
+
+        index.apply(make_row(2, 44.57, -123.27))
+        index.apply(make_row(1, 44.56, -123.26, is_public=False))
+        results = index.nearby(44.56, -123.26, 50, 1)
+        assert [row['campsite_id'] for row in results] == [2]
+
+        index.remove(2)
+        assert index.nearby(44.56, -123.26, 50, 1) == []
+        assert len(loads) == 1
+
+    def test_query_across_antimeridian(self):
+        '''Test campsites on both sides of 180 degrees are found'''
+
+        rows = [make_row(1, 0, 179.95), make_row(2, 0, -179.95)]
+        index = CampsiteGridIndex(lambda: rows, lambda user_id: [])
+
+        results = index.nearby(0, 179.99, 50, 1)
+
+        assert sorted(row['campsite_id'] for row in results) == [1, 2]
+
+
+class TestGridEngineRoute:
+    '''Tests list_campsites served from the grid index'''
+
+    def test_nearby_served_from_index(self, client, app, mock_db_connection):
+        '''Test repeated nearby queries load public campsites only once'''
+
+        app.config['GEO_ENGINE'] = 'grid'
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [make_row(1, 44.56, -123.26)]
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+        headers = {'Authorization': f'Bearer {token}'}
+
+        for _ in range(3):
+            response = client.get('/api/campsites?latitude=44.56&longitude=-123.26', headers=headers)
+            assert response.status_code == 200
+            assert response.get_json()[0]['campsite_id'] == 1
+
+        # one public load plus one private overlay load
+        assert mock_cursor.execute.call_count == 2
+
+
+class TestColumnarCampsiteStore:
+    '''Tests the vectorized NumPy engine'''
+
+    @pytest.fixture(autouse=True)
+    def require_numpy(self):
+        pytest.importorskip('numpy')
+
+    def test_matches_grid_index(self):
+        '''Test vectorized results equal the grid index results'''
+
+        from app.geo.columnar import ColumnarCampsiteStore
+
+        rng = random.Random(5)
+        rows = [
+            make_row(i, rng.uniform(43.5, 45.5), rng.uniform(-124, -122),
+                     is_public=rng.random() < 0.8, user_id=rng.choice([1, 2]))
+            for i in range(1, 500)
+        ]
+        store = ColumnarCampsiteStore(lambda: rows)
+        index = CampsiteGridIndex(
+            lambda: [row for row in rows if row['is_public']],
+            lambda user_id: [row for row in rows
+                             if not row['is_public'] and row['user_id'] == user_id],
+        )
+
+        expected = index.nearby(44.56, -123.26, 50, 1)
+        actual = store.nearby(44.56, -123.26, 50, 1)
+
+        assert [row['campsite_id'] for row in actual] == [row['campsite_id'] for row in expected]
+        assert actual[5]['distance'] == pytest.approx(expected[5]['distance'])
+
+    def test_batch_of_points(self):
+        '''Test several query points are answered in one call'''
+
+        from app.geo.columnar import ColumnarCampsiteStore
+
+        rows = [make_row(1, 44.56, -123.26), make_row(2, 0, 179.95),
+                make_row(3, 0, -179.95, is_public=False, user_id=1)]
+        store = ColumnarCampsiteStore(lambda: rows)
+
+        results = store.nearby_many([(44.56, -123.26), (0, 179.99), (10, 10)], 50, 2)
+
+        assert [[row['campsite_id'] for row in result] for result in results] == [[1], [2], []]
+
+    def test_write_through_rebuilds_columns(self):
+        '''Test apply and remove are reflected in the next query'''
+
+        from app.geo.columnar import ColumnarCampsiteStore
+
+        store = ColumnarCampsiteStore(lambda: [make_row(1, 44.56, -123.26)])
+        store.nearby(44.56, -123.26, 50, 1)
+
+        store.apply(make_row(2, 44.57, -123.27))
+        store.remove(1)
+
+        assert [row['campsite_id'] for row in store.nearby(44.56, -123.26, 50, 1)] == [2]
+
+
+class TestBatchNearbyRoute:
+    '''Tests POST /campsites/nearby'''
+
+    def test_batch_nearby_sql_engine(self, client, app, mock_db_connection):
+        '''Test one result list is returned per query point'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = []
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+
+        response = client.post(
+            '/api/campsites/nearby',
+            json={'points': [{'latitude': 44.5, 'longitude': -123.2},
+                             {'latitude': 45.5, 'longitude': -122.6}]},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+        assert response.status_code == 200
+        assert response.get_json() == [[], []]
+
+    def test_batch_nearby_rejects_bad_points(self, client, app):
+        '''Test points without numeric coordinates are rejected'''
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+
+        response = client.post(
+            '/api/campsites/nearby',
+            json={'points': [{'latitude': 'north'}]},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+        assert response.status_code == 400
+
+
+class TestViewportSearch:
+    '''Tests bbox (viewport) search mode'''
+
+    def test_parse_bbox(self):
+        '''Test viewport strings are parsed and validated'''
+
+        assert parse_bbox('44,-124,45,-123') == (44, -124, 45, -123)
+        assert parse_bbox('44,170,45,-170') == (44, 170, 45, -170)
+        assert parse_bbox('45,-124,44,-123') is None
+        assert parse_bbox('44,-124,45') is None
+        assert parse_bbox('a,b,c,d') is None
+
+    def test_viewport_query_splits_antimeridian(self):
+        '''Test a viewport crossing 180 degrees uses two longitude ranges'''
+
+        query, params = build_viewport_query(-20, 170, -10, -170, 1, 100)
+
+        assert query.count('longitude BETWEEN %s AND %s') == 2
+        assert query.count('%s') == len(params)
+        assert params[-1] == 100
+
+    def test_grid_index_viewport_across_antimeridian(self):
+        '''Test the grid index honors the viewport and result cap'''
+
+        rows = [make_row(1, -15, 175), make_row(2, -15, -175),
+                make_row(3, -15, 0), make_row(4, -15, 179.9)]
+        index = CampsiteGridIndex(lambda: rows, lambda user_id: [])
+
+        results = index.in_bbox(-20, 170, -10, -170, 1, limit=10)
+        assert sorted(row['campsite_id'] for row in results) == [1, 2, 4]
+        assert results[0]['campsite_id'] == 4
+
+        assert len(index.in_bbox(-20, 170, -10, -170, 1, limit=2)) == 2
+
+    def test_viewport_route_rejects_invalid_bbox(self, client, app):
+        '''Test malformed bbox values return 400'''
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+
+        response = client.get(
+            '/api/campsites?bbox=91,0,92,1',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+        assert response.status_code == 400
+
+    def test_viewport_route_caps_limit(self, client, app, mock_db_connection):
+        '''Test the requested limit is capped server-side'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = []
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+
+        response = client.get(
+            '/api/campsites?bbox=44,-124,45,-123&limit=100000',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+        assert response.status_code == 200
+        params = mock_cursor.execute.call_args[0][1]
+        assert params[-1] == MAX_VIEWPORT_RESULTS
+
+
+class TestClusterIndex:
+    '''Tests precomputed marker clusters'''
+
+    def test_clusters_aggregate_by_zoom(self):
+        '''Test nearby campsites merge into one cluster at low zoom'''
+
+        rows = [make_row(i, 44.5 + i * 0.01, -123.2 - i * 0.01) for i in range(1, 11)]
+        index = ClusterIndex(lambda: rows)
+
+        cells = index.cells_in(40, -130, 50, -120, zoom=4)
+
+        assert len(cells) == 1
+        cluster = to_cluster(next(iter(cells.values())))
+        assert cluster['count'] == 10
+        assert cluster['latitude'] == pytest.approx(44.555)
+        assert cluster['bbox'] == [pytest.approx(44.51), pytest.approx(-123.3),
+                                   pytest.approx(44.6), pytest.approx(-123.21)]
+
+        assert len(index.cells_in(40, -130, 50, -120, zoom=16)) == 10
+
+    def test_incremental_updates_match_rebuild(self):
+        '''Test apply and remove leave the same clusters as a full rebuild'''
+
+        rows = [make_row(i, 44.5 + i * 0.01, -123.2) for i in range(1, 6)]
+        index = ClusterIndex(lambda: rows)
+        index.cells_in(40, -130, 50, -120, zoom=4)
+
+        index.remove(5)
+        index.apply(make_row(6, 44.0, -123.0))
+        index.apply(make_row(1, 44.51, -123.2, is_public=False))
+
+        remaining = [row for row in rows if row['campsite_id'] in (2, 3, 4)] + [make_row(6, 44.0, -123.0)]
+        rebuilt = ClusterIndex(lambda: remaining)
+
+        for zoom in (0, 6, 12, 16):
+            assert index.cells_in(40, -130, 50, -120, zoom) == rebuilt.cells_in(40, -130, 50, -120, zoom)
+
+    def test_single_campsite_cluster_has_id(self):
+        '''Test a one-member cluster identifies its campsite'''
+
+        index = ClusterIndex(lambda: [make_row(42, 44.5, -123.2), make_row(7, 10, 10)])
+
+        cells = index.cells_in(40, -130, 50, -120, zoom=10)
+
+        assert [to_cluster(cell)['campsite_id'] for cell in cells.values()] == [42]
+
+    def test_route_switches_between_clusters_and_points(self, client, app, mock_db_connection):
+        '''Test clusters are returned above the threshold and raw points below it'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        points = [make_row(i, 44 + (i % 50) * 0.01, -123 - (i // 50) * 0.01) for i in range(1, 301)]
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+        headers = {'Authorization': f'Bearer {token}'}
+
+        mock_cursor.fetchall.side_effect = [points, []]
+        response = client.get('/api/campsites?bbox=43,-125,46,-122&zoom=6', headers=headers)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert all(item['cluster'] for item in data)
+        assert sum(item['count'] for item in data) == 300
+
+        mock_cursor.fetchall.side_effect = [[], [{'campsite_id': 1}]]
+        response = client.get('/api/campsites?bbox=43,-125,43.1,-124.9&zoom=6', headers=headers)
+
+        assert response.get_json() == [{'campsite_id': 1}]
+
+
+class TestCampsiteTiles:
+    '''Tests the cacheable public tile endpoint'''
+
+    def test_tile_bounds_contain_tile_points(self):
+        '''Test a point's tile bounds contain the point'''
+
+        for zoom in (0, 5, 12, 18):
+            x, y = tile_xy(44.56, -123.26, zoom)
+            min_lat, min_lon, max_lat, max_lon = tile_bounds(zoom, x, y)
+            assert min_lat <= 44.56 <= max_lat
+            assert min_lon <= -123.26 <= max_lon
+
+    def test_invalidate_point_evicts_only_touched_tiles(self):
+        '''Test a write evicts the tiles containing it and nothing else'''
+
+        cache = TileCache(max_zoom=10)
+        touched = tile_xy(44.56, -123.26, 10)
+        cache.put(10, *touched, b'a', 'etag-a')
+        cache.put(10, touched[0] + 1, touched[1], b'b', 'etag-b')
+
+        cache.invalidate_point(44.56, -123.26)
+
+        assert cache.get(10, *touched) is None
+        assert cache.get(10, touched[0] + 1, touched[1]) == (b'b', 'etag-b')
+        assert cache.stats()['invalidations'] == 1
+
+    def test_tile_points_cached_with_etag(self, client, app, mock_db_connection):
+        '''Test a tile is encoded compactly, cached and answers If-None-Match'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.side_effect = [
+            [make_row(1, 44.0, -123.0)],
+            [dict(make_row(1, 44.0, -123.0), campsite_name='Site 1')],
+        ]
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+        headers = {'Authorization': f'Bearer {token}'}
+        x, y = tile_xy(44.0, -123.0, 10)
+
+        response = client.get(f'/api/campsites/tiles/10/{x}/{y}', headers=headers)
+
+        assert response.status_code == 200
+        assert response.get_json() == {
+            'type': 'points', 'ids': [1], 'lat': [44.0], 'lon': [-123.0],
+            'names': ['Site 1'], 'z': 10, 'x': x, 'y': y,
+        }
+        assert b', "' not in response.data
+        assert 'public' in response.headers['Cache-Control']
+        assert 'max-age=3600' in response.headers['Cache-Control']
+        etag = response.headers['ETag']
+        assert not etag.startswith('W/')
+
+        headers['If-None-Match'] = etag
+        response = client.get(f'/api/campsites/tiles/10/{x}/{y}', headers=headers)
+
+        assert response.status_code == 304
+        assert app.extensions['tile_cache'].stats()['hits'] == 1
+
+    def test_invalid_tile_not_found(self, client, app):
+        '''Test out-of-range tile coordinates return 404'''
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+
+        response = client.get('/api/campsites/tiles/2/4/0', headers={'Authorization': f'Bearer {token}'})
+
+        assert response.status_code == 404
+
+
+class TestAmenityFilter:
+    '''Tests amenity-filtered search'''
+
+    def amenity_rows(self):
+        rng = random.Random(11)
+        rows = []
+        for i in range(1, 300):
+            row = make_row(i, rng.uniform(44, 45), rng.uniform(-124, -123),
+                           is_public=rng.random() < 0.8, user_id=rng.choice([1, 2]))
+            for _, column in AMENITIES:
+                row[column] = rng.random() < 0.5
+            rows.append(row)
+        return rows
+
+    def test_parse_amenities(self):
+        '''Test amenity names map to bits and unknown names are rejected'''
+
+        assert parse_amenities('') == 0
+        assert parse_amenities('water, electric') == parse_amenities('electric,water')
+        assert parse_amenities('water,sauna') is None
+
+    def test_grid_index_large_campsite_ids(self):
+        '''Test amenity filtering does not depend on the size of the campsite IDs'''
+
+        rows = [
+            dict(make_row(campsite_id, 44.5, -123.5), water_available=True,
+                 pets_allowed=campsite_id > 7)
+            for campsite_id in (7, 10**12, 10**15)
+        ]
+        index = CampsiteGridIndex(lambda: rows, lambda user_id: [])
+        assert len(index.nearby(44.5, -123.5, 1, 1)) == 3
+        index.remove(10**12)
+
+        matches = index.nearby(44.5, -123.5, 1, 1, amenities=parse_amenities('water,pets'))
+
+        assert [row['campsite_id'] for row in matches] == [10**15]
+
+    def test_grid_index_matches_row_filter(self):
+        '''Test the per-row mask filter equals filtering rows one by one'''
+
+        rows = self.amenity_rows()
+        mask = parse_amenities('water,electric,pets')
+        index = CampsiteGridIndex(
+            lambda: [row for row in rows if row['is_public']],
+            lambda user_id: [row for row in rows
+                             if not row['is_public'] and row['user_id'] == user_id],
+        )
+        unfiltered = index.nearby(44.5, -123.5, 100, 1)
+
+        actual = index.nearby(44.5, -123.5, 100, 1, amenities=mask)
+
+        expected = [row for row in unfiltered if has_amenities(row, mask)]
+        assert [row['campsite_id'] for row in actual] == [row['campsite_id'] for row in expected]
+        assert 0 < len(actual) < len(unfiltered)
+
+        target = actual[0]
+        index.apply(dict(target, water_available=False), owner_id=target['user_id'])
+        assert target['campsite_id'] not in [
+            row['campsite_id'] for row in index.nearby(44.5, -123.5, 100, 1, amenities=mask)
+        ]
+
+    def test_columnar_store_matches_grid_index(self):
+        '''Test the NumPy mask column agrees with the grid index masks'''
+
+        pytest.importorskip('numpy')
+        from app.geo.columnar import ColumnarCampsiteStore
+
+        rows = self.amenity_rows()
+        mask = parse_amenities('shower,wifi')
+        store = ColumnarCampsiteStore(lambda: rows)
+        index = CampsiteGridIndex(
+            lambda: [row for row in rows if row['is_public']],
+            lambda user_id: [row for row in rows
+                             if not row['is_public'] and row['user_id'] == user_id],
+        )
+
+        expected = index.in_bbox(44, -124, 45, -123, 2, 500, amenities=mask)
+        actual = store.in_bbox(44, -124, 45, -123, 2, 500, amenities=mask)
+
+        assert [row['campsite_id'] for row in actual] == [row['campsite_id'] for row in expected]
+
+    def test_sql_filters_on_packed_mask(self):
+        '''Test the SQL query tests the amenity_mask column once'''
+
+        mask = parse_amenities('water,pets')
+
+        query, params = build_nearby_query(44.56, -123.26, 7, amenities=mask)
+
+        assert 'amenity_mask & %s = %s' in query
+        assert query.count('%s') == len(params)
+        assert params[-3:] == (mask, mask, 50)
+
+
+class TestNearbyCache:
+    '''Tests the quantized nearby-search cache'''
+
+    def test_geohash_bounds_contain_point(self):
+        '''Test a point lies inside the bounds of its geohash cell'''
+
+        cell = geohash.encode(44.56, -123.26, 6)
+        min_lat, min_lon, max_lat, max_lon = geohash.bounds(cell)
+
+        assert geohash.encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+        assert min_lat <= 44.56 <= max_lat
+        assert min_lon <= -123.26 <= max_lon
+
+    def test_hits_match_uncached_results(self):
+        '''Test trimmed cell supersets equal exact searches for nearby centers'''
+
+        rng = random.Random(3)
+        rows = [make_row(i, rng.uniform(44, 45), rng.uniform(-124, -123)) for i in range(1, 400)]
+        index = CampsiteGridIndex(lambda: rows, lambda user_id: [])
+        cache = NearbyCache()
+
+        def load(latitude, longitude, radius):
+            return index.nearby(latitude, longitude, radius, 1)
+
+        for i in range(20):
+            latitude, longitude = 44.5 + i * 0.0001, -123.5 - i * 0.0001
+            actual = cache.nearby(latitude, longitude, 10, 1, load)
+            expected = index.nearby(latitude, longitude, 10, 1)
+            assert [row['campsite_id'] for row in actual] == [row['campsite_id'] for row in expected]
+
+        assert cache.stats()['hits'] > 0
+
+    def test_limited_hits_match_uncached_results(self):
+        '''Test cells whose load hit the limit fall back to an exact search'''
+
+        rng = random.Random(5)
+        rows = [make_row(i, rng.uniform(44, 45), rng.uniform(-124, -123)) for i in range(1, 400)]
+        index = CampsiteGridIndex(lambda: rows, lambda user_id: [])
+        cache = NearbyCache()
+
+        for limit in (5, 1000):
+            def load(latitude, longitude, radius):
+                return index.nearby(latitude, longitude, radius, 1, limit=limit)
+
+            for i in range(20):
+                latitude, longitude = 44.5 + i * 0.001, -123.5 - i * 0.001
+                actual = cache.nearby(latitude, longitude, 10, 1, load, limit=limit)
+                expected = index.nearby(latitude, longitude, 10, 1, limit=limit)
+                assert [row['campsite_id'] for row in actual] == [row['campsite_id'] for row in expected]
+
+    def test_invalidate_only_covering_entries(self):
+        '''Test a write drops the entries that could contain it and no others'''
+
+        cache = NearbyCache()
+        load = lambda latitude, longitude, radius: []
+        cache.nearby(44.5, -123.5, 5, 1, load)
+        cache.nearby(40.0, -110.0, 5, 1, load)
+        cache.nearby(44.5, -123.5, 5, 2, load)
+
+        cache.invalidate_point(44.52, -123.52, user_id=2)
+        assert cache.stats()['entries'] == 2
+
+        cache.invalidate_point(44.52, -123.52)
+        assert cache.stats()['entries'] == 1
+        assert cache.stats()['invalidations'] == 2
+
+    def test_lru_eviction_counted(self):
+        '''Test entries beyond max_entries are evicted and counted'''
+
+        cache = NearbyCache(max_entries=2)
+        for longitude in (-120, -121, -122):
+            cache.nearby(44.5, longitude, 5, 1, lambda *args: [])
+
+        assert cache.stats()['entries'] == 2
+        assert cache.stats()['evictions'] == 1
+
+    def test_route_write_invalidates_and_reports_stats(self, client, app, mocker, mock_db_connection):
+        '''Test repeated queries hit the cache until a nearby campsite changes'''
+
+        app.config['NEARBY_CACHE_SIZE'] = 4096
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [make_row(1, 44.56, -123.26)]
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+        headers = {'Authorization': f'Bearer {token}'}
+
+        for _ in range(2):
+            client.get('/api/campsites?latitude=44.5601&longitude=-123.2601', headers=headers)
+        assert mock_cursor.execute.call_count == 1
+
+        mock_cursor.fetchone.return_value = make_row(1, 44.5601, -123.2601)
+        response = client.put('/api/campsites/1', headers=headers, json={
+            'campsite_name': 'Moved', 'latitude': 44.57, 'longitude': -123.27,
+            'campsite_type': 'tent', 'is_public': True, 'dump_available': False,
+            'electric_hookup_available': False, 'water_available': False,
+            'restroom_available': False, 'shower_available': False,
+            'pets_allowed': False, 'wifi_available': False,
+        })
+        assert response.status_code == 200
+        assert mock_cursor.execute.call_count == 3
+
+        assert client.get('/api/health/caches').status_code == 401
+        stats = client.get('/api/health/caches', headers=headers).get_json()['nearby_cache']
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 0
@@ -0,0 +1,204 @@
+"""
+Tests bulk/campsite_import.py and the import route
+"""
+
+import csv
+import io
+import json
+
+
+from app.bulk.campsite_import import CampsiteImport, iter_geojson_rows, normalize_row
+
+CSV_HEADER = (
+    'campsite_name,latitude,longitude,campsite_type,is_public,dump_available,'
+    'electric_hookup_available,water_available,restroom_available,'
+    'shower_available,pets_allowed,wifi_available,cell_carrier\n'
+)
+
+
+def csv_row(name, latitude='44.5', longitude='-123.2'):
+    return f'{name},{latitude},{longitude},rv,true,yes,no,1,0,,true,false,\n'
+
+
+def feature(name, longitude=-123.2, latitude=44.5):
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [longitude, latitude]},
+        'properties': {
+            'campsite_name': name, 'campsite_type': 'tent', 'is_public': True,
+            'dump_available': False, 'electric_hookup_available': False,
+            'water_available': True, 'restroom_available': False,
+            'shower_available': False, 'pets_allowed': True, 'wifi_available': False,
+        },
+    }
+
+
+class TestImportParsing:
+    '''Tests row parsing and validation'''
+
+    def test_normalize_row(self):
+        '''Test CSV strings become typed column values'''
+
+        raw = next(csv.DictReader(io.StringIO(CSV_HEADER + csv_row('Site'))))
+        row, message = normalize_row(raw)
+
+        assert message is None
+        assert row['latitude'] == 44.5
+        assert row['dump_available'] is True and row['shower_available'] is False
+        assert 'cell_carrier' not in row
+
+    def test_invalid_rows(self):
+        '''Test rows failing the campsite rules are reported'''
+
+        assert normalize_row({'campsite_name': 'x'}) == (None, 'Missing required fields')
+        raw = feature('Site', latitude=95)['properties']
+        raw.update(latitude=95, longitude=0)
+        assert normalize_row(raw) == (None, 'Invalid latitude')
+
+    def test_geojson_streamed_in_small_chunks(self):
+        '''Test features split across read chunks are decoded one at a time'''
+
+        collection = {'type': 'FeatureCollection', 'features': [feature(f'Site {i}') for i in range(5)]}
+        stream = io.StringIO(json.dumps(collection))
+
+        rows = list(iter_geojson_rows(stream, chunk_size=7))
+
+        assert [row['campsite_name'] for row in rows] == [f'Site {i}' for i in range(5)]
+        assert rows[0]['latitude'] == 44.5 and rows[0]['longitude'] == -123.2
+
+
+class TestCampsiteImport:
+    '''Tests batched inserts, resuming and dry runs'''
+
+    def test_batches_commit_separately(self, app_context, mock_db_connection):
+        '''Test every batch is one executemany in its own transaction'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        data = CSV_HEADER + ''.join(csv_row(f'Site {i}') for i in range(5)) + csv_row('Bad', latitude='x')
+
+        job = CampsiteImport(7, 'csv', batch_size=2)
+        progress = list(job.run(io.StringIO(data)))
+
+        assert [p['next_start'] for p in progress] == [2, 4, 6]
+        assert progress[-1]['done'] is True
+        assert progress[-1]['inserted'] == 5
+        assert progress[-1]['errors'] == [{'row': 6, 'error': 'Invalid latitude'}]
+        assert mock_cursor.executemany.call_count == 3
+        assert mock_conn.commit.call_count == 3
+        assert mock_cursor.executemany.call_args_list[0][0][1][0][:2] == (7, 'Site 0')
+
+    def test_change_feed_logs_assigned_ids(self, app_context, mock_db_connection):
+        '''Test the change log gets the IDs MySQL assigned, gaps included'''
+
+        app_context.config['CHANGE_FEED'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        assigned = iter([10, 12, 13])
+
+        def execute(query, params=()):
+            if 'INSERT INTO campsites' in query:
+                mock_cursor.lastrowid = next(assigned)
+        mock_cursor.execute.side_effect = execute
+        data = CSV_HEADER + ''.join(csv_row(f'Site {i}') for i in range(3))
+
+        list(CampsiteImport(7, 'csv', batch_size=5).run(io.StringIO(data)))
+
+        logged = [call[0] for call in mock_cursor.execute.call_args_list if 'campsite_changes' in call[0][0]]
+        assert len(logged) == 1
+        assert logged[0][1] == (False, 10, 12, 13)
+        assert mock_cursor.executemany.call_count == 0
+
+    def test_resume_skips_committed_rows(self, app_context, mock_db_connection):
+        '''Test start skips rows committed by an earlier run'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        data = CSV_HEADER + ''.join(csv_row(f'Site {i}') for i in range(5))
+
+        job = CampsiteImport(7, 'csv', batch_size=10, start=3)
+        progress = list(job.run(io.StringIO(data)))
+
+        assert progress[-1]['rows'] == 2
+        names = [params[1] for params in mock_cursor.executemany.call_args[0][1]]
+        assert names == ['Site 3', 'Site 4']
+
+    def test_dry_run_writes_nothing(self, app_context, mock_db_connection):
+        '''Test a dry run validates without touching the database'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        data = CSV_HEADER + ''.join(csv_row(f'Site {i}') for i in range(3))
+
+        progress = list(CampsiteImport(7, 'csv', dry_run=True).run(io.StringIO(data)))
+
+        assert progress[-1]['rows'] == 3
+        assert progress[-1]['inserted'] == 0
+        mock_conn.cursor.assert_not_called()
+
+
+class TestImportRoute:
+    '''Tests POST /api/campsites/import'''
+
+    def test_streams_progress(self, client, app, auth_header, mock_db_connection):
+        '''Test the import streams NDJSON progress and owns rows by the caller'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        collection = {'type': 'FeatureCollection', 'features': [feature(f'Site {i}') for i in range(3)]}
+
+        response = client.post(
+            '/api/campsites/import?batch_size=2',
+            data=json.dumps(collection),
+            content_type='application/geo+json',
+            headers=auth_header,
+        )
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [line['inserted'] for line in lines] == [2, 3]
+        assert lines[-1]['done'] is True
+        assert mock_cursor.executemany.call_args[0][1][0][0] == 1
+
+    def test_invalid_file_reports_resume_point(self, client, app, auth_header, mock_db_connection):
+        '''Test a truncated file ends the stream with an error and next_start'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        body = json.dumps({'type': 'FeatureCollection', 'features': [feature('Site')]})[:-10]
+
+        response = client.post(
+            '/api/campsites/import?format=geojson',
+            data=body,
+            headers=auth_header,
+        )
+
+        last = json.loads(response.get_data(as_text=True).splitlines()[-1])
+        assert 'error' in last
+        assert last['next_start'] == 0
+
+    def test_unknown_format(self, client, app, auth_header, mock_db_connection):
+        '''Test uploads of unknown type are rejected'''
+
+        response = client.post('/api/campsites/import', data='x', content_type='text/plain', headers=auth_header)
+
+        assert response.status_code == 400
+
+
+class TestImportCommand:
+    '''Tests the flask import-campsites command'''
+
+    def test_checkpoint_written_and_resumed(self, app, mock_db_connection, tmp_path):
+        '''Test the checkpoint file records progress and is used to resume'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        source = tmp_path / 'sites.csv'
+        source.write_text(CSV_HEADER + ''.join(csv_row(f'Site {i}') for i in range(3)))
+        checkpoint = tmp_path / 'sites.checkpoint'
+
+        runner = app.test_cli_runner()
+        args = ['import-campsites', str(source), '--user-id', '7', '--batch-size', '2', '--checkpoint', str(checkpoint)]
+        result = runner.invoke(args=args)
+
+        assert result.exit_code == 0, result.output
+        assert checkpoint.read_text() == '3'
+        assert mock_cursor.executemany.call_count == 2
+
+        result = runner.invoke(args=args)
+        assert 'Resuming at row 3' in result.output
+        assert mock_cursor.executemany.call_count == 2
@@ -0,0 +1,236 @@
+"""
+Tests db/changes.py and GET /api/campsites/changes
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+from app.db.changes import log_upserts
+from app.db.query import commit, execute_query, rollback
+
+CAMPSITE = {
+    'campsite_name': 'Campsite One',
+    'latitude': 45.5,
+    'longitude': -122.5,
+    'campsite_type': 'RV',
+    'is_public': False,
+    'dump_available': False,
+    'electric_hookup_available': True,
+    'water_available': True,
+    'restroom_available': True,
+    'shower_available': True,
+    'pets_allowed': False,
+    'wifi_available': False,
+}
+
+
+def statements(mock_cursor):
+    return [call[0] for call in mock_cursor.execute.call_args_list]
+
+
+class TestChangeFeed:
+    '''Tests upserts, tombstones and sync tokens'''
+
+    def test_disabled_by_default(self, client, app, auth_header, mock_db_connection):
+        '''Test the feed is off and writes log nothing unless CHANGE_FEED is set'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.lastrowid = 7
+
+        response = client.get('/api/campsites/changes', headers=auth_header)
+        assert response.status_code == 404
+
+        client.post('/api/campsites', headers=auth_header, json=CAMPSITE)
+        assert mock_cursor.execute.call_count == 1
+
+    def test_upserts_and_tombstones(self, client, app, auth_header, mock_db_connection):
+        '''Test visible changed campsites are upserts and the others tombstones'''
+
+        app.config['CHANGE_FEED'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {'compacted_through': 3}
+        mock_cursor.fetchall.side_effect = [
+            [
+                {'change_id': 8, 'campsite_id': 4},
+                {'change_id': 9, 'campsite_id': 2},
+                {'change_id': 10, 'campsite_id': 4},
+                {'change_id': 12, 'campsite_id': 6},
+            ],
+            [{'campsite_id': 4, 'campsite_name': 'Site 4', 'latitude': 44.5, 'longitude': -123.2}],
+        ]
+
+        response = client.get('/api/campsites/changes?since=5&limit=3&fields=map', headers=auth_header)
+
+        assert response.status_code == 200
+        assert response.get_json() == {
+            'upserts': [{'campsite_id': 4, 'campsite_name': 'Site 4', 'latitude': 44.5, 'longitude': -123.2}],
+            'deleted': [2],
+            'next': '10',
+            'has_more': True,
+        }
+        query, params = statements(mock_cursor)[1]
+        assert 'FROM campsite_changes' in query and 'ORDER BY change_id' in query
+        assert 'GROUP BY' not in query
+        assert params == (5, 1, 4)
+        query, params = statements(mock_cursor)[2]
+        assert 'campsite_id IN (%s, %s)' in query
+        assert params == (2, 4, 1)
+
+    def test_no_changes_keeps_token(self, client, app, auth_header, mock_db_connection):
+        '''Test an up-to-date client gets its own token back'''
+
+        app.config['CHANGE_FEED'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = None
+        mock_cursor.fetchall.return_value = []
+
+        response = client.get('/api/campsites/changes?since=40', headers=auth_header)
+
+        assert response.get_json() == {'upserts': [], 'deleted': [], 'next': '40', 'has_more': False}
+        assert mock_cursor.execute.call_count == 2
+
+    def test_expired_token(self, client, app, auth_header, mock_db_connection):
+        '''Test tokens older than the last purged tombstone must resync'''
+
+        app.config['CHANGE_FEED'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {'compacted_through': 10}
+
+        response = client.get('/api/campsites/changes?since=3', headers=auth_header)
+
+        assert response.status_code == 410
+        assert mock_cursor.execute.call_count == 1
+
+
+class TestChangeLogging:
+    '''Tests campsite writes append to the change log'''
+
+    def test_create_and_update_logged(self, client, app, auth_header, mock_db_connection):
+        '''Test writes log the row state, keeping whether it was public before'''
+
+        app.config['CHANGE_FEED'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.lastrowid = 7
+        mock_cursor.rowcount = 1
+        mock_cursor.fetchone.return_value = {'user_id': 1, 'latitude': 45.5, 'longitude': -122.5, 'is_public': True}
+
+        client.post('/api/campsites', headers=auth_header, json=CAMPSITE)
+        query, params = statements(mock_cursor)[-1]
+        assert 'INSERT INTO campsite_changes' in query
+        assert params == (False, 7)
+
+        response = client.put('/api/campsites/7', headers=auth_header, json=CAMPSITE)
+        assert response.status_code == 200
+        query, params = statements(mock_cursor)[-1]
+        assert 'INSERT INTO campsite_changes' in query
+        assert params == (True, 7)
+
+    def test_delete_logs_tombstone(self, client, app, auth_header, mock_db_connection):
+        '''Test a delete logs a tombstone under the log lock before it commits'''
+
+        app.config['CHANGE_FEED'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {
+            'campsite_id': 7, 'latitude': 45.5, 'longitude': -122.5, 'is_public': True,
+        }
+
+        response = client.delete('/api/campsites/7', headers=auth_header)
+
+        assert response.status_code == 200
+        queries = statements(mock_cursor)
+        assert 'DELETE FROM campsites' in queries[-3][0]
+        assert 'FOR UPDATE' in queries[-2][0]
+        query, params = queries[-1]
+        assert 'VALUES (%s, %s, FALSE, %s, TRUE)' in query
+        assert params == (7, 1, True)
+        assert mock_conn.commit.call_count == 1
+
+    def test_appends_commit_in_change_id_order(self, app, mocker):
+        '''Test a write appending while another holds the log waits for its commit'''
+
+        app.config['CHANGE_FEED'] = True
+        log_lock = threading.Lock()
+        events = []
+
+        def connect():
+            conn = MagicMock()
+            appended = []
+
+            def execute(query, params=()):
+                if 'FOR UPDATE' in query:
+                    log_lock.acquire()
+                elif 'INSERT INTO campsite_changes' in query:
+                    appended.append(params)
+                    events.append(('append', params))
+
+            def commit():
+                events.append(('commit', appended[-1]))
+                log_lock.release()
+
+            conn.cursor.return_value.execute.side_effect = execute
+            conn.commit.side_effect = commit
+            return conn
+
+        mocker.patch('app.db.connection.get_db_connection', side_effect=connect)
+        update = 'UPDATE campsites SET is_public = TRUE WHERE campsite_id = %s;'
+
+        def second_writer():
+            with app.app_context():
+                execute_query(update, (2,))
+                log_upserts(2)
+                commit()
+
+        with app.app_context():
+            execute_query(update, (1,))
+            log_upserts(1)
+
+            writer = threading.Thread(target=second_writer)
+            writer.start()
+            writer.join(timeout=0.2)
+            assert writer.is_alive()
+            assert events == [('append', (False, 1))]
+
+            commit()
+            writer.join(timeout=5)
+
+        assert events == [
+            ('append', (False, 1)), ('commit', (False, 1)),
+            ('append', (False, 2)), ('commit', (False, 2)),
+        ]
+
+    def test_rolled_back_write_not_logged(self, app, mock_db_connection):
+        '''Test a rolled back write takes its log row with it'''
+
+        app.config['CHANGE_FEED'] = True
+        mock_conn, mock_cursor = mock_db_connection
+
+        with app.app_context():
+            execute_query('UPDATE campsites SET is_public = TRUE WHERE campsite_id = %s;', (1,))
+            log_upserts(1)
+            rollback()
+
+        assert 'INSERT INTO campsite_changes' in statements(mock_cursor)[-1][0]
+        mock_conn.rollback.assert_called_once()
+        mock_conn.commit.assert_not_called()
+
+
+class TestCompaction:
+    '''Tests flask compact-campsite-changes'''
+
+    def test_compacts_and_records_horizon(self, app, mock_db_connection):
+        '''Test superseded rows and expired tombstones are removed in one transaction'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.side_effect = [{'change_id': 50}, {'change_id': 20}]
+        mock_cursor.rowcount = 3
+
+        result = app.test_cli_runner().invoke(args=['compact-campsite-changes', '--retention-days', '7'])
+
+        assert result.exit_code == 0, result.output
+        assert 'superseded=3 purged=3' in result.output
+        queries = statements(mock_cursor)
+        assert queries[2][1] == (50,)
+        assert queries[3][1] == (50, 7)
+        assert queries[-1][1] == ('campsites', 20)
+        assert 'GREATEST(compacted_through' in queries[-1][0]
+        assert mock_conn.commit.call_count == 1
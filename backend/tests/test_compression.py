@@ -0,0 +1,123 @@
+"""
+Tests http/compression.py
+"""
+
+import gzip
+import json
+import zlib
+from unittest.mock import patch
+
+import pytest
+
+from app import create_app
+from app.geo.tiles import tile_xy
+from app.http import compression
+
+
+def trips(count):
+    return [
+        {'trip_id': i, 'trip_name': f'Trip {i}', 'date_created': '2026-01-01'}
+        for i in range(1, count + 1)
+    ]
+
+
+class TestCompression:
+    '''Tests Accept-Encoding negotiation'''
+
+    def test_gzip_negotiated(self, client, app, auth_header, mock_db_connection):
+        '''Test a large JSON body is gzipped when the client accepts it'''
+
+        app.config['COMPRESS_ALGORITHMS'] = ('gzip',)
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = trips(50)
+
+        response = client.get('/api/trips', headers={**auth_header, 'Accept-Encoding': 'br;q=0.5, gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert int(response.headers['Content-Length']) == len(response.data)
+        assert len(json.loads(gzip.decompress(response.data))) == 50
+
+    def test_small_or_unaccepted_bodies_sent_as_is(self, client, app, auth_header, mock_db_connection):
+        '''Test bodies below COMPRESS_MIN_SIZE or without Accept-Encoding are not compressed'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.side_effect = [trips(1), trips(50)]
+
+        response = client.get('/api/trips', headers={**auth_header, 'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        assert 'Accept-Encoding' in response.headers['Vary']
+
+        response = client.get('/api/trips', headers={**auth_header, 'Accept-Encoding': 'gzip;q=0'})
+        assert 'Content-Encoding' not in response.headers
+        assert len(response.get_json()) == 50
+
+    def test_stream_compressed_per_chunk(self, client, app, auth_header, mock_db_connection):
+        '''Test a streamed export is compressed incrementally'''
+
+        app.config['COMPRESS_ALGORITHMS'] = ('gzip',)
+        mock_conn, mock_cursor = mock_db_connection
+        rows = [
+            {'campsite_id': i, 'campsite_name': f'Site {i}', 'latitude': 44.5, 'longitude': -123.2}
+            for i in range(1, 4)
+        ]
+        mock_cursor.fetchmany.side_effect = [rows, []]
+
+        response = client.get(
+            '/api/campsites?format=ndjson&fields=map',
+            headers={**auth_header, 'Accept-Encoding': 'gzip'},
+        )
+
+        assert response.is_streamed
+        assert response.headers['Content-Encoding'] == 'gzip'
+        lines = zlib.decompress(response.data, 16 + zlib.MAX_WBITS).decode().splitlines()
+        assert [json.loads(line)['campsite_id'] for line in lines] == [1, 2, 3]
+
+    def test_cached_route_reuses_compressed_body(self, client, app, auth_header, mock_db_connection):
+        '''Test a cached response is compressed once and served compressed on hits'''
+
+        app.config['CACHE_ROUTES'] = frozenset(['trips.list_trips'])
+        app.config['COMPRESS_ALGORITHMS'] = ('gzip',)
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = trips(50)
+        headers = {**auth_header, 'Accept-Encoding': 'gzip'}
+
+        with patch.object(compression, 'compress', wraps=compression.compress) as compress:
+            bodies = [client.get('/api/trips', headers=headers).data for _ in range(3)]
+
+        assert compress.call_count == 1
+        assert bodies[0] == bodies[1] == bodies[2]
+        assert len(json.loads(gzip.decompress(bodies[0]))) == 50
+        assert mock_cursor.execute.call_count == 1
+
+    def test_compressed_tile_etag_is_weak(self, client, app, auth_header, mock_db_connection):
+        '''Test a compressed tile gets a weak ETag that still revalidates'''
+
+        app.config['COMPRESS_ALGORITHMS'] = ('gzip',)
+        app.config['COMPRESS_MIN_SIZE'] = 0
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.side_effect = [
+            [{'campsite_id': 1, 'latitude': 44.0, 'longitude': -123.0, 'is_public': True, 'user_id': 2}],
+            [{'campsite_id': 1, 'campsite_name': 'Site 1', 'latitude': 44.0, 'longitude': -123.0}],
+        ]
+        x, y = tile_xy(44.0, -123.0, 10)
+        headers = {**auth_header, 'Accept-Encoding': 'gzip'}
+
+        response = client.get(f'/api/campsites/tiles/10/{x}/{y}', headers=headers)
+        etag = response.headers['ETag']
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert etag.startswith('W/')
+        assert json.loads(gzip.decompress(response.data))['ids'] == [1]
+
+        headers['If-None-Match'] = etag
+        response = client.get(f'/api/campsites/tiles/10/{x}/{y}', headers=headers)
+        assert response.status_code == 304
+
+    def test_unknown_algorithm_rejected(self, monkeypatch):
+        '''Test COMPRESS_ALGORITHMS only accepts known encodings'''
+
+        monkeypatch.setenv('COMPRESS_ALGORITHMS', 'gzip,lzma')
+
+        with pytest.raises(ValueError):
+            create_app()
@@ -0,0 +1,151 @@
+"""
+Tests db/connection.py
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import jwt
+import pytest
+
+from app.db import connection
+from app.db.connection import ConnectionPool, PoolTimeoutError
+
+
+def make_pool(**kwargs):
+    '''Build a pool whose connections are MagicMocks'''
+    created = []
+
+    def connect():
+        conn = MagicMock()
+        conn.in_transaction = False
+        created.append(conn)
+        return conn
+
+    return ConnectionPool(connect, **kwargs), created
+
+
+class TestConnectionPool:
+    '''Tests checkout and return of pooled connections'''
+
+    def test_connection_is_reused(self):
+        '''Test a returned connection is handed out again'''
+
+        pool, created = make_pool(size=2)
+
+        conn1 = pool.acquire()
+        conn1.close()
+        conn2 = pool.acquire()
+
+        assert len(created) == 1
+        assert conn2._record.conn is created[0]
+        assert pool.stats()['checked_out'] == 1
+
+    def test_close_does_not_close_socket(self):
+        '''Test close() returns to the pool instead of closing'''
+
+        pool, created = make_pool(size=1)
+
+        pool.acquire().close()
+
+        created[0].close.assert_not_called()
+        assert pool.stats()['idle'] == 1
+
+    def test_overflow_connections_closed_on_release(self):
+        '''Test connections beyond size are closed when returned'''
+
+        pool, created = make_pool(size=1, max_overflow=1)
+
+        conn1 = pool.acquire()
+        conn2 = pool.acquire()
+        conn1.close()
+        conn2.close()
+
+        assert len(created) == 2
+        assert pool.stats()['idle'] == 1
+        created[1].close.assert_called_once()
+
+    def test_exhausted_pool_times_out(self):
+        '''Test acquire raises once size + overflow is reached'''
+
+        pool, _ = make_pool(size=1, max_overflow=0, timeout=0.01)
+
+        pool.acquire()
+
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+        assert pool.stats()['timeouts'] == 1
+
+    def test_failed_ping_replaces_connection(self):
+        '''Test pre-ping discards dead connections'''
+
+        pool, created = make_pool(size=1)
+
+        pool.acquire().close()
+        created[0].ping.side_effect = Exception('gone away')
+        pool.acquire()
+
+        assert len(created) == 2
+        assert pool.stats()['invalidated'] == 1
+
+    def test_idle_connections_reaped(self):
+        '''Test connections idle past idle_timeout are closed'''
+
+        pool, created = make_pool(size=2, idle_timeout=0)
+
+        pool.acquire().close()
+        pool.reap_idle()
+
+        created[0].close.assert_called_once()
+        assert pool.stats()['idle'] == 0
+
+    def test_open_transaction_rolled_back_on_release(self):
+        '''Test uncommitted work is not leaked to the next borrower'''
+
+        pool, created = make_pool(size=1)
+
+        conn = pool.acquire()
+        created[0].in_transaction = True
+        conn.close()
+
+        created[0].rollback.assert_called_once()
+
+    def test_reset_after_fork_drops_inherited_connections(self, monkeypatch):
+        '''Test a forked child does not reuse or close parent sockets'''
+
+        pool, created = make_pool(size=1)
+
+        pool.acquire().close()
+        monkeypatch.setattr(os, 'getpid', lambda: -1)
+        pool.acquire()
+
+        assert len(created) == 2
+        created[0].close.assert_not_called()
+        assert pool.stats()['pid'] == -1
+
+
+class TestPoolStats:
+    '''Tests the pool statistics endpoint'''
+
+    def test_pool_stats_endpoint(self, client, app, monkeypatch):
+        '''Test pool stats are only exposed to authenticated users'''
+
+        pool, _ = make_pool(size=3)
+        monkeypatch.setattr(connection, '_pool', pool)
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+
+        assert client.get('/api/health/db-pool').status_code == 401
+        response = client.get('/api/health/db-pool', headers={'Authorization': f'Bearer {token}'})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['initialized'] is True
+        assert data['size'] == 3
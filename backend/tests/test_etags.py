@@ -0,0 +1,88 @@
+"""
+Tests cache/etags.py and db/versions.py
+"""
+
+from datetime import datetime
+
+
+class TestConditionalGet:
+    '''Tests ETags built from row and collection versions'''
+
+    def test_disabled_by_default(self, client, app, auth_header, mock_db_connection):
+        '''Test responses carry no ETag unless ETAGS is set'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = []
+
+        response = client.get('/api/trips', headers=auth_header)
+
+        assert response.headers.get('ETag') is None
+        assert mock_cursor.execute.call_count == 1
+
+    def test_list_revalidated_with_version_lookup(self, client, app, auth_header, mock_db_connection):
+        '''Test a matching If-None-Match gets 304 after only the version lookup'''
+
+        app.config['ETAGS'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        versions = [{'scope': 'trips:user:1', 'version': 3}]
+        trips = [{'trip_id': 1, 'trip_name': 'Trip 1', 'date_created': '2026-01-01'}]
+        mock_cursor.fetchall.side_effect = [versions, trips, versions]
+
+        response = client.get('/api/trips', headers=auth_header)
+        etag = response.headers['ETag']
+        assert response.status_code == 200
+        assert 'no-cache' in response.headers['Cache-Control']
+
+        response = client.get('/api/trips', headers={**auth_header, 'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert response.get_data() == b''
+
+        assert mock_cursor.execute.call_count == 3
+        assert 'FROM collection_versions' in mock_cursor.execute.call_args[0][0]
+
+    def test_new_version_changes_etag(self, client, app, auth_header, mock_db_connection):
+        '''Test a bumped version makes the old ETag stale'''
+
+        app.config['ETAGS'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.side_effect = [
+            [{'scope': 'trips:user:1', 'version': 3}], [],
+            [{'scope': 'trips:user:1', 'version': 4}], [],
+        ]
+
+        etag = client.get('/api/trips', headers=auth_header).headers['ETag']
+        response = client.get('/api/trips', headers={**auth_header, 'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_row_etag_skipped_for_hidden_campsite(self, client, app, auth_header, mock_db_connection):
+        '''Test campsites the user cannot see get no ETag and stay 404'''
+
+        app.config['ETAGS'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {
+            'updated_at': datetime(2026, 1, 1), 'is_public': False, 'user_id': 2,
+        }
+
+        response = client.get('/api/campsites/1', headers={**auth_header, 'If-None-Match': '*'})
+
+        assert response.status_code != 304
+        assert response.headers.get('ETag') is None
+
+    def test_writes_bump_versions_in_transaction(self, client, app, auth_header, mock_db_connection):
+        '''Test a write bumps its collection versions before the commit'''
+
+        app.config['ETAGS'] = True
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.rowcount = 1
+
+        response = client.delete('/api/trips/5', headers=auth_header)
+
+        assert response.status_code == 200
+        query, params = mock_cursor.execute.call_args[0]
+        assert 'INSERT INTO collection_versions' in query
+        assert 'ON DUPLICATE KEY UPDATE version = version + 1' in query
+        assert params == ('trip_entries:trip:5', 'trips:user:1')
+        assert mock_conn.commit.call_count == 1
@@ -0,0 +1,64 @@
+"""
+Tests http/json_provider.py
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.http import json_provider
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    '''Runs a test with orjson (when installed) and with the stdlib fallback'''
+
+    if request.param == 'orjson' and json_provider.orjson is None:
+        pytest.skip('orjson is not installed')
+    if request.param == 'stdlib':
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    return request.param
+
+
+class TestJSONProvider:
+    '''Tests Decimal and date serialization of API responses'''
+
+    def test_mysql_types(self, app_context, encoder):
+        '''Test Decimals become numbers and dates ISO 8601 strings, in row order'''
+
+        row = {
+            'trip_id': 1,
+            'latitude': Decimal('44.5646000'),
+            'begin_date': date(2026, 1, 5),
+            'date_created': datetime(2026, 1, 1, 8, 30),
+            'name': 'Café',
+        }
+
+        assert app_context.json.dumps(row) == (
+            '{"trip_id":1,"latitude":44.5646,"begin_date":"2026-01-05",'
+            '"date_created":"2026-01-01T08:30:00","name":"Café"}'
+        )
+        assert app_context.json.loads('{"a":[1,2.5]}') == {'a': [1, 2.5]}
+
+    def test_unknown_type_rejected(self, app_context, encoder):
+        '''Test values without a JSON form still raise TypeError'''
+
+        with pytest.raises(TypeError):
+            app_context.json.dumps({'value': object()})
+
+    def test_route_response(self, client, app, auth_header, mock_db_connection, encoder):
+        '''Test route responses send typed values the client can use directly'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {
+            'campsite_id': 1, 'campsite_name': 'Site', 'user_id': 1, 'is_public': True,
+            'latitude': Decimal('44.5000000'), 'longitude': Decimal('-123.2500000'),
+        }
+
+        response = client.get('/api/campsites/1', headers=auth_header)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/json'
+        assert response.get_json()['latitude'] == 44.5
+        assert response.get_json()['longitude'] == -123.25
@@ -0,0 +1,80 @@
+"""
+Tests db/pagination.py and the paginated list routes
+"""
+
+
+from app.db.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, parse_page_args
+
+
+class TestParsePageArgs:
+    '''Tests reading limit and after from request args'''
+
+    def test_defaults_and_cap(self):
+        '''Test limit defaults, and is capped at MAX_PAGE_SIZE'''
+
+        assert parse_page_args({}) == (100, 0)
+        assert parse_page_args({'limit': '10', 'after': '42'}) == (10, 42)
+        assert parse_page_args({'limit': str(MAX_PAGE_SIZE * 10)}) == (MAX_PAGE_SIZE, 0)
+
+    def test_rejects_invalid_values(self):
+        '''Test non-integer, zero and negative values are rejected'''
+
+        assert parse_page_args({'limit': 'ten'}) is None
+        assert parse_page_args({'limit': '0'}) is None
+        assert parse_page_args({'after': '-1'}) is None
+
+
+class TestPaginatedRoutes:
+    '''Tests keyset pagination of the list endpoints'''
+
+    def test_next_cursor_when_more_rows(self, client, app, auth_header, mock_db_connection):
+        '''Test one extra row is fetched to decide whether a next page exists'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [
+            {'trip_id': 3, 'trip_name': 'Trip 3', 'date_created': '2026-01-03'},
+            {'trip_id': 5, 'trip_name': 'Trip 5', 'date_created': '2026-01-05'},
+            {'trip_id': 8, 'trip_name': 'Trip 8', 'date_created': '2026-01-08'},
+        ]
+
+        response = client.get('/api/trips?limit=2&after=2', headers=auth_header)
+
+        assert response.status_code == 200
+        assert [trip['trip_id'] for trip in response.get_json()] == [3, 5]
+        assert response.headers[NEXT_CURSOR_HEADER] == '5'
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert 'ORDER BY trip_id' in query
+        assert params == (1, 2, 3)
+
+    def test_last_page_has_no_cursor(self, client, app, auth_header, mock_db_connection):
+        '''Test the final page omits the next cursor'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [{'user_id': 7, 'email': 'a@b.c'}]
+
+        response = client.get('/api/users?limit=2', headers=auth_header)
+
+        assert response.get_json() == [{'user_id': 7, 'email': 'a@b.c'}]
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    def test_limit_capped_server_side(self, client, app, auth_header, mock_db_connection):
+        '''Test clients cannot request more than MAX_PAGE_SIZE rows'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = []
+
+        response = client.get('/api/campsites?limit=1000000', headers=auth_header)
+
+        assert response.status_code == 200
+        query, params = mock_cursor.execute.call_args[0]
+        assert 'ORDER BY campsite_id' in query
+        assert params == (1, 0, MAX_PAGE_SIZE + 1)
+
+    def test_invalid_cursor_rejected(self, client, app, auth_header):
+        '''Test a malformed cursor returns 400'''
+
+        response = client.get('/api/trips/1/entries?after=abc', headers=auth_header)
+
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
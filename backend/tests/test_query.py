@@ -0,0 +1,116 @@
+"""
+Tests db/query.py
+"""
+
+import pytest
+
+from app.db.query import iter_query
+
+
+class TestRequestConnection:
+    '''Tests binding of one connection to each request'''
+
+    def test_get_does_not_commit(self, client, app, auth_header, mock_db_connection):
+        '''Test read-only requests skip the commit round trip'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {'campsite_id': 1}
+
+        response = client.get('/api/campsites/1', headers=auth_header)
+
+        assert response.status_code == 200
+        mock_conn.start_transaction.assert_not_called()
+        mock_conn.commit.assert_not_called()
+        mock_conn.close.assert_called_once()
+
+    def test_update_uses_one_connection_and_commits_once(self, client, app, auth_header, mocker, mock_db_connection):
+        '''Test the access-checked update runs as one statement in one transaction'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        get_conn = mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
+        mock_cursor.fetchone.return_value = {'campsite_id': 1}
+
+        campsite_data = {
+            "campsite_name": "Campsite One",
+            "latitude": 45.5,
+            "longitude": -122.5,
+            "campsite_type": "RV",
+            "is_public": False,
+            "dump_available": False,
+            "electric_hookup_available": True,
+            "water_available": True,
+            "restroom_available": True,
+            "shower_available": True,
+            "pets_allowed": False,
+            "wifi_available": False
+        }
+
+        response = client.put('/api/campsites/1', json=campsite_data, headers=auth_header)
+
+        assert response.status_code == 200
+        assert get_conn.call_count == 1
+        assert mock_cursor.execute.call_count == 1
+        mock_conn.start_transaction.assert_called_once()
+        mock_conn.commit.assert_called_once()
+        mock_conn.rollback.assert_not_called()
+        mock_conn.close.assert_called_once()
+
+    def test_error_response_rolls_back(self, client, app, auth_header, mock_db_connection):
+        '''Test a failed mutating request does not commit'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = None
+
+        response = client.delete('/api/campsites/1', headers=auth_header)
+
+        assert response.status_code == 403
+        mock_conn.commit.assert_not_called()
+        mock_conn.rollback.assert_called_once()
+        mock_conn.close.assert_called_once()
+
+
+class TestIterQuery:
+    '''Tests streaming rows from an unbuffered cursor'''
+
+    def test_streams_in_batches(self, app_context, mock_db_connection):
+        '''Test rows are fetched batch_size at a time and the cursor closed at the end'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchmany.side_effect = [[{'id': 1}, {'id': 2}], [{'id': 3}], []]
+
+        rows = list(iter_query('SELECT id FROM campsites;', batch_size=2))
+
+        assert [row['id'] for row in rows] == [1, 2, 3]
+        assert mock_cursor.fetchmany.call_count == 3
+        mock_cursor.close.assert_called_once()
+
+    def test_closed_early_reads_past_remaining_rows(self, app_context, mock_db_connection):
+        '''Test closing the generator after one row drains the result before closing the cursor'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchmany.side_effect = [[{'id': 1}, {'id': 2}], [{'id': 3}], []]
+
+        def close():
+            if mock_cursor.fetchmany.call_count < 3:
+                raise RuntimeError('Unread result found')
+        mock_cursor.close.side_effect = close
+
+        rows = iter_query('SELECT id FROM campsites;', batch_size=2)
+        assert next(rows) == {'id': 1}
+        rows.close()
+
+        assert mock_cursor.fetchmany.call_count == 3
+        mock_cursor.close.assert_called_once()
+
+    def test_failed_execute_raises_original_error(self, app_context, mock_db_connection):
+        '''Test a failed execute is not masked by draining a missing result set'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.execute.side_effect = RuntimeError('Unknown column')
+        mock_cursor.fetchmany.side_effect = RuntimeError('No result set to fetch from')
+
+        with pytest.raises(RuntimeError, match='Unknown column'):
+            list(iter_query('SELECT nope FROM campsites;'))
+
+        mock_cursor.fetchmany.assert_not_called()
+        mock_cursor.close.assert_called_once()
@@ -13,7 +13,7 @@ class TestCreateTrip:
         '''Test successful creation of trip'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trips.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = None
         mock_cursor.lastrowid = 1
 
@@ -46,7 +46,7 @@ class TestCreateTrip:
         '''Test fails when trip is created with no name'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trips.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = None
         mock_cursor.lastrowid = 1
 
@@ -80,7 +80,7 @@ class TestAddCampsiteToTrip:
         '''Test successful addition of campsite to trip'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trip_entries.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = {'trip_id': 1}
         mock_cursor.lastrowid = 1
 
@@ -116,7 +116,7 @@ class TestAddCampsiteToTrip:
         '''Test fail when adding same campsite with same dates'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trip_entries.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         
         token = jwt.encode(
             {
@@ -176,7 +176,7 @@ class TestAddCampsiteToTrip:
         '''Test successful when adding same campsite with different dates'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trip_entries.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         
         token = jwt.encode(
             {
@@ -247,7 +247,7 @@ class TestRemoveCampsiteFromTrip:
         '''Test successful removal of campsite from trip'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trip_entries.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = {'trip_id': 1}
         mock_cursor.lastrowid = 1
 
@@ -299,7 +299,7 @@ class TestDeleteTrip:
         '''Test successful deletion of trip'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trips.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = {'trip_id': 1}
         mock_cursor.lastrowid = 1
 
@@ -330,7 +330,7 @@ class TestListTrips:
         '''Test sucessful retreving all trips owned by user'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trips.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchall.return_value = [
             {'trip_id': 1, 'trip_name': 'Trip 1', 'date_created': '2026-01-01'},
             {'trip_id': 2, 'trip_name': 'Trip 2', 'date_created': '2026-01-02'},
@@ -362,7 +362,7 @@ class TestListTrips:
         '''Test sucessful when retreving a trip by user'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trips.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = {'trip_id': 1}
         mock_cursor.lastrowid = 1
 
@@ -394,7 +394,7 @@ class TestUpdateTrips:
         '''Tests sucessful when updating a trip'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trips.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = None
         mock_cursor.lastrowid = 1
 
@@ -449,7 +449,7 @@ class TestVerificationOfTripOwnership:
         '''Tests fails when different user tries to CRUD trip entries they don't own'''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trip_entries.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         
         token = jwt.encode(
             {
@@ -471,6 +471,7 @@ class TestVerificationOfTripOwnership:
 
         # POST - add campsite to trip (fail)
         mock_cursor.fetchone.return_value = None
+        mock_cursor.rowcount = 0
         payload = {
             'campsite_id': 1,
             'begin_date': '2026-01-01',
@@ -486,6 +487,7 @@ class TestVerificationOfTripOwnership:
 
         # PUT - update trip entry (fail)
         mock_cursor.fetchone.return_value = None
+        mock_cursor.rowcount = 0
         payload = {
             'begin_date': '2026-01-05',
             'end_date': '2026-01-07',
@@ -500,6 +502,7 @@ class TestVerificationOfTripOwnership:
 
         # DELETE - remove entry from trip (fail)
         mock_cursor.fetchone.return_value = None
+        mock_cursor.rowcount = 0
         response = client.delete(
             '/api/trips/999/entries/1',
             headers={'Authorization': f'Bearer {token}'}
@@ -515,7 +518,7 @@ class TestDateValidation:
         '''Tests fails when dates are inputed wrong '''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trip_entries.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = {'trip_id': 1}
         mock_cursor.lastrowid = 1
 
@@ -551,7 +554,7 @@ class TestDateValidation:
         '''Tests fails when end date is before begin date '''
 
         mock_conn, mock_cursor = mock_db_connection
-        mocker.patch('app.routes.trip_entries.get_db_connection', return_value=mock_conn)
+        mocker.patch('app.db.connection.get_db_connection', return_value=mock_conn)
         mock_cursor.fetchone.return_value = {'trip_id': 1}
         mock_cursor.lastrowid = 1
 
@@ -582,4 +585,247 @@ class TestDateValidation:
         data = response.get_json()
         assert 'error' in data
         assert isinstance(data['error'], str)
-        
\ No newline at end of file
+        
+
+class TestFoldedOwnershipChecks:
+    '''Tests ownership enforced inside the write statements'''
+
+    def test_add_entry_single_statement(self, client, app, mocker, mock_db_connection):
+        '''Tests adding an entry checks ownership in the INSERT ... SELECT'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.rowcount = 1
+        mock_cursor.lastrowid = 7
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+
+        response = client.post(
+            '/api/trips/1/entries',
+            json={'campsite_id': 3, 'begin_date': '2026-01-01', 'end_date': '2026-01-03'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+        assert response.status_code == 201
+        assert response.get_json()['trip_entry_id'] == 7
+        assert mock_cursor.execute.call_count == 1
+        query, params = mock_cursor.execute.call_args[0]
+        assert 'SELECT trip_id' in query and 'user_id = %s' in query
+        assert params[-2:] == (1, 1)
+
+    def test_missing_entry_of_owned_trip_not_found(self, client, app, mocker, mock_db_connection):
+        '''Tests a failed write on an owned trip returns 404, not 403'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.rowcount = 0
+        mock_cursor.fetchone.return_value = {'trip_id': 1}
+
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+
+        response = client.delete(
+            '/api/trips/1/entries/99',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+        assert response.status_code == 404
+        assert mock_cursor.execute.call_count == 2
+
+
+class TestBatchTripEntries:
+    '''Tests applying many trip entry changes in one request'''
+
+    def headers(self, app):
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_batch_applied_in_one_transaction(self, client, app, mocker, mock_db_connection):
+        '''Tests creates, updates and deletes are applied together and committed once'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {'trip_id': 1}
+        inserted_ids = iter([10, 14])
+
+        def count_rows(query, seq_params):
+            mock_cursor.rowcount = len(seq_params)
+        mock_cursor.executemany.side_effect = count_rows
+
+        def fake_execute(query, params):
+            if query.strip().startswith('DELETE'):
+                mock_cursor.rowcount = len(params) - 1
+            elif query.strip().startswith('INSERT'):
+                mock_cursor.lastrowid = next(inserted_ids)
+        mock_cursor.execute.side_effect = fake_execute
+
+        response = client.put(
+            '/api/trips/1/entries:batch',
+            json={
+                'create': [
+                    {'campsite_id': 3, 'begin_date': '2026-01-01', 'end_date': '2026-01-03'},
+                    {'campsite_id': 4, 'begin_date': '2026-01-03', 'end_date': '2026-01-05'},
+                ],
+                'update': [
+                    {'trip_entry_id': 5, 'begin_date': '2026-02-01', 'end_date': '2026-02-02', 'notes': 'x'},
+                ],
+                'delete': [6, 7],
+            },
+            headers=self.headers(app),
+        )
+
+        assert response.status_code == 200
+        assert response.get_json() == {'created': [10, 14], 'updated': 1, 'deleted': 2}
+        assert mock_cursor.executemany.call_count == 1
+        assert mock_conn.start_transaction.call_count == 1
+        assert mock_conn.commit.call_count == 1
+
+        ownership = [call for call in mock_cursor.execute.call_args_list if 'FROM trips' in call[0][0]]
+        assert len(ownership) == 1
+
+    def test_invalid_item_rejected_before_writing(self, client, app, mocker, mock_db_connection):
+        '''Tests one invalid date rejects the whole batch without touching the database'''
+
+        mock_conn, mock_cursor = mock_db_connection
+
+        response = client.put(
+            '/api/trips/1/entries:batch',
+            json={
+                'create': [
+                    {'campsite_id': 3, 'begin_date': '2026-01-01', 'end_date': '2026-01-03'},
+                    {'campsite_id': 4, 'begin_date': '2026-01-05', 'end_date': '2026-01-03'},
+                ],
+            },
+            headers=self.headers(app),
+        )
+
+        assert response.status_code == 400
+        assert response.get_json()['error'].startswith('create[1]')
+        assert mock_cursor.execute.call_count == 0
+
+    def test_batch_on_other_users_trip(self, client, app, mocker, mock_db_connection):
+        '''Tests a batch on a trip the user does not own is rejected'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = None
+
+        response = client.put(
+            '/api/trips/1/entries:batch',
+            json={'delete': [6]},
+            headers=self.headers(app),
+        )
+
+        assert response.status_code == 403
+        assert mock_cursor.executemany.call_count == 0
+
+    def test_missing_entry_rolls_back(self, client, app, mocker, mock_db_connection):
+        '''Tests an update of a missing entry fails the batch and rolls back'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchone.return_value = {'trip_id': 1}
+        mock_cursor.rowcount = 0
+
+        response = client.put(
+            '/api/trips/1/entries:batch',
+            json={'update': [{'trip_entry_id': 99, 'begin_date': '2026-01-01', 'end_date': '2026-01-02'}]},
+            headers=self.headers(app),
+        )
+
+        assert response.status_code == 404
+        assert mock_conn.rollback.call_count == 1
+        assert mock_conn.commit.call_count == 0
+
+
+class TestTripIncludes:
+    '''Tests embedding entries and campsites in GET /trips/<id>'''
+
+    def headers(self, app):
+        token = jwt.encode(
+            {
+                'user_id': 1,
+                'exp': datetime.now(timezone.utc) + timedelta(hours=1),
+            },
+            app.config['SECRET_KEY'],
+            algorithm='HS256',
+        )
+        return {'Authorization': f'Bearer {token}'}
+
+    def joined_row(self, trip_entry_id, campsite_id, is_public=True, user_id=1):
+        return {
+            'trip_id': 1, 'trip_name': 'Trip 1', 'date_created': '2026-01-01',
+            'trip_entry_id': trip_entry_id, 'campsite_id': campsite_id,
+            'begin_date': '2026-02-01', 'end_date': '2026-02-02', 'notes': None,
+            'campsite_name': f'Site {campsite_id}', 'latitude': 44.5, 'longitude': -123.2,
+            'is_public': is_public, 'user_id': user_id,
+        }
+
+    def test_entries_and_campsites_single_query(self, client, app, mocker, mock_db_connection):
+        '''Tests the trip, entries and campsite summaries come from one query'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [
+            self.joined_row(1, 10),
+            self.joined_row(2, 10),
+            self.joined_row(3, 11, is_public=False, user_id=2),
+        ]
+
+        response = client.get('/api/trips/1?include=entries,campsites', headers=self.headers(app))
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['trip_name'] == 'Trip 1'
+        assert [entry['trip_entry_id'] for entry in data['entries']] == [1, 2, 3]
+        assert data['entries'][2]['campsite_name'] == 'Site 11'
+        assert data['campsites'] == [
+            {'campsite_id': 10, 'campsite_name': 'Site 10', 'latitude': 44.5, 'longitude': -123.2},
+        ]
+        assert mock_cursor.execute.call_count == 1
+
+    def test_trip_without_entries(self, client, app, mocker, mock_db_connection):
+        '''Tests a trip with no entries returns empty lists'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        row = self.joined_row(None, None)
+        row.update({'campsite_name': None, 'is_public': None, 'user_id': None})
+        mock_cursor.fetchall.return_value = [row]
+
+        response = client.get('/api/trips/1?include=entries,campsites', headers=self.headers(app))
+
+        assert response.status_code == 200
+        assert response.get_json()['entries'] == []
+        assert response.get_json()['campsites'] == []
+
+    def test_other_users_trip_not_found(self, client, app, mocker, mock_db_connection):
+        '''Tests include does not bypass ownership'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = []
+
+        response = client.get('/api/trips/1?include=entries', headers=self.headers(app))
+
+        assert response.status_code == 404
+        assert 'AND t.user_id = %s' in mock_cursor.execute.call_args[0][0]
+
+    def test_unknown_include(self, client, app, mocker, mock_db_connection):
+        '''Tests unknown include names are rejected'''
+
+        response = client.get('/api/trips/1?include=entries,users', headers=self.headers(app))
+
+        assert response.status_code == 400
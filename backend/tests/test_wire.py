@@ -0,0 +1,137 @@
+"""
+Tests http/wire.py
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.http import wire
+
+
+def campsite_row(campsite_id, **overrides):
+    row = {
+        'campsite_id': campsite_id, 'campsite_name': f'Site {campsite_id}',
+        'latitude': Decimal('44.5'), 'longitude': Decimal('-123.25'),
+        'dump_available': False, 'electric_hookup_available': True,
+        'water_available': True, 'restroom_available': False,
+        'shower_available': False, 'pets_allowed': False, 'wifi_available': False,
+    }
+    row.update(overrides)
+    return row
+
+
+class TestWireFormats:
+    '''Tests Accept negotiation of list and trip payloads'''
+
+    def test_json_by_default(self, client, app, auth_header, mock_db_connection):
+        '''Test browsers and */* clients still get arrays of objects'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [campsite_row(1)]
+
+        response = client.get('/api/campsites', headers={**auth_header, 'Accept': 'application/json, text/plain, */*'})
+
+        assert response.mimetype == 'application/json'
+        assert 'Accept' in response.headers['Vary']
+        assert response.get_json()[0]['campsite_id'] == 1
+
+    def test_columns_pack_amenities(self, client, app, auth_header, mock_db_connection):
+        '''Test the columnar layout sends parallel arrays and an amenity bitmask'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [
+            campsite_row(1),
+            campsite_row(2, pets_allowed=True, electric_hookup_available=False),
+            campsite_row(3),
+        ]
+
+        response = client.get('/api/campsites?limit=2', headers={**auth_header, 'Accept': wire.COLUMNS_JSON})
+
+        assert response.mimetype == wire.COLUMNS_JSON
+        assert response.headers['X-Next-Cursor'] == '2'
+        body = response.get_json(force=True)
+        assert body['count'] == 2
+        assert body['columns']['campsite_id'] == [1, 2]
+        assert body['columns']['latitude'] == [44.5, 44.5]
+        assert body['columns']['amenity_mask'] == [0b110, 0b100100]
+        assert 'pets_allowed' not in body['columns']
+
+    def test_trip_entries_embedded_as_columns(self, client, app, auth_header, mock_db_connection):
+        '''Test a trip's embedded entries become columns inside the trip object'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [
+            {
+                'trip_id': 5, 'trip_name': 'Coast', 'date_created': date(2026, 1, 1),
+                'trip_entry_id': entry_id, 'campsite_id': 1, 'begin_date': date(2026, 2, entry_id),
+                'end_date': date(2026, 2, entry_id + 1), 'notes': None, 'campsite_name': 'Site 1',
+            }
+            for entry_id in (1, 2)
+        ]
+
+        response = client.get('/api/trips/5?include=entries', headers={**auth_header, 'Accept': wire.COLUMNS_JSON})
+
+        body = response.get_json(force=True)
+        assert body['trip_name'] == 'Coast'
+        assert body['entries']['count'] == 2
+        assert body['entries']['columns']['begin_date'] == ['2026-02-01', '2026-02-02']
+
+    def test_clusters_with_and_without_campsite_id(self, client, app, auth_header, mock_db_connection):
+        '''Test cluster rows missing keys of other rows get None in their columns'''
+
+        mock_conn, mock_cursor = mock_db_connection
+        isolated = campsite_row(1, latitude=45.9, longitude=-122.1, user_id=2, is_public=True)
+        points = [
+            campsite_row(i, latitude=44 + (i % 50) * 0.01, longitude=-123 - (i // 50) * 0.01, user_id=2, is_public=True)
+            for i in range(2, 302)
+        ]
+        mock_cursor.fetchall.side_effect = [[isolated, *points], []]
+
+        response = client.get('/api/campsites?bbox=43,-125,46,-122&zoom=6', headers={**auth_header, 'Accept': wire.COLUMNS_JSON})
+
+        assert response.status_code == 200
+        columns = response.get_json(force=True)['columns']
+        assert columns['campsite_id'][0] == 1
+        assert None in columns['campsite_id']
+        assert sum(columns['count']) == 301
+
+    def test_cached_per_format(self, client, app, auth_header, mock_db_connection):
+        '''Test cached responses are kept apart per negotiated format'''
+
+        app.config['CACHE_ROUTES'] = frozenset(['trips.list_trips'])
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [
+            {'trip_id': 1, 'trip_name': 'Trip 1', 'date_created': date(2026, 1, 1)},
+        ]
+
+        for accept in ('application/json', wire.COLUMNS_JSON, wire.COLUMNS_JSON):
+            response = client.get('/api/trips', headers={**auth_header, 'Accept': accept})
+            assert response.mimetype == accept
+
+        assert response.get_json(force=True)['columns']['trip_id'] == [1]
+        assert mock_cursor.execute.call_count == 2
+
+    def test_msgpack(self, client, app, auth_header, mock_db_connection):
+        '''Test msgpack bodies decode to the same rows'''
+
+        msgpack = pytest.importorskip('msgpack')
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = [campsite_row(1)]
+
+        response = client.get('/api/campsites', headers={**auth_header, 'Accept': wire.MSGPACK})
+
+        assert response.mimetype == wire.MSGPACK
+        assert msgpack.unpackb(response.data)[0]['latitude'] == 44.5
+
+    def test_msgpack_unavailable_falls_back_to_json(self, client, app, auth_header, mock_db_connection, monkeypatch):
+        '''Test msgpack is not offered without the msgpack package'''
+
+        monkeypatch.setattr(wire, 'msgpack', None)
+        mock_conn, mock_cursor = mock_db_connection
+        mock_cursor.fetchall.return_value = []
+
+        response = client.get('/api/campsites', headers={**auth_header, 'Accept': wire.MSGPACK})
+
+        assert response.mimetype == 'application/json'
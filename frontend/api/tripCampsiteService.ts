@@ -5,6 +5,24 @@ import { api } from "./axios";
 
 ///////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 
+// list endpoints return one page at a time; the cursor of the next page
+// comes in the X-Next-Cursor header and is sent back as `after`
+export const PAGE_SIZE = 500;
+
+export const getAllPages = async <T>(path: string): Promise<T[]> => {
+    const rows: T[] = [];
+    let after: string | undefined;
+    do {
+        const params = after ? { limit: PAGE_SIZE, after } : { limit: PAGE_SIZE };
+        const response = await api.get<T[]>(path, { params });
+        rows.push(...response.data);
+        after = response.headers?.["x-next-cursor"];
+    } while (after);
+    return rows;
+};
+
+///////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+
 // structures regarding trips //
 export interface Trips {
     trip_id: number;
@@ -20,6 +38,35 @@ export interface TripEntry {
     notes: string
 }
 
+export interface CampsiteSummary {
+    campsite_id: number
+    campsite_name: string
+    latitude: number
+    longitude: number
+}
+
+// list sent as parallel arrays (Accept: application/vnd.rvcp.columns+json)
+export const COLUMNS_JSON = "application/vnd.rvcp.columns+json";
+
+export interface Columns {
+    count: number
+    columns: Record<string, unknown[]>
+}
+
+// rebuilds the rows of a columnar list
+export const fromColumns = <T>(data: Columns): T[] => {
+  const names = Object.keys(data.columns);
+  return Array.from({ length: data.count }, (_, i) =>
+    Object.fromEntries(names.map((name) => [name, data.columns[name][i]])) as T
+  );
+};
+
+// trip with related data embedded by getTripDetails(id, include)
+export interface TripDetails extends Trips {
+    entries?: (TripEntry & { campsite_name: string })[]
+    campsites?: CampsiteSummary[]
+}
+
 export interface CreateTripRequest {
     trip_name: string;
 }
@@ -40,6 +87,18 @@ export interface AddTripEntryResponse {
     trip_entry_id: number;
 }
 
+export interface TripEntryChanges {
+    create?: Omit<TripEntry, "trip_entry_id">[];
+    update?: TripEntry[];
+    delete?: number[];
+}
+
+export interface TripEntryBatchResponse {
+    created: number[];
+    updated: number;
+    deleted: number;
+}
+
 ///////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 
 // structures regarding campsites //
@@ -108,8 +167,7 @@ export interface EditCampsiteRequest {
 // functions regarding trips //
 // function that gets all trips for the logged-in user
 export const getTrips = async () => {
-    const trip = await api.get<Trips[]>('/trips');        // "trips" is endpoint
-    return trip.data;
+    return getAllPages<Trips>('/trips');        // "trips" is endpoint
 };
 
 // function to create a trip
@@ -131,8 +189,10 @@ export const deleteTrip = async (id: number) => {
 };
 
 // function that fetches trip's details
-export const getTripDetails = async (id: number) => {
-    const trip = await api.get<Trips>(`/trips/${id}`);        // "trips" is endpoint
+// include=["entries", "campsites"] embeds the trip's entries and campsite summaries in the same request
+export const getTripDetails = async (id: number, include: ("entries" | "campsites")[] = []) => {
+    const query = include.length ? `?include=${include.join(",")}` : "";
+    const trip = await api.get<TripDetails>(`/trips/${id}${query}`);        // "trips" is endpoint
     return trip.data;
 };
 
@@ -141,8 +201,7 @@ export const getTripDetails = async (id: number) => {
 // functions regarding campsites // 
 // function that gets the closest campsites based on location
 export const getCampsites = async () => {
-    const campsites = await api.get<Campsites[]>('/campsites');        // "campsites" is endpoint
-    return campsites.data;
+    return getAllPages<Campsites>('/campsites');        // "campsites" is endpoint
 };
 
 // function to create a campsite
@@ -204,6 +263,12 @@ export const updateTripEntry = async (tripId: number, entryId: number, data: any
   return res.data
 }
 
+// function to apply many entry creates/updates/deletes in one request (all or nothing)
+export const batchUpdateTripEntries = async (tripId: number, changes: TripEntryChanges) => {
+  const res = await api.put<TripEntryBatchResponse>(`/trips/${tripId}/entries:batch`, changes)
+  return res.data
+}
+
 ///////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 
 // function that fetches campsites within 50 miles of a location
@@ -218,4 +283,42 @@ export const getNearbyCampsites = async (latitude?: number, longitude?: number)
   return response.data;
 };
 
-///////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
\ No newline at end of file
+///////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+// function that fetches campsites inside the visible map region (viewport)
+// a region crossing the antimeridian is sent with minLon > maxLon
+export const getCampsitesInRegion = async (region: {
+  latitude: number
+  longitude: number
+  latitudeDelta: number
+  longitudeDelta: number
+}) => {
+  const wrap = (lon: number) => ((((lon + 180) % 360) + 360) % 360) - 180;
+
+  const minLat = Math.max(region.latitude - region.latitudeDelta / 2, -90);
+  const maxLat = Math.min(region.latitude + region.latitudeDelta / 2, 90);
+  const minLon = region.longitudeDelta >= 360 ? -180 : wrap(region.longitude - region.longitudeDelta / 2);
+  const maxLon = region.longitudeDelta >= 360 ? 180 : wrap(region.longitude + region.longitudeDelta / 2);
+
+  const response = await api.get<Columns>(`/campsites?bbox=${minLat},${minLon},${maxLat},${maxLon}&fields=map`, {
+    headers: { Accept: COLUMNS_JSON },
+  });
+  return fromColumns<CampsiteSummary>(response.data);
+};
+
+// changes to the campsites visible to the user since a sync token ("0" for a
+// full snapshot); keep calling with `next` while has_more is true. A 410
+// response means the token expired and the store must resync from "0".
+export interface CampsiteChanges {
+    upserts: CampsiteSummary[]
+    deleted: number[]
+    next: string
+    has_more: boolean
+}
+
+export const getCampsiteChanges = async (since: string = "0") => {
+  const response = await api.get<CampsiteChanges>(`/campsites/changes?since=${since}&fields=map`);
+  return response.data;
+};
+
+///////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
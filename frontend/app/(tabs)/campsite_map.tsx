@@ -5,7 +5,7 @@ import { styles } from "../styles"
 import { router } from 'expo-router'
 import React, { useState, useEffect } from 'react'
 import Map from '../../components/Map'
-import { getNearbyCampsites } from '../../api/tripCampsiteService'
+import { getCampsitesInRegion } from '../../api/tripCampsiteService'
 import * as Location from "expo-location"
 
 
@@ -32,15 +32,12 @@ const CampsiteMap = () => {
   const handleRegionChange = async (region) => {
     setMapRegion(region);
 
-    const data = await getNearbyCampsites(
-      region.latitude,
-      region.longitude
-    );
+    const data = await getCampsitesInRegion(region);
 
     const formatted = data.map((c) => ({
       id: c.campsite_id.toString(),
-      latitude: Number(c.latitude),
-      longitude: Number(c.longitude),
+      latitude: c.latitude,
+      longitude: c.longitude,
       title: c.campsite_name ?? "Unnamed Campsite",
     }));
     setCampsites(formatted);
@@ -65,20 +62,21 @@ const CampsiteMap = () => {
         setLocationReady(true);
 
         // Update map region
-        setMapRegion({
+        const region = {
           latitude,
           longitude,
           latitudeDelta: 1.75,
           longitudeDelta: 1.75,
-        });
+        };
+        setMapRegion(region);
 
-        // Fetch nearby campsites
-        const data = await getNearbyCampsites(latitude, longitude);
+        // Fetch campsites in the visible region
+        const data = await getCampsitesInRegion(region);
 
         const formattedCampsite = data.map((campsite) => ({
           id: campsite.campsite_id.toString(),
-          latitude: Number(campsite.latitude),
-          longitude: Number(campsite.longitude),
+          latitude: campsite.latitude,
+          longitude: campsite.longitude,
           title: campsite.campsite_name ?? "Unnamed Campsite",
         }));
 
@@ -9,11 +9,8 @@ import {
   getTripDetails,
   editTrip,
   deleteTrip,
-  getTripEntries,
   getCampsites,
-  addCampsiteToTrip,
-  removeCampsiteFromTrip,
-  updateTripEntry
+  batchUpdateTripEntries
 } from '../../api/tripCampsiteService'
 
 //============================
@@ -68,6 +65,7 @@ const EditTrip = () => {
   const { id } = useLocalSearchParams<{ id: string }>()
   const [tripName, setTripName] = useState("")
   const [entries, setEntries] = useState<any[]>([])
+  const [removedEntryIds, setRemovedEntryIds] = useState<number[]>([])
   const [campsites, setCampsites] = useState<any[]>([])
   const [loading, setLoading] = useState(true)
 
@@ -81,19 +79,21 @@ const EditTrip = () => {
       try {
         if (!id) return
 
-        const trip = await getTripDetails(Number(id))
+        // trip with its entries, and the campsite picker options, in parallel
+        const [trip, campsiteData] = await Promise.all([
+          getTripDetails(Number(id), ["entries"]),
+          getCampsites()
+        ])
         setTripName(trip.trip_name)
 
-        const entryData = await getTripEntries(Number(id))
         setEntries(
-          (entryData || []).map((entry: any) => ({
+          (trip.entries || []).map((entry: any) => ({
             ...entry,
             begin_date: formatDateForDisplay(entry.begin_date),
             end_date: formatDateForDisplay(entry.end_date)
           }))
         )
 
-        const campsiteData = await getCampsites()
         setCampsites(campsiteData)
 
       } catch (error) {
@@ -129,11 +129,12 @@ const EditTrip = () => {
     ])
   }
 
-  const removeEntry = async (index: number) => {
+  const removeEntry = (index: number) => {
     const entry = entries[index]
 
+    // deleted together with the other changes on confirm
     if (entry.trip_entry_id) {
-      await removeCampsiteFromTrip(Number(id), entry.trip_entry_id)
+      setRemovedEntryIds([...removedEntryIds, entry.trip_entry_id])
     }
 
     const updated = [...entries]
@@ -158,7 +159,10 @@ const EditTrip = () => {
         trip_name: tripName
       })
 
-      // process campsite entries
+      // collect campsite entry changes
+      const creates = []
+      const updates = []
+
       for (const entry of entries) {
 
         if (!entry.campsite_id) continue
@@ -178,22 +182,23 @@ const EditTrip = () => {
 
         // update existing entry
         if (entry.trip_entry_id) {
-          await updateTripEntry(
-            Number(id),
-            entry.trip_entry_id,
-            payload
-          )
+          updates.push({ ...payload, trip_entry_id: entry.trip_entry_id })
         }
 
         // create new entry
         else {
-          await addCampsiteToTrip(
-            Number(id),
-            payload
-          )
+          creates.push(payload)
         }
       }
 
+      // apply every entry change in one request
+      await batchUpdateTripEntries(Number(id), {
+        create: creates,
+        update: updates,
+        delete: removedEntryIds
+      })
+      setRemovedEntryIds([])
+
       Alert.alert(
         "Edit Successful!",
         "Your trip update is complete.",
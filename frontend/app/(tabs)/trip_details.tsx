@@ -5,7 +5,6 @@ import { styles } from "../styles"
 import { router, useLocalSearchParams } from 'expo-router'
 import React, { useState, useEffect } from 'react'
 import { getTripDetails } from '../../api/tripCampsiteService'
-import { api } from '../../api/axios'
 import { deleteTrip } from '../../api/tripCampsiteService'
 
 //============================
@@ -46,12 +45,12 @@ const TripDetails = () => {
 
         if (!id) return
 
-        const tripData = await getTripDetails(Number(id))
+        // trip and its entries in one request
+        const tripData = await getTripDetails(Number(id), ["entries"])
         setTrip(tripData)
 
-        const entriesRes = await api.get(`/trips/${id}/entries`)
         setEntries(
-          (entriesRes.data || []).map((entry: any) => ({
+          (tripData.entries || []).map((entry: any) => ({
             ...entry,
             begin_date: formatDateForDisplay(entry.begin_date),
             end_date: formatDateForDisplay(entry.end_date)
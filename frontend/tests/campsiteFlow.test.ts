@@ -90,10 +90,26 @@ describe('get campsite(s)', () => {
 
         const result = await campsiteService.getCampsites();
 
-        expect(mockedApi.get).toHaveBeenCalledWith('/campsites');
+        expect(mockedApi.get).toHaveBeenCalledWith('/campsites', { params: { limit: 500 } });
         expect(result).toEqual(expectedResult);
     });
 
+    it('should follow X-Next-Cursor past the first page', async () => {
+
+        const firstPage = [{ campsite_id: 1 }, { campsite_id: 2 }];
+        const lastPage = [{ campsite_id: 3 }];
+
+        mockedApi.get
+            .mockResolvedValueOnce({data: firstPage, headers: {'x-next-cursor': '2'}})
+            .mockResolvedValueOnce({data: lastPage, headers: {}});
+
+        const result = await campsiteService.getCampsites();
+
+        expect(mockedApi.get).toHaveBeenCalledTimes(2);
+        expect(mockedApi.get).toHaveBeenLastCalledWith('/campsites', { params: { limit: 500, after: '2' } });
+        expect(result).toEqual([...firstPage, ...lastPage]);
+    });
+
     it('should sucessfully get campsite details', async () => {
 
         const expectedResult = {
@@ -142,10 +142,24 @@ describe('list trip(s)', () => {
 
         const result = await tripService.getTrips();
 
-        expect(mockedApi.get).toHaveBeenCalledWith('/trips');
+        expect(mockedApi.get).toHaveBeenCalledWith('/trips', { params: { limit: 500 } });
         expect(result).toEqual(expectedResult);
     });
 
+    it('should get every page of trips', async () => {
+        const firstPage = [{ trip_id: 1, trip_name: 'Trip 1', date_created: '2026-02-27' }];
+        const lastPage = [{ trip_id: 2, trip_name: 'Trip 2', date_created: '2026-02-15' }];
+
+        mockedApi.get
+            .mockResolvedValueOnce({data: firstPage, headers: {'x-next-cursor': '1'}})
+            .mockResolvedValueOnce({data: lastPage, headers: {}});
+
+        const result = await tripService.getTrips();
+
+        expect(mockedApi.get).toHaveBeenLastCalledWith('/trips', { params: { limit: 500, after: '1' } });
+        expect(result).toEqual([...firstPage, ...lastPage]);
+    });
+
     it('should get trip details for user', async () => {
         const expectedResult = {
                 trip_id: '1',